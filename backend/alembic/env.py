@@ -29,7 +29,8 @@ if config.config_file_name is not None:
 # Import all models for autogenerate support
 from app.database import Base
 from app.models import (
-    User, Theater, Screen, Seat, Movie, Showtime, Booking, BookingSeat, Payment
+    User, Theater, Screen, Seat, Movie, Showtime, Booking, BookingSeat, ReleasedBookingSeat,
+    ShowtimeSeat, Payment
 )
 
 target_metadata = Base.metadata
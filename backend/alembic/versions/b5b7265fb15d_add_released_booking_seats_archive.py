@@ -0,0 +1,57 @@
+"""add_released_booking_seats_archive
+
+Revision ID: b5b7265fb15d
+Revises: a5eb76bdcc56
+Create Date: 2026-10-17 09:12:40.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5b7265fb15d'
+down_revision: Union[str, None] = 'a5eb76bdcc56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('released_booking_seats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=False),
+    sa.Column('seat_id', sa.Integer(), nullable=False),
+    sa.Column('showtime_id', sa.Integer(), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('released_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['seat_id'], ['seats.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['showtime_id'], ['showtimes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_released_booking_seats_id'), 'released_booking_seats', ['id'], unique=False)
+    op.create_index(op.f('ix_released_booking_seats_booking_id'), 'released_booking_seats', ['booking_id'], unique=False)
+
+    # Release seats still pinned by cancelled/expired bookings
+    op.execute("""
+        INSERT INTO released_booking_seats (booking_id, seat_id, showtime_id, price)
+        SELECT bs.booking_id, bs.seat_id, bs.showtime_id, bs.price
+        FROM booking_seats bs
+        JOIN bookings b ON b.id = bs.booking_id
+        WHERE b.status IN ('CANCELLED', 'EXPIRED')
+    """)
+    op.execute("""
+        DELETE FROM booking_seats
+        WHERE booking_id IN (
+            SELECT id FROM bookings WHERE status IN ('CANCELLED', 'EXPIRED')
+        )
+    """)
+
+
+def downgrade() -> None:
+    # Archived rows are dropped: restoring them could violate unique_seat_per_showtime
+    op.drop_index(op.f('ix_released_booking_seats_booking_id'), table_name='released_booking_seats')
+    op.drop_index(op.f('ix_released_booking_seats_id'), table_name='released_booking_seats')
+    op.drop_table('released_booking_seats')
@@ -0,0 +1,60 @@
+"""add_showtime_seats_inventory
+
+Revision ID: c41e7a2d9f06
+Revises: b5b7265fb15d
+Create Date: 2026-10-17 14:03:27.561930
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41e7a2d9f06'
+down_revision: Union[str, None] = 'b5b7265fb15d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('showtime_seats',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('showtime_id', sa.Integer(), nullable=False),
+    sa.Column('seat_id', sa.Integer(), nullable=False),
+    sa.Column('state', sa.Enum('FREE', 'HELD', 'BOOKED', name='seatstate'), server_default='FREE', nullable=False),
+    sa.Column('booking_id', sa.Integer(), nullable=True),
+    sa.Column('held_until', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['booking_id'], ['bookings.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['seat_id'], ['seats.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['showtime_id'], ['showtimes.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('showtime_id', 'seat_id', name='unique_inventory_seat_per_showtime')
+    )
+    op.create_index(op.f('ix_showtime_seats_id'), 'showtime_seats', ['id'], unique=False)
+    op.create_index(op.f('ix_showtime_seats_booking_id'), 'showtime_seats', ['booking_id'], unique=False)
+
+    # One row per seat per existing showtime, holding the live booking if any
+    op.execute("""
+        INSERT INTO showtime_seats (showtime_id, seat_id, state, booking_id, held_until)
+        SELECT st.id, s.id,
+               CASE
+                   WHEN b.status = 'CONFIRMED' THEN 'BOOKED'
+                   WHEN b.status = 'PENDING' THEN 'HELD'
+                   ELSE 'FREE'
+               END::seatstate,
+               b.id,
+               CASE WHEN b.status = 'PENDING' THEN b.expires_at END
+        FROM showtimes st
+        JOIN seats s ON s.screen_id = st.screen_id
+        LEFT JOIN booking_seats bs ON bs.showtime_id = st.id AND bs.seat_id = s.id
+        LEFT JOIN bookings b ON b.id = bs.booking_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_showtime_seats_booking_id'), table_name='showtime_seats')
+    op.drop_index(op.f('ix_showtime_seats_id'), table_name='showtime_seats')
+    op.drop_table('showtime_seats')
+    sa.Enum(name='seatstate').drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,44 @@
+"""add_hot_path_indexes
+
+Revision ID: d8a3f5c1b2e9
+Revises: c41e7a2d9f06
+Create Date: 2026-10-17 16:41:08.302715
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd8a3f5c1b2e9'
+down_revision: Union[str, None] = 'c41e7a2d9f06'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, extra kwargs)
+INDEXES = [
+    ('ix_booking_seats_showtime_id', 'booking_seats', ['showtime_id'], {}),
+    ('ix_bookings_user_id_created_at', 'bookings', ['user_id', 'created_at', 'id'], {}),
+    ('ix_bookings_pending_expires_at', 'bookings', ['expires_at'],
+     {'postgresql_where': sa.text("status = 'PENDING'")}),
+    ('ix_showtimes_movie_id_start_time', 'showtimes', ['movie_id', 'start_time'], {}),
+    ('ix_showtimes_screen_id_start_time_end_time', 'showtimes', ['screen_id', 'start_time', 'end_time'], {}),
+    ('ix_movies_created_at_id', 'movies', ['created_at', 'id'], {}),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps bookings writable while the indexes build; it can't run in a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, unique=False,
+                            postgresql_concurrently=True, if_not_exists=True, **kwargs)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -1,14 +1,14 @@
 from fastapi import APIRouter, HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User, UserRole
-from app.crud.user import (
-    get_user_by_email, create_user, authenticate_user
-)
+from app.crud.aio import user as crud_user
 from app.schemas.user import UserCreate, UserLogin, Token, UserResponse, UserLocationUpdate
+from app.services.password_hasher import password_hasher, PasswordHasherBusy
+from app.services.principal_cache import principal_cache
 from .security import (
     create_access_token,
     get_current_user,
@@ -18,19 +18,52 @@ from .security import (
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
 
+def _hasher_busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many sign-ins in progress, please retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
+async def _authenticate(db: AsyncSession, email: str, password: str):
+    """
+    Check credentials with bcrypt on the password_hasher pool, and store a
+    rehashed password when the work factor (BCRYPT_ROUNDS) has changed.
+    """
+    user = await crud_user.get_user_by_email(db, email)
+    if not user or not user.password_hash:
+        return None  # Unknown user, or OAuth user trying to login with password
+    
+    try:
+        verified, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    if not verified:
+        return None
+    if new_hash:
+        user = await crud_user.set_password_hash(db, user.id, new_hash) or user
+    return user
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """Register a new user"""
     # Check if user already exists
-    existing_user = get_user_by_email(db, user_data.email)
+    existing_user = await crud_user.get_user_by_email(db, user_data.email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
     
+    try:
+        password_hash = await password_hasher.hash(user_data.password)
+    except PasswordHasherBusy:
+        raise _hasher_busy()
+    
     # Create user in database
-    user = create_user(db, user_data)
+    user = await crud_user.create_user(db, user_data, password_hash)
     
     return UserResponse(
         id=user.id,
@@ -43,9 +76,9 @@ async def register(user_data: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login", response_model=Token)
-async def login(user_data: UserLogin, db: Session = Depends(get_db)):
+async def login(user_data: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Login user and return JWT token"""
-    user = authenticate_user(db, user_data.email, user_data.password)
+    user = await _authenticate(db, user_data.email, user_data.password)
     
     if not user:
         raise HTTPException(
@@ -82,10 +115,10 @@ async def login(user_data: UserLogin, db: Session = Depends(get_db)):
 @router.post("/login/oauth2", response_model=Token)
 async def login_oauth2(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """OAuth2 compatible login endpoint (for OpenAPI docs)"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await _authenticate(db, form_data.username, form_data.password)
     
     if not user:
         raise HTTPException(
@@ -141,22 +174,28 @@ async def logout(current_user: User = Depends(get_current_user)):
 async def update_location(
     location_data: UserLocationUpdate,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Update user's GPS location"""
-    current_user.latitude = location_data.latitude
-    current_user.longitude = location_data.longitude
+    # current_user may be a detached copy from the principal cache
+    user = await db.get(User, current_user.id)
+    if user is None:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    
+    user.latitude = location_data.latitude
+    user.longitude = location_data.longitude
     if location_data.city:
-        current_user.city = location_data.city
+        user.city = location_data.city
     
-    db.commit()
-    db.refresh(current_user)
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.invalidate(user.id)
     
     return UserResponse(
-        id=current_user.id,
-        email=current_user.email,
-        name=current_user.name,
-        role=current_user.role,
-        is_verified=current_user.is_verified,
-        created_at=current_user.created_at
+        id=user.id,
+        email=user.email,
+        name=user.name,
+        role=user.role,
+        is_verified=user.is_verified,
+        created_at=user.created_at
     )
@@ -1,16 +1,18 @@
 from datetime import datetime, timedelta
 from typing import Optional, Callable
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.user import User, UserRole
+from app.services.password_hasher import pwd_context
+from app.services.principal_cache import principal_cache
 
 load_dotenv()
 
@@ -19,7 +21,6 @@ SECRET_KEY = os.getenv("SECRET_KEY", "09d25e094faa6ca2556c818166b7a9563b93f7099f
 ALGORITHM = os.getenv("ALGORITHM", "HS256")
 ACCESS_TOKEN_EXPIRE_MINUTES = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
 class TokenData(BaseModel):
@@ -27,6 +28,12 @@ class TokenData(BaseModel):
     email: Optional[str] = None
     role: Optional[str] = None
 
+class Principal(BaseModel):
+    """Identity taken from a verified access token, without a DB lookup"""
+    id: int
+    email: str
+    role: UserRole
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hashed password"""
     return pwd_context.verify(plain_password, hashed_password)
@@ -68,29 +75,55 @@ def decode_access_token(token: str) -> TokenData:
 
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> User:
-    """Get the current authenticated user from the token"""
+    """
+    Get the current authenticated user from the token.
+    Served from the principal cache when possible; a cached user is a detached
+    copy, so load it into the session before changing it.
+    """
     token_data = decode_access_token(token)
     
-    user = db.query(User).filter(User.email == token_data.email).first()
+    user = principal_cache.get(token_data.user_id)
+    if user is not None and user.email == token_data.email:
+        return user
+    
+    result = await db.execute(select(User).where(User.email == token_data.email))
+    user = result.scalar_one_or_none()
     if user is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="User not found",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    principal_cache.put(user)
     return user
 
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> Principal:
+    """
+    Claims-only authentication for endpoints that need just the id and role.
+    Skips the DB entirely: a user deleted or demoted after login keeps the
+    token's identity until it expires (ACCESS_TOKEN_EXPIRE_MINUTES).
+    """
+    token_data = decode_access_token(token)
+    if token_data.user_id is None or token_data.role is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Could not validate credentials",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return Principal(id=token_data.user_id, email=token_data.email, role=token_data.role)
+
 async def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     """Get the current active user"""
     return current_user
 
 
-def require_role(required_role: UserRole) -> Callable:
+def require_role(required_role: UserRole, claims_only: bool = False) -> Callable:
     """
     Dependency factory for role-based access control.
     Usage: current_user: User = Depends(require_role(UserRole.OWNER))
+    With claims_only=True the role comes from the token and a Principal is returned.
     """
     async def role_checker(
         current_user: User = Depends(get_current_user)
@@ -101,4 +134,10 @@ def require_role(required_role: UserRole) -> Callable:
                 detail=f"Access denied. Required role: {required_role.value}"
             )
         return current_user
-    return role_checker
+    
+    async def claims_role_checker(
+        current_user: Principal = Depends(get_current_principal)
+    ) -> Principal:
+        return await role_checker(current_user)
+    
+    return claims_role_checker if claims_only else role_checker
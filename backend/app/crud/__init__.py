@@ -15,6 +15,10 @@ from app.crud.movie import (
     create_showtime, get_showtime, get_showtimes_by_movie, get_showtimes_by_date
 )
 from app.crud.booking import (
-    get_available_seats, create_booking, get_booking, get_user_bookings,
-    confirm_booking, cancel_booking, create_payment
+    get_available_seats, get_seat_counts, create_booking, create_bookings_batch,
+    create_best_available_booking, describe_booking_conflict,
+    get_booking, get_user_bookings,
+    load_booking_details,
+    confirm_booking, cancel_booking, create_payment,
+    expire_pending_bookings, expire_bookings, release_booking_seats
 )
@@ -0,0 +1,42 @@
+"""
+Async CRUD facade
+Runs the synchronous CRUD functions on an AsyncSession via run_sync(), so the
+ORM logic lives in one place while the event loop awaits the async driver.
+Usage: from app.crud.aio import booking as crud_booking
+       booking = await crud_booking.get_booking(db, booking_id)
+"""
+from types import ModuleType
+from typing import Any, Callable
+import functools
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import booking as _booking
+from app.crud import movie as _movie
+from app.crud import theater as _theater
+from app.crud import user as _user
+
+
+class AsyncCrud:
+    """Async view of a CRUD module: fn(db, ...) becomes await fn(async_db, ...)"""
+
+    def __init__(self, module: ModuleType):
+        self._module = module
+
+    def __getattr__(self, name: str) -> Callable[..., Any]:
+        fn = getattr(self._module, name)
+        if not callable(fn):
+            return fn
+
+        @functools.wraps(fn)
+        async def run(db: AsyncSession, *args, **kwargs):
+            return await db.run_sync(fn, *args, **kwargs)
+
+        setattr(self, name, run)
+        return run
+
+
+booking = AsyncCrud(_booking)
+movie = AsyncCrud(_movie)
+theater = AsyncCrud(_theater)
+user = AsyncCrud(_user)
@@ -2,18 +2,29 @@
 Booking and Payment CRUD operations
 Per ADR-003: ACID transactions with race condition handling
 """
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import and_
-from typing import List, Optional, Any
+from sqlalchemy import func, select, insert, update, delete, or_
+from typing import List, Optional, Any, Dict, Tuple
 from datetime import datetime, timedelta, timezone
 from decimal import Decimal
+import os
 import uuid
 
-from app.models.booking import Booking, BookingSeat, Payment, BookingStatus, PaymentStatus
-from app.models.theater import Seat
+from app.models.booking import (
+    Booking, BookingSeat, ReleasedBookingSeat, Payment, BookingStatus, PaymentStatus
+)
+from app.models.theater import Seat, Screen
 from app.models.movie import Showtime
-from app.schemas.booking import BookingCreate, SeatAvailability
+from app.schemas.booking import (
+    BookingCreate, BestAvailableBookingCreate, SeatAvailability, BookingDetail, BookingSeatResponse
+)
+from app.services.seat_index import seat_index
+from app.crud.pagination import Cursor, after_cursor, next_cursor, count_cache
+from app.crud import inventory
+
+# Blocks tried by best-available booking before giving up under contention
+BEST_AVAILABLE_MAX_ATTEMPTS = int(os.getenv("BEST_AVAILABLE_MAX_ATTEMPTS", "5"))
 
 
 def generate_booking_reference() -> str:
@@ -38,41 +49,80 @@ def normalize_to_utc(dt: datetime) -> datetime:
 def get_available_seats(db: Session, showtime_id: int) -> List[SeatAvailability]:
     """
     Get all seats with availability status for a showtime.
-    Uses subquery to check booked seats efficiently.
+    Served from the in-memory seat index; cold showtimes are built from the DB.
     """
-    showtime = db.query(Showtime).filter(Showtime.id == showtime_id).first()
-    if not showtime:
+    entry = seat_index.get(db, showtime_id)
+    if entry is None:
         return []
     
-    # Get all seats for the screen
-    seats = db.query(Seat).filter(Seat.screen_id == showtime.screen_id).all()
-    
-    # Get booked seat IDs for this showtime (confirmed or pending non-expired)
-    booked_seat_ids = db.query(BookingSeat.seat_id).join(Booking).filter(
-        BookingSeat.showtime_id == showtime_id,
-        Booking.status.in_([BookingStatus.CONFIRMED, BookingStatus.PENDING]),
-        # Exclude expired pending bookings
-        ~and_(
-            Booking.status == BookingStatus.PENDING,
-            Booking.expires_at < datetime.now()
-        )
-    ).all()
-    booked_ids = {seat_id for (seat_id,) in booked_seat_ids}
+    # Layout is already ordered by (row, number)
+    return [_seat_availability(entry, ordinal) for ordinal in range(len(entry.layout))]
+
+
+def _seat_availability(entry, ordinal: int) -> SeatAvailability:
+    """Seat-map entry for one seat of a seat index entry"""
+    seat_id, row, number, seat_type, base_price = entry.layout.seats[ordinal]
+    price = base_price * entry.price_multiplier
+    return SeatAvailability(
+        seat_id=seat_id,
+        row=row,
+        number=number,
+        seat_type=seat_type,
+        price=price.quantize(Decimal("0.01")),
+        is_available=not entry.is_taken(ordinal)
+    )
+
+
+def describe_booking_conflict(
+    db: Session,
+    booking_data: BookingCreate
+) -> Tuple[List[int], List[SeatAvailability]]:
+    """
+    Explain a failed create_booking: the requested seats that are taken and the
+    nearest free seats of the same type (same or adjacent row) to offer instead.
+    Both lists are empty when the failure wasn't a seat conflict.
+    """
+    # A missing or started showtime fails before any seat is claimed; don't
+    # make the seat index rebuild looking for a conflict that isn't there
+    showtime = db.query(Showtime).filter(Showtime.id == booking_data.showtime_id).first()
+    if not showtime or _has_started(showtime):
+        return [], []
     
-    # Calculate price with multiplier
-    result = []
-    for seat in seats:
-        price = Decimal(str(seat.base_price)) * showtime.price_multiplier
-        result.append(SeatAvailability(
-            seat_id=seat.id,
-            row=seat.row,
-            number=seat.number,
-            seat_type=seat.seat_type,
-            price=price.quantize(Decimal("0.01")),
-            is_available=seat.id not in booked_ids
-        ))
+    conflicts, suggested_ids = seat_index.suggest_alternatives(
+        db, booking_data.showtime_id, booking_data.seat_ids
+    )
+    if not suggested_ids:
+        return conflicts, []
     
-    return sorted(result, key=lambda s: (s.row, s.number))
+    entry = seat_index.get(db, booking_data.showtime_id)
+    if entry is None:
+        return conflicts, []
+    ordinals = entry.layout.ordinals
+    return conflicts, [_seat_availability(entry, ordinals[s]) for s in suggested_ids if s in ordinals]
+
+
+def get_seat_counts(db: Session, showtime_ids: List[int]) -> Dict[int, Tuple[int, int]]:
+    """
+    Get (available, total) seat counts for many showtimes in one grouped query
+    over the seat inventory. Showtimes already warm in the seat index are
+    answered from memory.
+    """
+    counts = seat_index.peek_counts(showtime_ids)
+    showtime_ids = [showtime_id for showtime_id in showtime_ids if showtime_id not in counts]
+    if not showtime_ids:
+        return counts
+
+    counts.update({showtime_id: (0, 0) for showtime_id in showtime_ids})
+    counts.update(inventory.count_seats(db, showtime_ids))
+    return counts
+
+
+def _has_started(showtime: Showtime) -> bool:
+    """Handle timezone-aware/naive start times"""
+    showtime_time = showtime.start_time
+    if showtime_time.tzinfo is None:
+        showtime_time = showtime_time.replace(tzinfo=timezone.utc)
+    return showtime_time <= datetime.now(timezone.utc)
 
 
 def create_booking(
@@ -88,12 +138,8 @@ def create_booking(
     if not showtime:
         return None
     
-    # Verify showtime is in the future (handle timezone-aware/naive comparison)
-    now = datetime.now(timezone.utc)
-    showtime_time = showtime.start_time
-    if showtime_time.tzinfo is None:
-        showtime_time = showtime_time.replace(tzinfo=timezone.utc)
-    if showtime_time <= now:
+    # Verify showtime is in the future
+    if _has_started(showtime):
         return None
     
     # Get seats and verify they exist and belong to the correct screen
@@ -105,6 +151,89 @@ def create_booking(
     if len(seats) != len(booking_data.seat_ids):
         return None  # Some seats don't exist or wrong screen
     
+    try:
+        staged = _stage_booking(db, user_id, booking_data, showtime, seats)
+        if staged is None:
+            db.rollback()
+            return None
+        db.commit()
+        
+    except IntegrityError:
+        # Race condition: someone else booked the seat
+        db.rollback()
+        return None
+    
+    db_booking, stale_holds = staged
+    db.refresh(db_booking)
+    _publish_booking(db_booking, booking_data.seat_ids, stale_holds)
+    return db_booking
+
+
+def create_bookings_batch(
+    db: Session,
+    showtime_id: int,
+    requests: List[Tuple[int, BookingCreate]]
+) -> List[Optional[Booking]]:
+    """
+    Create several bookings for one showtime in a single transaction.
+    Each booking gets its own savepoint, so a conflicting one is rolled back
+    alone and the rest commit together. Returns a booking or None per request.
+    """
+    results: List[Optional[Booking]] = [None] * len(requests)
+    showtime = db.query(Showtime).filter(Showtime.id == showtime_id).first()
+    if not showtime or _has_started(showtime):
+        return results
+    
+    requested_ids = {seat_id for _, data in requests for seat_id in data.seat_ids}
+    seats_by_id = {
+        seat.id: seat for seat in db.query(Seat).filter(
+            Seat.id.in_(requested_ids),
+            Seat.screen_id == showtime.screen_id
+        )
+    }
+    
+    staged_bookings = []
+    for i, (user_id, booking_data) in enumerate(requests):
+        seats = [seats_by_id[s] for s in booking_data.seat_ids if s in seats_by_id]
+        if len(seats) != len(booking_data.seat_ids):
+            continue
+        
+        savepoint = db.begin_nested()
+        try:
+            staged = _stage_booking(db, user_id, booking_data, showtime, seats)
+        except IntegrityError:
+            staged = None
+        if staged is None:
+            savepoint.rollback()
+            continue
+        savepoint.commit()
+        results[i] = staged[0]
+        staged_bookings.append((staged, booking_data.seat_ids))
+    
+    if not staged_bookings:
+        db.rollback()
+        return results
+    
+    db.commit()
+    # Reload the committed rows in one query instead of a refresh per booking
+    db.query(Booking).filter(Booking.id.in_([b.id for b in results if b])).all()
+    for (db_booking, stale_holds), seat_ids in staged_bookings:
+        _publish_booking(db_booking, seat_ids, stale_holds)
+    return results
+
+
+def _stage_booking(
+    db: Session,
+    user_id: int,
+    booking_data: BookingCreate,
+    showtime: Showtime,
+    seats: List[Seat]
+) -> Optional[Tuple[Booking, List[Tuple[int, int]]]]:
+    """
+    Add a pending booking and claim its seats in the current transaction.
+    Returns (booking, reclaimed stale holds), or None if a seat is no longer free.
+    The caller commits or rolls back.
+    """
     # Calculate total amount
     total_amount = Decimal("0.00")
     for seat in seats:
@@ -125,29 +254,90 @@ def create_booking(
         expires_at=expires_at
     )
     
-    try:
-        db.add(db_booking)
-        db.flush()  # Get booking ID without committing
-        
-        # Create booking seats (this is where race condition is handled)
-        for seat in seats:
-            price = Decimal(str(seat.base_price)) * showtime.price_multiplier
-            booking_seat = BookingSeat(
-                booking_id=db_booking.id,
-                seat_id=seat.id,
-                showtime_id=booking_data.showtime_id,
-                price=price.quantize(Decimal("0.01"))
+    # Reclaim requested seats still held by pending bookings past their deadline
+    stale_holds = _expire_bookings_where(
+        db,
+        Booking.expires_at < datetime.now(),
+        Booking.id.in_(
+            select(BookingSeat.booking_id).where(
+                BookingSeat.showtime_id == booking_data.showtime_id,
+                BookingSeat.seat_id.in_(booking_data.seat_ids)
             )
-            db.add(booking_seat)
-        
-        db.commit()
-        db.refresh(db_booking)
-        return db_booking
-        
-    except IntegrityError:
-        # Race condition: someone else booked the seat
-        db.rollback()
+        )
+    )
+    
+    db.add(db_booking)
+    db.flush()  # Get booking ID without committing
+    
+    # Claim the seats in the inventory; fails fast if any is no longer free
+    if not inventory.hold_seats(
+        db, booking_data.showtime_id, booking_data.seat_ids, db_booking.id, expires_at
+    ):
         return None
+    
+    # Create booking seats (this is where race condition is handled)
+    for seat in seats:
+        price = Decimal(str(seat.base_price)) * showtime.price_multiplier
+        booking_seat = BookingSeat(
+            booking_id=db_booking.id,
+            seat_id=seat.id,
+            showtime_id=booking_data.showtime_id,
+            price=price.quantize(Decimal("0.01"))
+        )
+        db.add(booking_seat)
+    db.flush()
+    
+    return db_booking, stale_holds
+
+
+def _publish_booking(
+    db_booking: Booking,
+    seat_ids: List[int],
+    stale_holds: List[Tuple[int, int]]
+) -> None:
+    """Update in-process caches once a booking has committed"""
+    for stale_id, stale_showtime_id in stale_holds:
+        seat_index.mark_released(stale_showtime_id, stale_id)
+    count_cache.invalidate("bookings", db_booking.user_id)
+    seat_index.mark_held(
+        db_booking.showtime_id, db_booking.id, seat_ids, db_booking.expires_at
+    )
+
+
+def create_best_available_booking(
+    db: Session,
+    user_id: int,
+    booking_data: BestAvailableBookingCreate
+) -> Optional[Booking]:
+    """
+    Book the best free block of adjacent seats.
+    Blocks come from the seat index; if another booking wins a block first the
+    unique constraint rejects it and the next-best block is tried.
+    """
+    showtime = db.query(Showtime).filter(Showtime.id == booking_data.showtime_id).first()
+    if not showtime or _has_started(showtime):
+        return None
+    
+    lost_seat_ids: set = set()
+    attempts = 0
+    while attempts < BEST_AVAILABLE_MAX_ATTEMPTS:
+        blocks = seat_index.best_blocks(
+            db, booking_data.showtime_id, booking_data.quantity,
+            booking_data.seat_type, exclude_seat_ids=lost_seat_ids
+        )
+        if not blocks:
+            return None
+        for seat_ids in blocks[:BEST_AVAILABLE_MAX_ATTEMPTS - attempts]:
+            attempts += 1
+            booking = create_booking(
+                db, user_id, BookingCreate(showtime_id=booking_data.showtime_id, seat_ids=seat_ids)
+            )
+            if booking:
+                return booking
+            lost_seat_ids.update(seat_ids)
+        # Lost a race, so the index was stale for this showtime; re-read it
+        seat_index.invalidate(booking_data.showtime_id)
+    return None
 
 
 def get_booking(db: Session, booking_id: int) -> Optional[Booking]:
@@ -164,13 +354,101 @@ def get_user_bookings(
     db: Session,
     user_id: int,
     skip: int = 0,
-    limit: int = 20
-) -> tuple[List[Booking], int]:
-    """Get all bookings for a user"""
-    query = db.query(Booking).filter(Booking.user_id == user_id)
-    total = query.count()
-    bookings = query.order_by(Booking.created_at.desc()).offset(skip).limit(limit).all()
-    return bookings, total
+    limit: int = 20,
+    cursor: Optional[Cursor] = None,
+    include_total: bool = True
+) -> tuple[List[BookingDetail], Optional[int], Optional[str]]:
+    """
+    Get a page of a user's bookings with full details.
+    With a cursor the page is a keyset scan and skip is ignored.
+    Returns (bookings, total or None, next cursor or None).
+    """
+    bookings = load_booking_details(
+        db, user_id=user_id, after=cursor,
+        skip=0 if cursor else skip, limit=limit + 1
+    )
+    bookings, cursor_token = next_cursor(bookings, limit)
+    
+    total = None
+    if include_total:
+        total = count_cache.get(
+            ("bookings", user_id),
+            lambda: db.query(func.count(Booking.id)).filter(Booking.user_id == user_id).scalar()
+        )
+    return bookings, total, cursor_token
+
+
+# --- Booking Details ---
+
+def load_booking_details(
+    db: Session,
+    user_id: Optional[int] = None,
+    booking_id: Optional[int] = None,
+    booking_reference: Optional[str] = None,
+    after: Optional[Cursor] = None,
+    skip: int = 0,
+    limit: Optional[int] = None
+) -> List[BookingDetail]:
+    """
+    Load bookings with seats, showtime, movie, theater and payment.
+    Always three queries, however many bookings are on the page: bookings
+    joined to their many-to-one rows, then live seats, then released seats.
+    """
+    query = db.query(Booking).options(
+        joinedload(Booking.showtime).joinedload(Showtime.movie),
+        joinedload(Booking.showtime).joinedload(Showtime.screen).joinedload(Screen.theater),
+        joinedload(Booking.payment),
+        selectinload(Booking.booking_seats).joinedload(BookingSeat.seat),
+        selectinload(Booking.released_seats).joinedload(ReleasedBookingSeat.seat)
+    )
+    
+    if user_id is not None:
+        query = query.filter(Booking.user_id == user_id)
+    if booking_id is not None:
+        query = query.filter(Booking.id == booking_id)
+    if booking_reference is not None:
+        query = query.filter(Booking.booking_reference == booking_reference)
+    if after is not None:
+        query = query.filter(after_cursor(Booking, after))
+    
+    query = query.order_by(Booking.created_at.desc(), Booking.id.desc()).offset(skip)
+    if limit is not None:
+        query = query.limit(limit)
+    
+    return [build_booking_detail(booking) for booking in query.all()]
+
+
+def build_booking_detail(booking: Booking) -> BookingDetail:
+    """Build BookingDetail from a booking whose relationships are loaded"""
+    seats = [
+        BookingSeatResponse(
+            seat_id=bs.seat.id,
+            row=bs.seat.row,
+            number=bs.seat.number,
+            seat_type=bs.seat.seat_type,
+            price=bs.price
+        )
+        for bs in (booking.booking_seats or booking.released_seats)
+    ]
+    
+    return BookingDetail(
+        id=booking.id,
+        booking_reference=booking.booking_reference,
+        user_id=booking.user_id,
+        showtime_id=booking.showtime_id,
+        status=booking.status,
+        total_amount=booking.total_amount,
+        seat_count=booking.seat_count,
+        created_at=booking.created_at,
+        expires_at=booking.expires_at,
+        seats=seats,
+        movie_title=booking.showtime.movie.title,
+        movie_language=booking.showtime.movie.language.value,
+        theater_name=booking.showtime.screen.theater.name,
+        screen_name=booking.showtime.screen.name,
+        show_time=booking.showtime.start_time,
+        payment=booking.payment
+    )
 
 
 def confirm_booking(db: Session, booking_id: int) -> Optional[Booking]:
@@ -183,18 +461,60 @@ def confirm_booking(db: Session, booking_id: int) -> Optional[Booking]:
         return None
     
     # Check if expired
-    if booking.expires_at and booking.expires_at < datetime.now():
-        booking.status = BookingStatus.EXPIRED
-        db.commit()
+    if _expire_if_past_deadline(db, booking):
         return None
     
-    booking.status = BookingStatus.CONFIRMED
-    booking.expires_at = None  # Clear expiration
+    if not _confirm_pending(db, booking):
+        db.rollback()
+        return None
     db.commit()
     db.refresh(booking)
+    seat_index.mark_confirmed(booking.showtime_id, booking.id)
     return booking
 
 
+def _expire_if_past_deadline(db: Session, booking: Booking) -> bool:
+    """Expire a pending booking whose payment window has closed (commits); True if it was"""
+    expired = _expire_bookings_where(
+        db,
+        Booking.id == booking.id,
+        Booking.expires_at < datetime.now()
+    )
+    if not expired:
+        return False
+    db.commit()
+    seat_index.mark_released(booking.showtime_id, booking.id)
+    return True
+
+
+def _confirm_pending(db: Session, booking: Booking) -> bool:
+    """
+    PENDING -> CONFIRMED as a conditional UPDATE, so a concurrent expiry or
+    cancel that already released the seats can't be overwritten. False means
+    the booking is no longer payable (or lost some of its seats); the caller
+    rolls back.
+    """
+    confirmed = db.execute(
+        update(Booking)
+        .where(
+            Booking.id == booking.id,
+            Booking.status == BookingStatus.PENDING,
+            or_(Booking.expires_at.is_(None), Booking.expires_at >= datetime.now())
+        )
+        .values(status=BookingStatus.CONFIRMED, expires_at=None)
+        .returning(Booking.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if confirmed is None:
+        return False
+    
+    booked = inventory.book_seats(db, [booking.id])
+    if booked < booking.seat_count:
+        print(f"[BOOKING] Booking {booking.id} holds {booked}/{booking.seat_count} seats; not confirming")
+        return False
+    return True
+
+
 def cancel_booking(db: Session, booking_id: int, user_id: int) -> Optional[dict[str, Any]]:
     """Cancel a booking and simulate refund details for paid bookings."""
     booking = db.query(Booking).filter(
@@ -237,8 +557,10 @@ def cancel_booking(db: Session, booking_id: int, user_id: int) -> Optional[dict[
     else:
         message = "Booking cancelled. No payment record found, so no refund was required."
     
+    release_booking_seats(db, [booking.id])
     db.commit()
     db.refresh(booking)
+    seat_index.mark_released(booking.showtime_id, booking.id)
     return {
         "booking": booking,
         "refund": refund,
@@ -248,12 +570,78 @@ def cancel_booking(db: Session, booking_id: int, user_id: int) -> Optional[dict[
 
 def expire_pending_bookings(db: Session) -> int:
     """Expire all pending bookings past their expiration time"""
-    count = db.query(Booking).filter(
-        Booking.status == BookingStatus.PENDING,
-        Booking.expires_at < datetime.now()
-    ).update({"status": BookingStatus.EXPIRED})
+    expired = _expire_bookings_where(db, Booking.expires_at < datetime.now())
+    db.commit()
+    
+    for booking_id, showtime_id in expired:
+        seat_index.mark_released(showtime_id, booking_id)
+    return len(expired)
+
+
+def expire_bookings(db: Session, booking_ids: List[int]) -> int:
+    """
+    Expire the given bookings if they are still pending and past their deadline.
+    Used by the expiry scheduler to expire a batch in one UPDATE.
+    """
+    if not booking_ids:
+        return 0
+    
+    expired = _expire_bookings_where(
+        db,
+        Booking.id.in_(booking_ids),
+        Booking.expires_at <= datetime.now()
+    )
     db.commit()
-    return count
+    
+    for booking_id, showtime_id in expired:
+        seat_index.mark_released(showtime_id, booking_id)
+    return len(expired)
+
+
+# --- Seat Reclamation ---
+
+def release_booking_seats(db: Session, booking_ids: List[int]) -> int:
+    """
+    Move the booking_seats rows of cancelled/expired bookings to the archive
+    and return their seats to the inventory.
+    This frees the seats under unique_seat_per_showtime. The caller commits.
+    """
+    if not booking_ids:
+        return 0
+    
+    inventory.free_seats(db, booking_ids)
+    db.execute(
+        insert(ReleasedBookingSeat).from_select(
+            ["booking_id", "seat_id", "showtime_id", "price"],
+            select(
+                BookingSeat.booking_id, BookingSeat.seat_id,
+                BookingSeat.showtime_id, BookingSeat.price
+            ).where(BookingSeat.booking_id.in_(booking_ids))
+        )
+    )
+    result = db.execute(
+        delete(BookingSeat)
+        .where(BookingSeat.booking_id.in_(booking_ids))
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def _expire_bookings_where(db: Session, *criteria) -> List[Tuple[int, int]]:
+    """
+    Flip matching PENDING bookings to EXPIRED and release their seats.
+    The status filter makes concurrent reclaimers expire each booking once.
+    Returns (booking_id, showtime_id) pairs; the caller commits.
+    """
+    expired = db.execute(
+        update(Booking)
+        .where(Booking.status == BookingStatus.PENDING, *criteria)
+        .values(status=BookingStatus.EXPIRED)
+        .returning(Booking.id, Booking.showtime_id)
+        .execution_options(synchronize_session=False)
+    ).all()
+    release_booking_seats(db, [booking_id for booking_id, _ in expired])
+    return [(booking_id, showtime_id) for booking_id, showtime_id in expired]
 
 
 # --- Payment CRUD ---
@@ -279,6 +667,10 @@ def create_payment(
     if booking.payment:
         return booking.payment
     
+    # Same deadline rule as confirm_booking: no paying for a lapsed hold
+    if _expire_if_past_deadline(db, booking):
+        return None
+    
     # Simulate payment processing
     transaction_id = f"TXN{uuid.uuid4().hex[:12].upper()}"
     status = PaymentStatus.SUCCESS if simulate_success else PaymentStatus.FAILED
@@ -294,15 +686,22 @@ def create_payment(
     try:
         db.add(payment)
         
-        # If payment successful, confirm booking
+        # If payment successful, confirm booking; both transitions only apply
+        # if the booking is still PENDING when the UPDATE runs
         if status == PaymentStatus.SUCCESS:
-            booking.status = BookingStatus.CONFIRMED
-            booking.expires_at = None
+            finalized = _confirm_pending(db, booking)
         else:
-            booking.status = BookingStatus.EXPIRED
+            finalized = bool(_expire_bookings_where(db, Booking.id == booking_id))
+        if not finalized:
+            db.rollback()
+            return None
         
         db.commit()
         db.refresh(payment)
+        if status == PaymentStatus.SUCCESS:
+            seat_index.mark_confirmed(booking.showtime_id, booking.id)
+        else:
+            seat_index.mark_released(booking.showtime_id, booking.id)
         return payment
         
     except IntegrityError:
@@ -0,0 +1,105 @@
+"""
+Showtime seat inventory operations
+Each statement touches only showtime_seats, keyed by (showtime_id, seat_id) or
+booking_id. The caller owns the transaction and commits.
+"""
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import and_, case, func, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.booking import ShowtimeSeat, SeatState
+from app.models.movie import Showtime
+from app.models.theater import Seat
+
+
+def populate_showtime_seats(db: Session, *criteria) -> int:
+    """
+    Insert FREE inventory rows for every seat of every showtime matching the
+    criteria (on Showtime and/or Seat), in one INSERT ... SELECT.
+    """
+    result = db.execute(
+        insert(ShowtimeSeat).from_select(
+            ["showtime_id", "seat_id"],
+            select(Showtime.id, Seat.id)
+            .join(Seat, Seat.screen_id == Showtime.screen_id)
+            .where(*criteria)
+        )
+    )
+    return result.rowcount
+
+
+def hold_seats(
+    db: Session,
+    showtime_id: int,
+    seat_ids: List[int],
+    booking_id: int,
+    held_until: Optional[datetime]
+) -> bool:
+    """
+    Claim seats for a booking if every one of them is FREE.
+    A single conditional UPDATE: a concurrent claim on the same rows waits for
+    the row locks and then matches nothing, so losers fail without a retry loop.
+    Returns False if any seat was not free; the caller must roll back.
+    """
+    claimed = db.execute(
+        update(ShowtimeSeat)
+        .where(
+            ShowtimeSeat.showtime_id == showtime_id,
+            ShowtimeSeat.seat_id.in_(seat_ids),
+            ShowtimeSeat.state == SeatState.FREE
+        )
+        .values(state=SeatState.HELD, booking_id=booking_id, held_until=held_until)
+        .execution_options(synchronize_session=False)
+    )
+    return claimed.rowcount == len(seat_ids)
+
+
+def book_seats(db: Session, booking_ids: List[int]) -> int:
+    """Turn the holds of paid bookings into permanent bookings"""
+    if not booking_ids:
+        return 0
+    result = db.execute(
+        update(ShowtimeSeat)
+        .where(ShowtimeSeat.booking_id.in_(booking_ids))
+        .values(state=SeatState.BOOKED, held_until=None)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def free_seats(db: Session, booking_ids: List[int]) -> int:
+    """Return the seats of cancelled/expired bookings to the inventory"""
+    if not booking_ids:
+        return 0
+    result = db.execute(
+        update(ShowtimeSeat)
+        .where(ShowtimeSeat.booking_id.in_(booking_ids))
+        .values(state=SeatState.FREE, booking_id=None, held_until=None)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount
+
+
+def _is_taken(now: datetime):
+    """Booked, or held by a booking whose payment window is still open"""
+    return or_(
+        ShowtimeSeat.state == SeatState.BOOKED,
+        and_(ShowtimeSeat.state == SeatState.HELD, ShowtimeSeat.held_until >= now)
+    )
+
+
+def count_seats(db: Session, showtime_ids: List[int]) -> Dict[int, Tuple[int, int]]:
+    """(available, total) per showtime in one grouped scan of the inventory"""
+    rows = db.query(
+        ShowtimeSeat.showtime_id,
+        func.count(ShowtimeSeat.id),
+        func.sum(case((_is_taken(datetime.now()), 1), else_=0))
+    ).filter(
+        ShowtimeSeat.showtime_id.in_(showtime_ids)
+    ).group_by(ShowtimeSeat.showtime_id).all()
+    return {
+        showtime_id: (total - int(taken or 0), total)
+        for showtime_id, total, taken in rows
+    }
@@ -1,7 +1,7 @@
 """
 Movie and Showtime CRUD operations
 """
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from sqlalchemy import and_, func
 from typing import List, Optional, Union
 from datetime import datetime, timedelta, date
@@ -9,6 +9,10 @@ from datetime import datetime, timedelta, date
 from app.models.movie import Movie, Showtime, Genre, Language
 from app.models.theater import Screen, Theater
 from app.schemas.movie import MovieCreate, MovieUpdate, ShowtimeCreate
+from app.services.seat_index import seat_index
+from app.services.llm_cache import llm_cache
+from app.crud.pagination import Cursor, after_cursor, next_cursor, count_cache
+from app.crud import inventory
 
 
 # --- Movie CRUD ---
@@ -29,6 +33,8 @@ def create_movie(db: Session, movie_data: MovieCreate) -> Movie:
     db.add(db_movie)
     db.commit()
     db.refresh(db_movie)
+    count_cache.invalidate("movies")
+    llm_cache.invalidate()
     return db_movie
 
 
@@ -42,15 +48,26 @@ def get_movie_by_title(db: Session, title: str) -> Optional[Movie]:
     return db.query(Movie).filter(Movie.title.ilike(f"%{title}%")).first()
 
 
+def get_movie_titles(db: Session) -> List[tuple]:
+    """(id, title) of every movie, for matching titles mentioned in free text"""
+    return [tuple(row) for row in db.query(Movie.id, Movie.title).all()]
+
+
 def get_movies(
     db: Session,
     skip: int = 0,
     limit: int = 20,
     genre: Optional[Genre] = None,
     language: Optional[Language] = None,
-    search: Optional[str] = None
-) -> tuple[List[Movie], int]:
-    """Get movies with filters and pagination"""
+    search: Optional[str] = None,
+    cursor: Optional[Cursor] = None,
+    include_total: bool = True
+) -> tuple[List[Movie], Optional[int], Optional[str]]:
+    """
+    Get movies with filters and pagination.
+    With a cursor the page is a keyset scan over (created_at, id) and skip is ignored.
+    Returns (movies, total or None, next cursor or None).
+    """
     query = db.query(Movie)
     
     if genre:
@@ -60,10 +77,22 @@ def get_movies(
     if search:
         query = query.filter(Movie.title.ilike(f"%{search}%"))
     
-    total = query.count()
-    movies = query.order_by(Movie.created_at.desc()).offset(skip).limit(limit).all()
+    total = None
+    if include_total:
+        total = count_cache.get(
+            ("movies", genre, language, search),
+            lambda: query.order_by(None).count()
+        )
+    
+    query = query.order_by(Movie.created_at.desc(), Movie.id.desc())
+    if cursor:
+        query = query.filter(after_cursor(Movie, cursor))
+    else:
+        query = query.offset(skip)
+    movies = query.limit(limit + 1).all()
+    movies, cursor_token = next_cursor(movies, limit)
     
-    return movies, total
+    return movies, total, cursor_token
 
 
 def update_movie(db: Session, movie_id: int, movie_data: MovieUpdate) -> Optional[Movie]:
@@ -78,6 +107,8 @@ def update_movie(db: Session, movie_id: int, movie_data: MovieUpdate) -> Optiona
     
     db.commit()
     db.refresh(db_movie)
+    count_cache.invalidate("movies")
+    llm_cache.invalidate()
     return db_movie
 
 
@@ -89,6 +120,8 @@ def delete_movie(db: Session, movie_id: int) -> bool:
     
     db.delete(db_movie)
     db.commit()
+    count_cache.invalidate("movies")
+    llm_cache.invalidate()
     return True
 
 
@@ -127,14 +160,26 @@ def create_showtime(db: Session, showtime_data: ShowtimeCreate) -> Optional[Show
         price_multiplier=showtime_data.price_multiplier
     )
     db.add(db_showtime)
+    db.flush()
+    # One inventory row per seat, in the same transaction as the showtime
+    inventory.populate_showtime_seats(db, Showtime.id == db_showtime.id)
     db.commit()
     db.refresh(db_showtime)
+    llm_cache.invalidate()
     return db_showtime
 
 
+def _with_showtime_details(query):
+    """Eager-load movie and screen/theater so listings don't lazy-load per row"""
+    return query.options(
+        joinedload(Showtime.movie),
+        joinedload(Showtime.screen).joinedload(Screen.theater)
+    )
+
+
 def get_showtime(db: Session, showtime_id: int) -> Optional[Showtime]:
     """Get showtime by ID"""
-    return db.query(Showtime).filter(Showtime.id == showtime_id).first()
+    return _with_showtime_details(db.query(Showtime)).filter(Showtime.id == showtime_id).first()
 
 
 def get_showtimes_by_movie(
@@ -164,7 +209,7 @@ def get_showtimes_by_movie(
             Showtime.start_time < end_of_day
         )
     
-    return query.order_by(Showtime.start_time).all()
+    return _with_showtime_details(query).order_by(Showtime.start_time).all()
 
 
 def get_showtimes_by_date(
@@ -184,7 +229,7 @@ def get_showtimes_by_date(
     if city:
         query = query.filter(Theater.city.ilike(f"%{city}%"))
     
-    return query.order_by(Showtime.start_time).all()
+    return _with_showtime_details(query).order_by(Showtime.start_time).all()
 
 
 def get_showtimes_by_theater(db: Session, theater_id: int) -> List[Showtime]:
@@ -207,4 +252,76 @@ def delete_showtime(db: Session, showtime_id: int, owner_id: int) -> bool:
     
     db.delete(showtime)
     db.commit()
+    seat_index.invalidate(showtime_id)
+    llm_cache.invalidate()
     return True
+
+
+# --- Catalogue digest queries (aggregated in SQL so row counts stay bounded) ---
+
+def get_catalog_movies(db: Session, start: datetime, end: datetime, limit: int) -> List[tuple]:
+    """(title, genre, language, rating, duration, show_count) of movies with shows in [start, end), busiest first"""
+    shows = func.count(Showtime.id).label("shows")
+    return [tuple(row) for row in db.query(
+        Movie.title, Movie.genre, Movie.language, Movie.rating, Movie.duration, shows
+    ).join(Showtime, Showtime.movie_id == Movie.id).filter(
+        Showtime.start_time >= start,
+        Showtime.start_time < end
+    ).group_by(Movie.id).order_by(shows.desc(), Movie.title).limit(limit).all()]
+
+
+def get_movies_showing(
+    db: Session,
+    start: datetime,
+    end: datetime,
+    genre: Optional[Genre] = None,
+    city: Optional[str] = None,
+    limit: int = 5
+) -> List[Movie]:
+    """Movies with shows in [start, end), optionally of one genre and in one city, busiest first"""
+    shows = func.count(Showtime.id).label("shows")
+    query = db.query(Movie).join(Showtime, Showtime.movie_id == Movie.id).filter(
+        Showtime.start_time >= start,
+        Showtime.start_time < end
+    )
+    if genre:
+        query = query.filter(Movie.genre == genre)
+    if city:
+        query = query.join(Screen, Showtime.screen_id == Screen.id).join(Theater).filter(
+            Theater.city.ilike(f"%{city}%")
+        )
+    return query.group_by(Movie.id).order_by(shows.desc(), Movie.title).limit(limit).all()
+
+
+def get_catalog_facets(db: Session, start: datetime, end: datetime) -> dict:
+    """Number of movies showing in [start, end) per genre and per language"""
+    facets = {}
+    for name, column in (("genres", Movie.genre), ("languages", Movie.language)):
+        movies = func.count(func.distinct(Movie.id)).label("movies")
+        facets[name] = [tuple(row) for row in db.query(column, movies).join(
+            Showtime, Showtime.movie_id == Movie.id
+        ).filter(
+            Showtime.start_time >= start,
+            Showtime.start_time < end
+        ).group_by(column).order_by(movies.desc()).all()]
+    return facets
+
+
+def get_catalog_next_showtimes(db: Session, start: datetime, end: datetime, per_city: int) -> List[tuple]:
+    """(city, start_time, title, theater_name) of the next `per_city` shows in every city"""
+    position = func.row_number().over(
+        partition_by=Theater.city, order_by=(Showtime.start_time, Showtime.id)
+    ).label("position")
+    upcoming = db.query(
+        Theater.city.label("city"),
+        Showtime.start_time.label("start_time"),
+        Movie.title.label("title"),
+        Theater.name.label("theater"),
+        position
+    ).select_from(Showtime).join(Movie).join(Screen).join(Theater).filter(
+        Showtime.start_time >= start,
+        Showtime.start_time < end
+    ).subquery()
+    return [tuple(row) for row in db.query(
+        upcoming.c.city, upcoming.c.start_time, upcoming.c.title, upcoming.c.theater
+    ).filter(upcoming.c.position <= per_city).order_by(upcoming.c.city, upcoming.c.position).all()]
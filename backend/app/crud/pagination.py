@@ -0,0 +1,103 @@
+"""
+Keyset (cursor) pagination helpers
+Pages are ordered by (created_at DESC, id DESC); a cursor encodes the last row
+of the previous page so the next page is a single indexed range scan instead
+of an OFFSET that re-reads every skipped row.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Hashable, Optional, Tuple
+import base64
+import os
+import threading
+import time
+
+from sqlalchemy import and_, or_
+
+# Exact totals are recomputed at most this often per filter combination
+COUNT_CACHE_TTL_SECONDS = float(os.getenv("COUNT_CACHE_TTL_SECONDS", "30"))
+# Keys include free-text search, so the cache is bounded (LRU beyond this)
+COUNT_CACHE_MAX_ENTRIES = int(os.getenv("COUNT_CACHE_MAX_ENTRIES", "1000"))
+
+Cursor = Tuple[datetime, int]
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque token for the position after (created_at, id)"""
+    raw = f"{created_at.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Cursor:
+    """Parse a token from encode_cursor; raises ValueError if it is malformed"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        created_at, row_id = base64.urlsafe_b64decode(padded).decode().rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception as e:
+        raise ValueError("Invalid pagination cursor") from e
+
+
+def after_cursor(model, cursor: Cursor):
+    """Filter for rows strictly after the cursor in (created_at DESC, id DESC) order"""
+    created_at, row_id = cursor
+    return or_(
+        model.created_at < created_at,
+        and_(model.created_at == created_at, model.id < row_id)
+    )
+
+
+def next_cursor(rows: list, limit: int) -> Tuple[list, Optional[str]]:
+    """
+    Trim a page fetched with limit + 1 rows.
+    Returns the page and the cursor for the next one (None on the last page).
+    """
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1].created_at, rows[-1].id)
+
+
+class CountCache:
+    """Short-lived, size-bounded LRU of exact COUNT(*) results keyed by filter combination"""
+
+    def __init__(self, ttl_seconds: float = COUNT_CACHE_TTL_SECONDS,
+                 max_entries: int = COUNT_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._counts: "OrderedDict[Hashable, Tuple[float, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, compute: Callable[[], int]) -> int:
+        with self._lock:
+            cached = self._counts.get(key)
+            if cached and time.monotonic() - cached[0] <= self.ttl_seconds:
+                self._counts.move_to_end(key)
+                return cached[1]
+        count = compute()
+        with self._lock:
+            self._counts[key] = (time.monotonic(), count)
+            self._counts.move_to_end(key)
+            if len(self._counts) > self.max_entries:
+                self._evict()
+        return count
+
+    def _evict(self) -> None:
+        """Drop expired entries first, then least recently used ones; caller holds the lock"""
+        now = time.monotonic()
+        for expired in [k for k, (stored_at, _) in self._counts.items() if now - stored_at > self.ttl_seconds]:
+            del self._counts[expired]
+        while len(self._counts) > self.max_entries:
+            self._counts.popitem(last=False)
+
+    def invalidate(self, scope: str, *key: Hashable) -> None:
+        """Drop one key, or every key of a scope (e.g. 'movies') when key is empty"""
+        with self._lock:
+            if key:
+                self._counts.pop((scope, *key), None)
+            else:
+                for cached_key in [k for k in self._counts if k[0] == scope]:
+                    self._counts.pop(cached_key, None)
+
+
+count_cache = CountCache()
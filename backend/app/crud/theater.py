@@ -1,7 +1,7 @@
 """
 Theater, Screen, and Seat CRUD operations
 """
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy import func
 from typing import List, Optional
@@ -11,6 +11,8 @@ from app.models.theater import Theater, Screen, Seat, SeatType
 from app.schemas.theater import (
     TheaterCreate, TheaterUpdate, ScreenCreate, SeatCreate, SeatBulkCreate
 )
+from app.services.seat_index import seat_index
+from app.crud import inventory
 
 
 def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
@@ -56,13 +58,17 @@ def create_theater(db: Session, theater_data: TheaterCreate, owner_id: int) -> T
 
 
 def get_theater(db: Session, theater_id: int) -> Optional[Theater]:
-    """Get theater by ID"""
-    return db.query(Theater).filter(Theater.id == theater_id).first()
+    """Get theater by ID (with screens)"""
+    return db.query(Theater).options(
+        selectinload(Theater.screens)
+    ).filter(Theater.id == theater_id).first()
 
 
 def get_theaters_by_owner(db: Session, owner_id: int) -> List[Theater]:
-    """Get all theaters owned by a user"""
-    return db.query(Theater).filter(Theater.owner_id == owner_id).all()
+    """Get all theaters owned by a user (with screens)"""
+    return db.query(Theater).options(
+        selectinload(Theater.screens)
+    ).filter(Theater.owner_id == owner_id).all()
 
 
 def get_theaters_by_city(db: Session, city: str) -> List[Theater]:
@@ -172,8 +178,10 @@ def create_screen(db: Session, screen_data: ScreenCreate, owner_id: int) -> Opti
 
 
 def get_screen(db: Session, screen_id: int) -> Optional[Screen]:
-    """Get screen by ID"""
-    return db.query(Screen).filter(Screen.id == screen_id).first()
+    """Get screen by ID (with seats)"""
+    return db.query(Screen).options(
+        selectinload(Screen.seats)
+    ).filter(Screen.id == screen_id).first()
 
 
 def get_screens_by_theater(db: Session, theater_id: int) -> List[Screen]:
@@ -195,8 +203,12 @@ def create_seat(db: Session, seat_data: SeatCreate) -> Optional[Seat]:
     
     try:
         db.add(db_seat)
+        db.flush()
+        # Make the new seat bookable in the screen's existing showtimes
+        inventory.populate_showtime_seats(db, Seat.id == db_seat.id)
         db.commit()
         db.refresh(db_seat)
+        seat_index.invalidate_screen(db_seat.screen_id)
         return db_seat
     except IntegrityError:
         db.rollback()
@@ -228,9 +240,12 @@ def create_seats_bulk(db: Session, bulk_data: SeatBulkCreate, owner_id: int) ->
     
     try:
         db.add_all(seats)
+        db.flush()
+        inventory.populate_showtime_seats(db, Seat.id.in_([seat.id for seat in seats]))
         db.commit()
         for seat in seats:
             db.refresh(seat)
+        seat_index.invalidate_screen(bulk_data.screen_id)
         return seats
     except IntegrityError:
         db.rollback()
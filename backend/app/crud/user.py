@@ -4,12 +4,11 @@ User CRUD operations
 from sqlalchemy.orm import Session
 from sqlalchemy import select
 from typing import Optional
-from passlib.context import CryptContext
 
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
-
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.services.password_hasher import pwd_context
+from app.services.principal_cache import principal_cache
 
 
 def get_password_hash(password: str) -> str:
@@ -37,12 +36,16 @@ def get_user_by_google_id(db: Session, google_id: str) -> Optional[User]:
     return db.query(User).filter(User.google_id == google_id).first()
 
 
-def create_user(db: Session, user_data: UserCreate) -> User:
-    """Create a new user"""
-    hashed_password = get_password_hash(user_data.password)
+def create_user(db: Session, user_data: UserCreate, password_hash: Optional[str] = None) -> User:
+    """
+    Create a new user.
+    Async callers should hash on the password_hasher pool and pass password_hash.
+    """
+    if password_hash is None:
+        password_hash = get_password_hash(user_data.password)
     db_user = User(
         email=user_data.email,
-        password_hash=hashed_password,
+        password_hash=password_hash,
         name=user_data.name,
         role=user_data.role
     )
@@ -82,6 +85,7 @@ def update_user(db: Session, user_id: int, user_data: UserUpdate) -> Optional[Us
     
     db.commit()
     db.refresh(db_user)
+    principal_cache.invalidate(user_id)
     return db_user
 
 
@@ -95,6 +99,7 @@ def set_user_otp(db: Session, user_id: int, otp: str, expires_at) -> Optional[Us
     db_user.otp_expires_at = expires_at
     db.commit()
     db.refresh(db_user)
+    principal_cache.invalidate(user_id)
     return db_user
 
 
@@ -109,6 +114,20 @@ def verify_user_email(db: Session, user_id: int) -> Optional[User]:
     db_user.otp_expires_at = None
     db.commit()
     db.refresh(db_user)
+    principal_cache.invalidate(user_id)
+    return db_user
+
+
+def set_password_hash(db: Session, user_id: int, password_hash: str) -> Optional[User]:
+    """Store a new hash, e.g. after a rehash-on-login with a new work factor"""
+    db_user = get_user(db, user_id)
+    if not db_user:
+        return None
+    
+    db_user.password_hash = password_hash
+    db.commit()
+    db.refresh(db_user)
+    principal_cache.invalidate(user_id)
     return db_user
 
 
@@ -4,7 +4,10 @@ Models package - exports all SQLAlchemy models
 from app.models.user import User, UserRole
 from app.models.theater import Theater, Screen, Seat, SeatType
 from app.models.movie import Movie, Showtime, Genre, Language, Rating
-from app.models.booking import Booking, BookingSeat, Payment, BookingStatus, PaymentStatus
+from app.models.booking import (
+    Booking, BookingSeat, ReleasedBookingSeat, ShowtimeSeat, Payment,
+    BookingStatus, SeatState, PaymentStatus
+)
 
 __all__ = [
     "User",
@@ -20,7 +23,10 @@ __all__ = [
     "Rating",
     "Booking",
     "BookingSeat",
+    "ReleasedBookingSeat",
+    "ShowtimeSeat",
     "Payment",
     "BookingStatus",
+    "SeatState",
     "PaymentStatus"
 ]
@@ -1,8 +1,8 @@
 """
-Booking, BookingSeat, and Payment models
+Booking, BookingSeat, seat inventory, and Payment models
 Per ADR-003: ACID transactions for booking, race condition handling
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Numeric, DateTime, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Numeric, DateTime, UniqueConstraint, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -17,6 +17,12 @@ class BookingStatus(str, enum.Enum):
     EXPIRED = "expired"
 
 
+class SeatState(str, enum.Enum):
+    FREE = "free"
+    HELD = "held"  # Pending booking, until held_until
+    BOOKED = "booked"
+
+
 class PaymentStatus(str, enum.Enum):
     PENDING = "pending"
     SUCCESS = "success"
@@ -49,6 +55,14 @@ class Booking(Base):
     showtime = relationship("Showtime", back_populates="bookings")
     booking_seats = relationship("BookingSeat", back_populates="booking", cascade="all, delete-orphan")
     payment = relationship("Payment", back_populates="booking", uselist=False, cascade="all, delete-orphan")
+    released_seats = relationship("ReleasedBookingSeat", back_populates="booking", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        # Booking history pages: WHERE user_id ORDER BY created_at, id
+        Index('ix_bookings_user_id_created_at', 'user_id', 'created_at', 'id'),
+        # Expiry sweeps only ever look at pending rows
+        Index('ix_bookings_pending_expires_at', 'expires_at', postgresql_where=text("status = 'PENDING'")),
+    )
 
     def __repr__(self):
         return f"<Booking(id={self.id}, ref='{self.booking_reference}', status='{self.status}')>"
@@ -78,12 +92,68 @@ class BookingSeat(Base):
     # CRITICAL: Unique constraint to prevent double-booking
     __table_args__ = (
         UniqueConstraint('seat_id', 'showtime_id', name='unique_seat_per_showtime'),
+        Index('ix_booking_seats_showtime_id', 'showtime_id'),
     )
 
     def __repr__(self):
         return f"<BookingSeat(booking_id={self.booking_id}, seat_id={self.seat_id})>"
 
 
+class ReleasedBookingSeat(Base):
+    """
+    Archive of seats released by cancelled or expired bookings.
+    Rows move here from booking_seats so unique_seat_per_showtime only covers live holds.
+    """
+    __tablename__ = "released_booking_seats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Foreign keys
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="CASCADE"), nullable=False, index=True)
+    seat_id = Column(Integer, ForeignKey("seats.id", ondelete="CASCADE"), nullable=False)
+    showtime_id = Column(Integer, ForeignKey("showtimes.id", ondelete="CASCADE"), nullable=False)
+    
+    # Price at time of booking
+    price = Column(Numeric(10, 2), nullable=False)
+    
+    # Timestamps
+    released_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Relationships
+    booking = relationship("Booking", back_populates="released_seats")
+    seat = relationship("Seat")
+
+    def __repr__(self):
+        return f"<ReleasedBookingSeat(booking_id={self.booking_id}, seat_id={self.seat_id})>"
+
+
+class ShowtimeSeat(Base):
+    """
+    Seat inventory: one row per seat per showtime, created with the showtime.
+    Bookings claim seats with a conditional UPDATE on state, and seat maps and
+    counts read this table alone instead of anti-joining seats against bookings.
+    """
+    __tablename__ = "showtime_seats"
+
+    id = Column(Integer, primary_key=True, index=True)
+    
+    # Foreign keys
+    showtime_id = Column(Integer, ForeignKey("showtimes.id", ondelete="CASCADE"), nullable=False)
+    seat_id = Column(Integer, ForeignKey("seats.id", ondelete="CASCADE"), nullable=False)
+    
+    # Current holder
+    state = Column(Enum(SeatState), default=SeatState.FREE, server_default=SeatState.FREE.name, nullable=False)
+    booking_id = Column(Integer, ForeignKey("bookings.id", ondelete="SET NULL"), nullable=True, index=True)
+    held_until = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('showtime_id', 'seat_id', name='unique_inventory_seat_per_showtime'),
+    )
+
+    def __repr__(self):
+        return f"<ShowtimeSeat(showtime_id={self.showtime_id}, seat_id={self.seat_id}, state='{self.state}')>"
+
+
 class Payment(Base):
     __tablename__ = "payments"
 
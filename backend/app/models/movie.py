@@ -2,7 +2,7 @@
 Movie and Showtime models
 Per ADR-003: PostgreSQL with proper relationships
 """
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Numeric, DateTime, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum, Numeric, DateTime, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -61,6 +61,11 @@ class Movie(Base):
     # Relationships
     showtimes = relationship("Showtime", back_populates="movie", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Keyset pagination of the catalogue: ORDER BY created_at, id
+        Index('ix_movies_created_at_id', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f"<Movie(id={self.id}, title='{self.title}', language='{self.language}')>"
 
@@ -87,5 +92,12 @@ class Showtime(Base):
     screen = relationship("Screen", back_populates="showtimes")
     bookings = relationship("Booking", back_populates="showtime", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Showtimes of a movie from a date onwards
+        Index('ix_showtimes_movie_id_start_time', 'movie_id', 'start_time'),
+        # Overlap check when scheduling a screen
+        Index('ix_showtimes_screen_id_start_time_end_time', 'screen_id', 'start_time', 'end_time'),
+    )
+
     def __repr__(self):
         return f"<Showtime(id={self.id}, movie_id={self.movie_id}, start_time='{self.start_time}')>"
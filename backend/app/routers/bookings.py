@@ -2,196 +2,214 @@
 Booking API routes
 Per ADR-003: ACID transactions for booking with race condition handling
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.database import get_db
-from app.models.user import User
+from app.database import get_async_db
 from app.schemas.booking import (
-    BookingCreate, BookingResponse, BookingDetail, BookingList,
+    BookingCreate, BestAvailableBookingCreate, BookingResponse, BookingDetail, BookingList,
+    BookingConflict,
     PaymentCreate, PaymentResponse, PaymentConfirmation,
-    BookingSeatResponse, BookingCancel, BookingCancelResponse
+    BookingCancel, BookingCancelResponse
 )
-from app.crud import booking as crud_booking
-from app.crud import movie as crud_movie
-from app.auth.security import get_current_user
+from app.crud.aio import booking as crud_booking
+from app.crud.aio import movie as crud_movie
+from app.crud.pagination import decode_cursor
+from app.auth.security import Principal, get_current_principal
+from app.services.expiry_scheduler import expiry_scheduler
+from app.services.idempotency import idempotency_store, fingerprint
+from app.services.booking_queue import booking_queue, BookingQueueFull
 
 router = APIRouter(prefix="/bookings", tags=["Bookings"])
 
 
-@router.post("/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED)
+@router.post(
+    "/", response_model=BookingResponse, status_code=status.HTTP_201_CREATED,
+    responses={409: {"model": BookingConflict}}
+)
 async def create_booking(
     booking_data: BookingCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Create a new booking.
     Seats are locked for 10 minutes until payment is completed.
     Uses database constraints to prevent double-booking.
+    Retries carrying the same Idempotency-Key return the original booking.
     """
-    # Verify showtime exists
-    showtime = crud_movie.get_showtime(db, booking_data.showtime_id)
-    if not showtime:
-        raise HTTPException(status_code=404, detail="Showtime not found")
+    slot = await idempotency_store.claim(
+        ("create_booking", current_user.id), idempotency_key,
+        fingerprint(booking_data.showtime_id, sorted(booking_data.seat_ids))
+    )
+    if slot.replay:
+        return slot.replay
     
-    booking = crud_booking.create_booking(db, current_user.id, booking_data)
-    if not booking:
-        raise HTTPException(
-            status_code=409,
-            detail="Failed to create booking. Seats may already be booked or showtime has passed."
-        )
-    return booking
+    async with slot:
+        # Verify showtime exists
+        showtime = await crud_movie.get_showtime(db, booking_data.showtime_id)
+        if not showtime:
+            raise HTTPException(status_code=404, detail="Showtime not found")
+        
+        if booking_queue.enabled:
+            # Flash-sale mode: one writer per showtime, conflicts rejected in memory
+            try:
+                booking = await booking_queue.submit(current_user.id, booking_data)
+            except BookingQueueFull:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many booking requests for this showtime. Please retry shortly."
+                )
+        else:
+            booking = await crud_booking.create_booking(db, current_user.id, booking_data)
+        if not booking:
+            # Tell the client which seats were lost and what is free next to them
+            conflicting, suggested = await crud_booking.describe_booking_conflict(db, booking_data)
+            conflict = BookingConflict(
+                detail=(
+                    "Some of the selected seats were just booked by someone else."
+                    if conflicting else
+                    "Failed to create booking. Seats may already be booked or showtime has passed."
+                ),
+                conflicting_seat_ids=conflicting,
+                suggested_seats=suggested
+            )
+            # Seat availability changes; a retry must look again, not replay this
+            slot.release()
+            return JSONResponse(status_code=status.HTTP_409_CONFLICT, content=jsonable_encoder(conflict))
+        
+        # Release the seats automatically if payment doesn't arrive in time
+        expiry_scheduler.schedule(booking.id, booking.expires_at)
+        response = BookingResponse.model_validate(booking)
+        slot.complete(status.HTTP_201_CREATED, response)
+        return response
+
+
+@router.post("/best-available", response_model=BookingDetail, status_code=status.HTTP_201_CREATED)
+async def create_best_available_booking(
+    booking_data: BestAvailableBookingCreate,
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
+):
+    """
+    Book the best block of N adjacent seats, optionally of one seat type.
+    The server picks the seats, so clients don't need to fetch the seat map first;
+    if a block is taken concurrently the next-best one is tried. In flash-sale
+    mode the showtime's booking queue picks the block instead.
+    """
+    slot = await idempotency_store.claim(
+        ("best_available", current_user.id), idempotency_key,
+        fingerprint(booking_data.showtime_id, booking_data.quantity, booking_data.seat_type)
+    )
+    if slot.replay:
+        return slot.replay
+    
+    async with slot:
+        showtime = await crud_movie.get_showtime(db, booking_data.showtime_id)
+        if not showtime:
+            raise HTTPException(status_code=404, detail="Showtime not found")
+        
+        if booking_queue.enabled:
+            try:
+                booking = await booking_queue.submit(current_user.id, booking_data)
+            except BookingQueueFull:
+                raise HTTPException(
+                    status_code=503,
+                    detail="Too many booking requests for this showtime. Please retry shortly."
+                )
+        else:
+            booking = await crud_booking.create_best_available_booking(db, current_user.id, booking_data)
+        if not booking:
+            raise HTTPException(
+                status_code=409,
+                detail=f"No block of {booking_data.quantity} adjacent seats is available for this showtime."
+            )
+        
+        expiry_scheduler.schedule(booking.id, booking.expires_at)
+        details = await crud_booking.load_booking_details(db, booking_id=booking.id)
+        slot.complete(status.HTTP_201_CREATED, details[0])
+        return details[0]
 
 
 @router.get("/", response_model=BookingList)
 async def get_my_bookings(
     page: int = Query(1, ge=1),
     per_page: int = Query(20, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; overrides page"),
+    include_total: Optional[bool] = Query(None, description="Defaults to true for page-based requests, false with a cursor"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
-    """Get current user's booking history"""
-    skip = (page - 1) * per_page
-    bookings, total = crud_booking.get_user_bookings(db, current_user.id, skip, per_page)
-    
-    # Enrich with details
-    detailed_bookings = []
-    for booking in bookings:
-        seats = [
-            BookingSeatResponse(
-                seat_id=bs.seat.id,
-                row=bs.seat.row,
-                number=bs.seat.number,
-                seat_type=bs.seat.seat_type,
-                price=bs.price
-            )
-            for bs in booking.booking_seats
-        ]
-        
-        detailed_bookings.append(BookingDetail(
-            id=booking.id,
-            booking_reference=booking.booking_reference,
-            user_id=booking.user_id,
-            showtime_id=booking.showtime_id,
-            status=booking.status,
-            total_amount=booking.total_amount,
-            seat_count=booking.seat_count,
-            created_at=booking.created_at,
-            expires_at=booking.expires_at,
-            seats=seats,
-            movie_title=booking.showtime.movie.title,
-            movie_language=booking.showtime.movie.language.value,
-            theater_name=booking.showtime.screen.theater.name,
-            screen_name=booking.showtime.screen.name,
-            show_time=booking.showtime.start_time,
-            payment=booking.payment
-        ))
+    """
+    Get current user's booking history.
+    Follow next_cursor for constant-cost paging; page/per_page still work.
+    """
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    if include_total is None:
+        include_total = position is None
     
-    return BookingList(bookings=detailed_bookings, total=total)
+    skip = (page - 1) * per_page
+    bookings, total, next_cursor = await crud_booking.get_user_bookings(
+        db, current_user.id, skip, per_page,
+        cursor=position, include_total=include_total
+    )
+    return BookingList(bookings=bookings, total=total, next_cursor=next_cursor)
 
 
 @router.get("/{booking_id}", response_model=BookingDetail)
 async def get_booking(
     booking_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get booking details"""
-    booking = crud_booking.get_booking(db, booking_id)
-    if not booking:
+    bookings = await crud_booking.load_booking_details(db, booking_id=booking_id)
+    if not bookings:
         raise HTTPException(status_code=404, detail="Booking not found")
+    booking = bookings[0]
     
     # Verify ownership
     if booking.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view this booking")
     
-    seats = [
-        BookingSeatResponse(
-            seat_id=bs.seat.id,
-            row=bs.seat.row,
-            number=bs.seat.number,
-            seat_type=bs.seat.seat_type,
-            price=bs.price
-        )
-        for bs in booking.booking_seats
-    ]
-    
-    return BookingDetail(
-        id=booking.id,
-        booking_reference=booking.booking_reference,
-        user_id=booking.user_id,
-        showtime_id=booking.showtime_id,
-        status=booking.status,
-        total_amount=booking.total_amount,
-        seat_count=booking.seat_count,
-        created_at=booking.created_at,
-        expires_at=booking.expires_at,
-        seats=seats,
-        movie_title=booking.showtime.movie.title,
-        movie_language=booking.showtime.movie.language.value,
-        theater_name=booking.showtime.screen.theater.name,
-        screen_name=booking.showtime.screen.name,
-        show_time=booking.showtime.start_time,
-        payment=booking.payment
-    )
+    return booking
 
 
 @router.get("/reference/{booking_reference}", response_model=BookingDetail)
 async def get_booking_by_reference(
     booking_reference: str,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Get booking by reference number"""
-    booking = crud_booking.get_booking_by_reference(db, booking_reference)
-    if not booking:
+    bookings = await crud_booking.load_booking_details(db, booking_reference=booking_reference)
+    if not bookings:
         raise HTTPException(status_code=404, detail="Booking not found")
+    booking = bookings[0]
     
     if booking.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to view this booking")
     
-    seats = [
-        BookingSeatResponse(
-            seat_id=bs.seat.id,
-            row=bs.seat.row,
-            number=bs.seat.number,
-            seat_type=bs.seat.seat_type,
-            price=bs.price
-        )
-        for bs in booking.booking_seats
-    ]
-    
-    return BookingDetail(
-        id=booking.id,
-        booking_reference=booking.booking_reference,
-        user_id=booking.user_id,
-        showtime_id=booking.showtime_id,
-        status=booking.status,
-        total_amount=booking.total_amount,
-        seat_count=booking.seat_count,
-        created_at=booking.created_at,
-        expires_at=booking.expires_at,
-        seats=seats,
-        movie_title=booking.showtime.movie.title,
-        movie_language=booking.showtime.movie.language.value,
-        theater_name=booking.showtime.screen.theater.name,
-        screen_name=booking.showtime.screen.name,
-        show_time=booking.showtime.start_time,
-        payment=booking.payment
-    )
+    return booking
 
 
 @router.post("/{booking_id}/cancel", response_model=BookingCancelResponse)
 async def cancel_booking(
     booking_id: int,
     cancel_data: BookingCancel | None = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """Cancel a booking"""
-    cancellation_result = crud_booking.cancel_booking(db, booking_id, current_user.id)
+    cancellation_result = await crud_booking.cancel_booking(db, booking_id, current_user.id)
     if not cancellation_result:
         raise HTTPException(
             status_code=400,
@@ -213,39 +231,51 @@ async def cancel_booking(
 async def process_payment(
     booking_id: int,
     payment_data: PaymentCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_principal)
 ):
     """
     Process payment for a booking (simulated).
     Per project requirements: simulated payment processing.
+    Retries carrying the same Idempotency-Key return the original confirmation.
     """
-    # Verify booking ownership
-    booking = crud_booking.get_booking(db, booking_id)
-    if not booking:
-        raise HTTPException(status_code=404, detail="Booking not found")
-    
-    if booking.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not authorized")
-    
-    if payment_data.booking_id != booking_id:
-        raise HTTPException(status_code=400, detail="Booking ID mismatch")
-    
-    # Process payment (simulated - always succeeds)
-    payment = crud_booking.create_payment(
-        db, booking_id, payment_data.payment_method, simulate_success=True
+    slot = await idempotency_store.claim(
+        ("pay", current_user.id, booking_id), idempotency_key,
+        fingerprint(payment_data.booking_id, payment_data.payment_method)
     )
+    if slot.replay:
+        return slot.replay
     
-    if not payment:
-        raise HTTPException(
-            status_code=400,
-            detail="Payment failed. Booking may be expired or already paid."
+    async with slot:
+        # Verify booking ownership
+        booking = await crud_booking.get_booking(db, booking_id)
+        if not booking:
+            raise HTTPException(status_code=404, detail="Booking not found")
+        
+        if booking.user_id != current_user.id:
+            raise HTTPException(status_code=403, detail="Not authorized")
+        
+        if payment_data.booking_id != booking_id:
+            raise HTTPException(status_code=400, detail="Booking ID mismatch")
+        
+        # Process payment (simulated - always succeeds)
+        payment = await crud_booking.create_payment(
+            db, booking_id, payment_data.payment_method, simulate_success=True
         )
-    
-    return PaymentConfirmation(
-        booking_reference=booking.booking_reference,
-        transaction_id=payment.transaction_id,
-        amount=payment.amount,
-        status=payment.status,
-        message="Payment successful! Your booking is confirmed."
-    )
+        
+        if not payment:
+            raise HTTPException(
+                status_code=400,
+                detail="Payment failed. Booking may be expired or already paid."
+            )
+        
+        confirmation = PaymentConfirmation(
+            booking_reference=booking.booking_reference,
+            transaction_id=payment.transaction_id,
+            amount=payment.amount,
+            status=payment.status,
+            message="Payment successful! Your booking is confirmed."
+        )
+        slot.complete(status.HTTP_200_OK, confirmation)
+        return confirmation
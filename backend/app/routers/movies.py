@@ -2,17 +2,18 @@
 Movie API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
-from app.database import get_db
-from app.models.user import User, UserRole
+from app.database import get_async_db
+from app.models.user import UserRole
 from app.models.movie import Genre, Language
 from app.schemas.movie import (
     MovieCreate, MovieResponse, MovieUpdate, MovieList
 )
-from app.crud import movie as crud_movie
-from app.auth.security import get_current_user, require_role
+from app.crud.aio import movie as crud_movie
+from app.crud.pagination import decode_cursor
+from app.auth.security import Principal, require_role
 
 router = APIRouter(prefix="/movies", tags=["Movies"])
 
@@ -20,11 +21,11 @@ router = APIRouter(prefix="/movies", tags=["Movies"])
 @router.post("/", response_model=MovieResponse, status_code=status.HTTP_201_CREATED)
 async def create_movie(
     movie_data: MovieCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.OWNER))
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_role(UserRole.OWNER, claims_only=True))
 ):
     """Create a new movie (Theater Owners only)"""
-    return crud_movie.create_movie(db, movie_data)
+    return await crud_movie.create_movie(db, movie_data)
 
 
 @router.get("/", response_model=MovieList)
@@ -34,26 +35,40 @@ async def list_movies(
     genre: Optional[Genre] = None,
     language: Optional[Language] = None,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page; overrides page"),
+    include_total: Optional[bool] = Query(None, description="Defaults to true for page-based requests, false with a cursor"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """List all movies with filtering and pagination"""
+    """
+    List all movies with filtering and pagination.
+    Follow next_cursor for constant-cost paging; page/per_page still work.
+    """
+    try:
+        position = decode_cursor(cursor) if cursor else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    if include_total is None:
+        include_total = position is None
+    
     skip = (page - 1) * per_page
-    movies, total = crud_movie.get_movies(
+    movies, total, next_cursor = await crud_movie.get_movies(
         db, skip=skip, limit=per_page,
-        genre=genre, language=language, search=search
+        genre=genre, language=language, search=search,
+        cursor=position, include_total=include_total
     )
     return MovieList(
         movies=movies,
         total=total,
-        page=page,
-        per_page=per_page
+        page=None if position else page,
+        per_page=per_page,
+        next_cursor=next_cursor
     )
 
 
 @router.get("/{movie_id}", response_model=MovieResponse)
-async def get_movie(movie_id: int, db: Session = Depends(get_db)):
+async def get_movie(movie_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get movie details"""
-    movie = crud_movie.get_movie(db, movie_id)
+    movie = await crud_movie.get_movie(db, movie_id)
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
     return movie
@@ -63,11 +78,11 @@ async def get_movie(movie_id: int, db: Session = Depends(get_db)):
 async def update_movie(
     movie_id: int,
     movie_data: MovieUpdate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.OWNER))
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_role(UserRole.OWNER, claims_only=True))
 ):
     """Update a movie (Theater Owners only)"""
-    movie = crud_movie.update_movie(db, movie_id, movie_data)
+    movie = await crud_movie.update_movie(db, movie_id, movie_data)
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
     return movie
@@ -76,11 +91,11 @@ async def update_movie(
 @router.delete("/{movie_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_movie(
     movie_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.OWNER))
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_role(UserRole.OWNER, claims_only=True))
 ):
     """Delete a movie (Theater Owners only)"""
-    if not crud_movie.delete_movie(db, movie_id):
+    if not await crud_movie.delete_movie(db, movie_id):
         raise HTTPException(status_code=404, detail="Movie not found")
 
 
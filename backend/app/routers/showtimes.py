@@ -2,19 +2,19 @@
 Showtime API routes
 """
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 from datetime import date as DateType
 
-from app.database import get_db
-from app.models.user import User, UserRole
+from app.database import get_async_db
+from app.models.user import UserRole
 from app.schemas.movie import ShowtimeCreate, ShowtimeResponse, ShowtimeWithDetails
 from app.schemas.booking import ShowtimeSeats, SeatAvailability
-from app.crud import movie as crud_movie
-from app.crud import booking as crud_booking
+from app.crud.aio import movie as crud_movie
+from app.crud.aio import booking as crud_booking
 from app.crud.theater import calculate_distance
-from app.auth.security import get_current_user, require_role
+from app.auth.security import Principal, require_role
 
 router = APIRouter(prefix="/showtimes", tags=["Showtimes"])
 
@@ -22,11 +22,11 @@ router = APIRouter(prefix="/showtimes", tags=["Showtimes"])
 @router.post("/", response_model=ShowtimeResponse, status_code=status.HTTP_201_CREATED)
 async def create_showtime(
     showtime_data: ShowtimeCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.OWNER))
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_role(UserRole.OWNER, claims_only=True))
 ):
     """Create a new showtime (Theater Owners only)"""
-    showtime = crud_movie.create_showtime(db, showtime_data)
+    showtime = await crud_movie.create_showtime(db, showtime_data)
     if not showtime:
         raise HTTPException(
             status_code=400,
@@ -42,21 +42,22 @@ async def get_movie_showtimes(
     date: Optional[DateType] = Query(None, alias="date"),
     user_lat: Optional[float] = Query(None, description="User latitude for distance calc"),
     user_lng: Optional[float] = Query(None, description="User longitude for distance calc"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all showtimes for a movie"""
-    movie = crud_movie.get_movie(db, movie_id)
+    movie = await crud_movie.get_movie(db, movie_id)
     if not movie:
         raise HTTPException(status_code=404, detail="Movie not found")
     
-    showtimes = crud_movie.get_showtimes_by_movie(db, movie_id, city, filter_date=date)
+    showtimes = await crud_movie.get_showtimes_by_movie(db, movie_id, city, filter_date=date)
+    
+    # Count available seats for all showtimes at once
+    seat_counts = await crud_booking.get_seat_counts(db, [st.id for st in showtimes])
     
     # Enrich with details
     result = []
     for st in showtimes:
-        # Count available seats
-        available = crud_booking.get_available_seats(db, st.id)
-        available_count = sum(1 for s in available if s.is_available)
+        available_count, _ = seat_counts[st.id]
         
         theater = st.screen.theater
         t_lat = float(theater.latitude) if theater.latitude else None
@@ -94,15 +95,16 @@ async def get_movie_showtimes(
 async def get_showtimes_by_date(
     date: datetime = Query(..., description="Date to filter showtimes"),
     city: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get all showtimes for a specific date"""
-    showtimes = crud_movie.get_showtimes_by_date(db, date, city)
+    showtimes = await crud_movie.get_showtimes_by_date(db, date, city)
+    
+    seat_counts = await crud_booking.get_seat_counts(db, [st.id for st in showtimes])
     
     result = []
     for st in showtimes:
-        available = crud_booking.get_available_seats(db, st.id)
-        available_count = sum(1 for s in available if s.is_available)
+        available_count, _ = seat_counts[st.id]
         
         result.append(ShowtimeWithDetails(
             id=st.id,
@@ -123,14 +125,14 @@ async def get_showtimes_by_date(
 
 
 @router.get("/{showtime_id}", response_model=ShowtimeWithDetails)
-async def get_showtime(showtime_id: int, db: Session = Depends(get_db)):
+async def get_showtime(showtime_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get showtime details"""
-    showtime = crud_movie.get_showtime(db, showtime_id)
+    showtime = await crud_movie.get_showtime(db, showtime_id)
     if not showtime:
         raise HTTPException(status_code=404, detail="Showtime not found")
     
-    available = crud_booking.get_available_seats(db, showtime_id)
-    available_count = sum(1 for s in available if s.is_available)
+    seat_counts = await crud_booking.get_seat_counts(db, [showtime_id])
+    available_count, _ = seat_counts[showtime_id]
     
     return ShowtimeWithDetails(
         id=showtime.id,
@@ -149,13 +151,13 @@ async def get_showtime(showtime_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/{showtime_id}/seats", response_model=ShowtimeSeats)
-async def get_showtime_seats(showtime_id: int, db: Session = Depends(get_db)):
+async def get_showtime_seats(showtime_id: int, db: AsyncSession = Depends(get_async_db)):
     """Get all seats with availability for a showtime"""
-    showtime = crud_movie.get_showtime(db, showtime_id)
+    showtime = await crud_movie.get_showtime(db, showtime_id)
     if not showtime:
         raise HTTPException(status_code=404, detail="Showtime not found")
     
-    seats = crud_booking.get_available_seats(db, showtime_id)
+    seats = await crud_booking.get_available_seats(db, showtime_id)
     total = len(seats)
     available = sum(1 for s in seats if s.is_available)
     
@@ -173,9 +175,9 @@ async def get_showtime_seats(showtime_id: int, db: Session = Depends(get_db)):
 @router.delete("/{showtime_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_showtime(
     showtime_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(require_role(UserRole.OWNER))
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(require_role(UserRole.OWNER, claims_only=True))
 ):
     """Delete a showtime (Theater Owner only)"""
-    if not crud_movie.delete_showtime(db, showtime_id, current_user.id):
+    if not await crud_movie.delete_showtime(db, showtime_id, current_user.id):
         raise HTTPException(status_code=404, detail="Showtime not found or not authorized")
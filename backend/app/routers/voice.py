@@ -1,24 +1,186 @@
 """
 Voice Chat Route - STT → LLM → TTS pipeline for Movie Ticket System
+Every request is timed with a StageClock (spans per step, marks per stage) and
+recorded into the histograms reported under "voice" in /metrics. With
+VOICE_PROVIDERS=stub the providers are replaced by the offline stubs in
+app/services/stub_providers.py (see benchmarks/bench_voice.py).
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Header, Response, WebSocket, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+from typing import AsyncIterator, Dict, Optional, Sequence, Tuple
+from urllib.parse import quote
 import base64
+import json
+import uuid
 
-from ..services.stt import transcribe_audio
-from ..services.llm import generate_response
-from ..services.tts import synthesize_speech
+from ..services.tts import stream_speech
+from ..services.intents import Location, intent_router, fixed_reply
+from ..services.voice_metrics import voice_metrics
+from ..services.voice_pipeline import StageClock, run_pipeline
+from ..services.voice_session import VoiceSession
+from ..services.stub_providers import VOICE_PROVIDERS
+
+if VOICE_PROVIDERS == "stub":
+    from ..services.stub_providers import (
+        transcribe_audio, transcribe_bytes, generate_response, stream_response,
+        synthesize_speech, stream_tts
+    )
+    print("[VOICE] Using offline stub STT/LLM/TTS providers")
+else:
+    from ..services.stt import transcribe_audio, transcribe_bytes
+    from ..services.llm import generate_response, stream_response
+    from ..services.tts import synthesize_speech, stream_tts
 
 router = APIRouter(prefix="/voice", tags=["voice"])
 
+JSON = "application/json"
+NDJSON = "application/x-ndjson"
+MPEG = "audio/mpeg"
+MULTIPART = "multipart/mixed"
+# The first type of each list is what legacy clients (no or */* Accept) get
+CHAT_MEDIA_TYPES = (JSON, MPEG, MULTIPART)
+PIPELINED_MEDIA_TYPES = (NDJSON, MULTIPART)
+
 
 class ChatMessage(BaseModel):
     message: str
+    # Optional user location, used for "theaters near me" style questions
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    city: Optional[str] = None
+
+
+def _location(
+    latitude: Optional[float] = Form(None),
+    longitude: Optional[float] = Form(None),
+    city: Optional[str] = Form(None)
+) -> Location:
+    """Optional location fields sent alongside the audio upload"""
+    return Location(latitude=latitude, longitude=longitude, city=city)
+
+
+def _pipeline(user_text: str, clock: StageClock, generate=None):
+    """run_pipeline bound to the configured providers"""
+    return run_pipeline(user_text, clock, generate=generate or stream_response, synthesize=stream_tts)
+
+
+async def _answer(user_text: str, location: Location, clock: StageClock) -> str:
+    """Intent fast path first, the LLM only for questions it doesn't recognise"""
+    with clock.span("intent"):
+        answer = await intent_router.answer(user_text, location)
+    if answer is None:
+        with clock.span("llm"):
+            answer = await generate_response(user_text)
+    clock.mark("llm_done")
+    return answer
+
+
+async def _transcribe(audio: UploadFile, clock: StageClock) -> str:
+    with clock.span("stt"):
+        user_text = await transcribe_audio(audio)
+    clock.mark("stt_done")
+    return user_text
+
+
+# --- Content negotiation ---
+
+def _negotiate(accept: Optional[str], offers: Sequence[str]) -> str:
+    """
+    The offer the Accept header ranks highest (by q, then order); offers[0]
+    when the header is missing, only */* or names nothing we serve.
+    """
+    best, best_q = offers[0], 0.0
+    for item in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        media_type = media_type.lower()
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        for offer in offers:
+            matches = media_type == offer or (
+                media_type.endswith("/*") and media_type != "*/*" and offer.startswith(media_type[:-1])
+            )
+            if matches and q > best_q:
+                best, best_q = offer, q
+    return best
+
+
+def _part(boundary: str, content_type: str, first: bool = False,
+          headers: Optional[Dict[str, str]] = None) -> bytes:
+    """Delimiter and headers that open one part of a multipart/mixed body"""
+    lines = [f"--{boundary}", f"Content-Type: {content_type}"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return (("" if first else "\r\n") + "\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+
+
+def _closing(boundary: str) -> bytes:
+    return f"\r\n--{boundary}--\r\n".encode("utf-8")
+
+
+def _audio_response(media_type: str, endpoint: str, clock: StageClock, user_text: str,
+                    llm_response: str, audio_stream: AsyncIterator[bytes]) -> StreamingResponse:
+    """Raw MP3 (texts in headers) or multipart/mixed (JSON part + MP3 part), both streamed"""
+    chunks = _recorded_audio(endpoint, clock, audio_stream)
+    headers = {
+        "X-User-Text": quote(user_text),
+        "X-Agent-Response": quote(llm_response),
+        "Cache-Control": "no-store",
+        "Vary": "Accept",
+    }
+    if media_type == MULTIPART:
+        boundary = uuid.uuid4().hex
+        return StreamingResponse(
+            _multipart_reply(boundary, user_text, llm_response, chunks),
+            media_type=f"{MULTIPART}; boundary={boundary}",
+            headers=headers
+        )
+    return StreamingResponse(chunks, media_type=MPEG, headers=headers)
+
+
+async def _multipart_reply(boundary: str, user_text: str, llm_response: str,
+                           chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    texts = {"user_text": user_text, "agent_response": llm_response}
+    try:
+        yield _part(boundary, JSON, first=True) + json.dumps(texts).encode("utf-8")
+        yield _part(boundary, MPEG)
+        async for chunk in chunks:
+            yield chunk
+        yield _closing(boundary)
+    finally:
+        await chunks.aclose()
+
+
+async def _transcribe_and_respond(audio: UploadFile, location: Location,
+                                  clock: StageClock) -> Tuple[str, str]:
+    """STT then intent fast path / LLM; returns (user_text, llm_response)"""
+    # Step 1: Transcribe audio (STT)
+    print("[VOICE] Step 1: Transcribing...")
+    user_text = await _transcribe(audio, clock)
+    
+    if not user_text.strip():
+        raise HTTPException(status_code=400, detail="Could not transcribe audio")
+    
+    print(f"[VOICE] Transcribed: {user_text[:50]}...")
+    
+    # Step 2: Generate LLM response
+    print("[VOICE] Step 2: Generating response...")
+    llm_response = await _answer(user_text, location, clock)
+    print(f"[VOICE] LLM response: {llm_response[:50]}...")
+    return user_text, llm_response
 
 
 @router.post("/chat")
 async def voice_chat(
-    audio: UploadFile = File(...)
+    response: Response,
+    audio: UploadFile = File(...),
+    location: Location = Depends(_location),
+    accept: Optional[str] = Header(None)
 ):
     """
     Complete voice chat pipeline:
@@ -26,32 +188,39 @@ async def voice_chat(
     2. Transcribe with Groq Whisper (STT)
     3. Generate response with Groq Llama (LLM)
     4. Synthesize speech with Edge TTS
-    5. Return audio response with transcript
+    5. Return audio response with transcript, as the Accept header asks:
+       - audio/mpeg: raw MP3 streamed as it is synthesized; transcript and
+         reply in the URL-encoded X-User-Text / X-Agent-Response headers
+       - multipart/mixed: a JSON part {"user_text", "agent_response"} then an
+         audio/mpeg part, streamed
+       - otherwise (legacy clients): JSON with the MP3 as audio_base64
     """
     print(f"[VOICE] Starting voice chat...")
+    clock = StageClock()
+    media_type = _negotiate(accept, CHAT_MEDIA_TYPES)
     
     try:
-        # Step 1: Transcribe audio (STT)
-        print("[VOICE] Step 1: Transcribing...")
-        user_text = await transcribe_audio(audio)
-        
-        if not user_text.strip():
-            raise HTTPException(status_code=400, detail="Could not transcribe audio")
-        
-        print(f"[VOICE] Transcribed: {user_text[:50]}...")
+        user_text, llm_response = await _transcribe_and_respond(audio, location, clock)
         
-        # Step 2: Generate LLM response
-        print("[VOICE] Step 2: Generating response...")
-        llm_response = await generate_response(user_text)
-        print(f"[VOICE] LLM response: {llm_response[:50]}...")
+        if media_type != JSON:
+            # Step 3: Stream speech (TTS) without base64 or a full in-memory copy
+            print(f"[VOICE] Step 3: Streaming speech as {media_type}...")
+            with clock.span("tts_first_chunk"):
+                audio_stream = await stream_speech(llm_response, stream=stream_tts)
+            clock.mark("tts_first_audio")
+            return _audio_response(media_type, "chat", clock, user_text, llm_response, audio_stream)
         
         # Step 3: Synthesize speech (TTS)
         print("[VOICE] Step 3: Synthesizing speech...")
-        audio_bytes = await synthesize_speech(llm_response)
+        with clock.span("tts"):
+            audio_bytes = await synthesize_speech(llm_response)
+        clock.mark("tts_done")
         print(f"[VOICE] Audio generated: {len(audio_bytes)} bytes")
         
         # Return JSON with audio (base64) and text for captions
         audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
+        voice_metrics.record("chat", clock)
+        response.headers["Vary"] = "Accept"
         
         return {
             "audio_base64": audio_base64,
@@ -59,31 +228,217 @@ async def voice_chat(
             "user_text": user_text,
             "agent_response": llm_response
         }
-    except HTTPException:
+    except HTTPException as e:
+        voice_metrics.record("chat", clock, error=str(e.detail))
         raise
     except Exception as e:
         print(f"[VOICE] Unexpected error: {str(e)}")
+        voice_metrics.record("chat", clock, error=str(e))
         raise HTTPException(status_code=500, detail=f"Voice processing failed: {str(e)}")
 
 
+@router.post("/chat/stream")
+async def voice_chat_stream(
+    audio: UploadFile = File(...),
+    location: Location = Depends(_location)
+):
+    """
+    Voice chat with streamed audio:
+    same STT and LLM steps as /chat, but the MP3 is sent as Edge TTS produces
+    it, so playback can start before synthesis finishes. The transcript and
+    reply travel in the URL-encoded X-User-Text / X-Agent-Response headers.
+    """
+    print(f"[VOICE] Starting streamed voice chat...")
+    clock = StageClock()
+    
+    try:
+        user_text, llm_response = await _transcribe_and_respond(audio, location, clock)
+        
+        # Step 3: Stream speech (TTS)
+        print("[VOICE] Step 3: Streaming speech...")
+        with clock.span("tts_first_chunk"):
+            audio_stream = await stream_speech(llm_response, stream=stream_tts)
+        clock.mark("tts_first_audio")
+    except HTTPException as e:
+        voice_metrics.record("chat_stream", clock, error=str(e.detail))
+        raise
+    except Exception as e:
+        print(f"[VOICE] Unexpected error: {str(e)}")
+        voice_metrics.record("chat_stream", clock, error=str(e))
+        raise HTTPException(status_code=500, detail=f"Voice processing failed: {str(e)}")
+    
+    return _audio_response(MPEG, "chat_stream", clock, user_text, llm_response, audio_stream)
+
+
+async def _recorded_audio(endpoint: str, clock: StageClock,
+                          chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """Forward audio chunks and record the request once the stream ends"""
+    error: Optional[str] = "stream aborted"
+    try:
+        async for chunk in chunks:
+            yield chunk
+        error = None
+    except Exception as e:
+        # TTS failed mid-stream; the response is truncated, count it as a failure
+        error = f"tts failed: {str(e)}"
+        raise
+    finally:
+        clock.mark("tts_done")
+        voice_metrics.record(endpoint, clock, error=error)
+
+
+@router.post("/chat/pipelined")
+async def voice_chat_pipelined(
+    audio: UploadFile = File(...),
+    location: Location = Depends(_location),
+    accept: Optional[str] = Header(None)
+):
+    """
+    Voice chat with the LLM and TTS overlapped:
+    each sentence is synthesized as soon as the LLM finishes it. By default the
+    response is newline-delimited JSON, one event per line:
+      {"event": "transcript", "user_text", "t_ms"}
+      {"event": "sentence", "index", "text", "t_ms"}
+      {"event": "audio", "index", "seq", "audio_base64", "t_ms"}   (MP3 chunks, in order)
+      {"event": "done", "agent_response", "timings"}   (ms per stage since the request started)
+      {"event": "error", "detail"}                     (if a provider fails mid-stream)
+    With Accept: multipart/mixed each event is a part instead: application/json
+    parts for the others, and audio chunks as raw audio/mpeg parts carrying
+    X-Sentence-Index / X-Chunk-Seq / X-T-Ms headers.
+    """
+    print(f"[VOICE] Starting pipelined voice chat...")
+    clock = StageClock()
+    media_type = _negotiate(accept, PIPELINED_MEDIA_TYPES)
+    
+    # Step 1: Transcribe audio (STT)
+    user_text = await _transcribe(audio, clock)
+    if not user_text.strip():
+        voice_metrics.record("chat_pipelined", clock, error="empty transcript")
+        raise HTTPException(status_code=400, detail="Could not transcribe audio")
+    
+    # Steps 2+3: LLM -> sentences -> TTS; the first event is awaited here so a
+    # provider that fails to start still gets a 500 instead of a broken stream.
+    # Questions the intent router recognises skip the LLM entirely.
+    with clock.span("intent"):
+        answer = await intent_router.answer(user_text, location)
+    if answer is not None:
+        events = _pipeline(user_text, clock, generate=fixed_reply(answer))
+    else:
+        events = _pipeline(user_text, clock)
+    try:
+        first_event = await events.__anext__()
+    except Exception as e:
+        print(f"[VOICE] Pipeline error: {str(e)}")
+        voice_metrics.record("chat_pipelined", clock, error=str(e))
+        raise HTTPException(status_code=500, detail=f"Voice processing failed: {str(e)}")
+    
+    events = _pipeline_events(user_text, clock, first_event, events)
+    headers = {"Cache-Control": "no-store", "Vary": "Accept"}
+    if media_type == MULTIPART:
+        boundary = uuid.uuid4().hex
+        return StreamingResponse(
+            _multipart_events(boundary, events),
+            media_type=f"{MULTIPART}; boundary={boundary}",
+            headers=headers
+        )
+    return StreamingResponse(_ndjson_events(events), media_type=NDJSON, headers=headers)
+
+
+async def _pipeline_events(user_text: str, clock: StageClock, first_event: dict,
+                           events: AsyncIterator[dict]) -> AsyncIterator[dict]:
+    """Transcript, the pipeline's events, and an error event if a provider fails mid-stream"""
+    error = "stream aborted"
+    try:
+        yield {"event": "transcript", "user_text": user_text, "t_ms": clock.stages["stt_done"]}
+        yield first_event
+        async for event in events:
+            if event["event"] == "done":
+                error = None
+            yield event
+    except Exception as e:
+        print(f"[VOICE] Pipeline error: {str(e)}")
+        error = str(e)
+        yield {"event": "error", "detail": f"Voice processing failed: {str(e)}"}
+    finally:
+        await events.aclose()
+        voice_metrics.record("chat_pipelined", clock, error=error)
+
+
+async def _ndjson_events(events: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    try:
+        async for event in events:
+            if "audio" in event:
+                event = dict(event)
+                event["audio_base64"] = base64.b64encode(event.pop("audio")).decode("utf-8")
+            yield (json.dumps(event) + "\n").encode("utf-8")
+    finally:
+        await events.aclose()
+
+
+async def _multipart_events(boundary: str, events: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    first = True
+    try:
+        async for event in events:
+            if "audio" in event:
+                headers = {
+                    "X-Sentence-Index": str(event["index"]),
+                    "X-Chunk-Seq": str(event["seq"]),
+                    "X-T-Ms": str(event["t_ms"]),
+                }
+                yield _part(boundary, MPEG, first, headers) + event["audio"]
+            else:
+                yield _part(boundary, JSON, first) + json.dumps(event).encode("utf-8")
+            first = False
+        yield _closing(boundary)
+    finally:
+        await events.aclose()
+
+
+@router.websocket("/ws")
+async def voice_ws(
+    websocket: WebSocket,
+    sample_rate: int = Query(16000, ge=8000, le=48000),
+    latitude: Optional[float] = Query(None),
+    longitude: Optional[float] = Query(None),
+    city: Optional[str] = Query(None)
+):
+    """
+    Voice conversation over one WebSocket:
+    stream 16-bit mono PCM frames as binary messages; speech is segmented with
+    VAD, transcribed phrase by phrase, and each turn's reply is streamed back
+    as sentence events plus binary MP3 chunks (see app/services/voice_session.py).
+    """
+    await websocket.accept()
+    print(f"[VOICE WS] Session opened ({sample_rate} Hz)")
+    location = Location(latitude=latitude, longitude=longitude, city=city)
+    await VoiceSession(websocket, sample_rate, transcribe=transcribe_bytes, pipeline=_pipeline,
+                       location=location, speak=stream_tts).run()
+    print("[VOICE WS] Session closed")
+
+
 @router.post("/chat/text")
 async def text_chat(chat_message: ChatMessage):
     """
     Text-only chat endpoint (no STT/TTS):
     1. Receive text message
-    2. Generate response with Groq Llama 3.3 70B
+    2. Answer from the database if it is a simple question, otherwise
+       generate a response with Groq Llama 3.3 70B
     3. Return text response
     """
     print(f"[TEXT CHAT] Received: {chat_message.message[:50]}...")
+    clock = StageClock()
     
     try:
-        # Generate LLM response using Groq Llama 3.3 70B
-        llm_response = await generate_response(chat_message.message)
+        location = Location(latitude=chat_message.latitude, longitude=chat_message.longitude,
+                            city=chat_message.city)
+        llm_response = await _answer(chat_message.message, location, clock)
         print(f"[TEXT CHAT] Response: {llm_response[:50]}...")
+        voice_metrics.record("text", clock)
         
         return {
             "response": llm_response
         }
     except Exception as e:
         print(f"[TEXT CHAT] Error: {str(e)}")
+        voice_metrics.record("text", clock, error=str(e))
         raise HTTPException(status_code=500, detail=f"Chat failed: {str(e)}")
@@ -52,6 +52,29 @@ class BookingCreate(BaseModel):
         }
 
 
+class BestAvailableBookingCreate(BaseModel):
+    """Schema for booking the best block of adjacent seats"""
+    showtime_id: int
+    quantity: int = Field(..., ge=1, le=10)
+    seat_type: Optional[SeatType] = None  # Any type when omitted
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "showtime_id": 1,
+                "quantity": 3,
+                "seat_type": "regular"
+            }
+        }
+
+
+class BookingConflict(BaseModel):
+    """Schema for a 409 on booking creation: what was lost and what is free nearby"""
+    detail: str
+    conflicting_seat_ids: List[int] = []
+    suggested_seats: List[SeatAvailability] = []
+
+
 class BookingSeatResponse(BaseModel):
     """Schema for booked seat details"""
     seat_id: int
@@ -94,7 +117,8 @@ class BookingDetail(BookingResponse):
 class BookingList(BaseModel):
     """Schema for user's booking history"""
     bookings: List[BookingDetail]
-    total: int
+    total: Optional[int] = None  # Omitted for cursor pages unless include_total=true
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page
 
 
 # --- Payment Schemas ---
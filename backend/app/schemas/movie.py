@@ -71,9 +71,10 @@ class MovieResponse(BaseModel):
 class MovieList(BaseModel):
     """Schema for paginated movie list"""
     movies: List[MovieResponse]
-    total: int
-    page: int
+    total: Optional[int] = None  # Omitted for cursor pages unless include_total=true
+    page: Optional[int] = None  # Only set for page-based requests
     per_page: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page
 
 
 # --- Showtime Schemas ---
@@ -0,0 +1,233 @@
+"""
+Per-showtime single-writer booking queue
+Optional flash-sale mode: booking attempts for a showtime are queued and a single
+consumer per showtime drains them in batches. Requests for seats that are already
+taken (or claimed earlier in the same batch) are rejected in memory, and the
+winners are committed together in one transaction by create_bookings_batch.
+Best-available requests go through the same queue: the consumer picks their
+block from the seat index, skipping seats already claimed in the batch, so
+they never race explicit seat picks for the same showtime. If the database
+still rejects the block (another process took a seat), the next-best block is
+tried, up to BEST_AVAILABLE_MAX_ATTEMPTS, as on the direct path.
+Enable with BOOKING_QUEUE_ENABLED=true; the DB constraints still apply, so other
+worker processes writing the same showtime stay correct.
+"""
+from typing import Callable, Dict, List, Optional, Set, Tuple, Union
+import asyncio
+import os
+import time
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.crud import booking as crud_booking
+from app.models.booking import Booking
+from app.schemas.booking import BookingCreate, BestAvailableBookingCreate
+from app.services.seat_index import seat_index
+
+BOOKING_QUEUE_ENABLED = os.getenv("BOOKING_QUEUE_ENABLED", "false").lower() == "true"
+BOOKING_QUEUE_BATCH_SIZE = int(os.getenv("BOOKING_QUEUE_BATCH_SIZE", "16"))
+# Pending attempts per showtime before new ones are turned away with 503
+BOOKING_QUEUE_MAX_DEPTH = int(os.getenv("BOOKING_QUEUE_MAX_DEPTH", "1000"))
+# A showtime's consumer exits after this long without requests
+BOOKING_QUEUE_IDLE_SECONDS = float(os.getenv("BOOKING_QUEUE_IDLE_SECONDS", "30"))
+
+BookingRequest = Union[BookingCreate, BestAvailableBookingCreate]
+# (user_id, booking_data, result future, enqueued_at)
+_Request = Tuple[int, BookingRequest, asyncio.Future, float]
+
+
+class BookingQueueFull(Exception):
+    """Raised when a showtime's queue is at BOOKING_QUEUE_MAX_DEPTH."""
+
+
+class ShowtimeBookingQueue:
+    """One asyncio queue and consumer task per showtime with pending bookings."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        enabled: bool = BOOKING_QUEUE_ENABLED,
+        batch_size: int = BOOKING_QUEUE_BATCH_SIZE,
+        max_depth: int = BOOKING_QUEUE_MAX_DEPTH,
+        idle_seconds: float = BOOKING_QUEUE_IDLE_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.max_depth = max_depth
+        self.idle_seconds = idle_seconds
+        self._queues: Dict[int, asyncio.Queue] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._stats = {
+            "submitted": 0,
+            "rejected_in_memory": 0,
+            "committed": 0,
+            "failed_in_db": 0,
+            "best_available_retries": 0,
+            "turned_away": 0,
+            "batches": 0,
+            "max_batch_size": 0,
+            "max_wait_seconds": 0.0,
+            "wait_seconds_sum": 0.0,
+            "errors": 0,
+        }
+
+    # --- Submission ---
+
+    async def submit(self, user_id: int, booking_data: BookingRequest) -> Optional[Booking]:
+        """Queue a booking attempt and wait for its result (None on conflict)."""
+        showtime_id = booking_data.showtime_id
+        queue = self._queues.get(showtime_id)
+        if queue is None:
+            queue = self._queues[showtime_id] = asyncio.Queue(maxsize=self.max_depth)
+            self._workers[showtime_id] = asyncio.create_task(self._consume(showtime_id, queue))
+
+        future = asyncio.get_running_loop().create_future()
+        try:
+            queue.put_nowait((user_id, booking_data, future, time.perf_counter()))
+        except asyncio.QueueFull:
+            self._stats["turned_away"] += 1
+            raise BookingQueueFull(showtime_id)
+        self._stats["submitted"] += 1
+        return await future
+
+    # --- Consumer ---
+
+    async def _consume(self, showtime_id: int, queue: asyncio.Queue) -> None:
+        batch: List[_Request] = []
+        try:
+            while True:
+                try:
+                    first = await asyncio.wait_for(queue.get(), timeout=self.idle_seconds)
+                except asyncio.TimeoutError:
+                    if queue.empty():
+                        return
+                    continue
+
+                batch = [first]
+                while len(batch) < self.batch_size and not queue.empty():
+                    batch.append(queue.get_nowait())
+
+                try:
+                    results = await asyncio.to_thread(self._process, showtime_id, batch)
+                except Exception as e:
+                    self._stats["errors"] += 1
+                    print(f"[BOOKING QUEUE] Error for showtime {showtime_id}: {str(e)}")
+                    for _, _, future, _ in batch:
+                        if not future.done():
+                            future.set_exception(e)
+                else:
+                    self._resolve(batch, results)
+                batch = []
+        finally:
+            self._queues.pop(showtime_id, None)
+            self._workers.pop(showtime_id, None)
+            # Fail whatever is unresolved (shutdown, or a put racing the idle exit)
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.cancel()
+
+    def _process(self, showtime_id: int, batch: List[_Request]) -> List[Optional[Booking]]:
+        """Reject conflicts against the seat index, then commit the rest as one batch."""
+        db = self.session_factory()
+        try:
+            requested: Set[int] = {
+                s for _, data, _, _ in batch if isinstance(data, BookingCreate) for s in data.seat_ids
+            }
+            claimed = seat_index.unavailable_seats(db, showtime_id, requested)
+
+            results: List[Optional[Booking]] = [None] * len(batch)
+            winners: List[Tuple[int, Tuple[int, BookingCreate]]] = []
+            for i, (user_id, booking_data, _, _) in enumerate(batch):
+                if isinstance(booking_data, BestAvailableBookingCreate):
+                    booking_data = self._pick_block(db, showtime_id, booking_data, claimed)
+                    if booking_data is None:
+                        self._stats["rejected_in_memory"] += 1
+                        continue
+                elif claimed.intersection(booking_data.seat_ids):
+                    self._stats["rejected_in_memory"] += 1
+                    continue
+                claimed.update(booking_data.seat_ids)
+                winners.append((i, (user_id, booking_data)))
+
+            attempts = [1] * len(batch)
+            while winners:
+                created = crud_booking.create_bookings_batch(
+                    db, showtime_id, [request for _, request in winners]
+                )
+                lost = []
+                for (i, request), booking in zip(winners, created):
+                    results[i] = booking
+                    if booking:
+                        self._stats["committed"] += 1
+                    elif (isinstance(batch[i][1], BestAvailableBookingCreate)
+                          and attempts[i] < crud_booking.BEST_AVAILABLE_MAX_ATTEMPTS):
+                        lost.append((i, request))
+                    else:
+                        self._stats["failed_in_db"] += 1
+                if lost:
+                    # Lost a race to another writer, so the index was stale; re-read it
+                    seat_index.invalidate(showtime_id)
+                winners = []
+                for i, (user_id, _) in lost:
+                    retry = self._pick_block(db, showtime_id, batch[i][1], claimed)
+                    if retry is None:
+                        self._stats["failed_in_db"] += 1
+                        continue
+                    attempts[i] += 1
+                    self._stats["best_available_retries"] += 1
+                    claimed.update(retry.seat_ids)
+                    winners.append((i, (user_id, retry)))
+            return results
+        finally:
+            db.close()
+
+    def _pick_block(self, db: Session, showtime_id: int, booking_data: BestAvailableBookingCreate,
+                    claimed: Set[int]) -> Optional[BookingCreate]:
+        """Best block that avoids every seat already claimed (or lost) in this batch"""
+        blocks = seat_index.best_blocks(
+            db, showtime_id, booking_data.quantity, booking_data.seat_type,
+            exclude_seat_ids=claimed, limit=1
+        )
+        if not blocks:
+            return None
+        return BookingCreate(showtime_id=showtime_id, seat_ids=blocks[0])
+
+    def _resolve(self, batch: List[_Request], results: List[Optional[Booking]]) -> None:
+        now = time.perf_counter()
+        stats = self._stats
+        stats["batches"] += 1
+        stats["max_batch_size"] = max(stats["max_batch_size"], len(batch))
+        for (_, _, future, enqueued_at), booking in zip(batch, results):
+            wait = now - enqueued_at
+            stats["wait_seconds_sum"] += wait
+            stats["max_wait_seconds"] = round(max(stats["max_wait_seconds"], wait), 4)
+            if not future.done():
+                future.set_result(booking)
+
+    # --- Lifecycle ---
+
+    async def stop(self) -> None:
+        workers = list(self._workers.values())
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+    # --- Metrics ---
+
+    def metrics(self) -> dict:
+        stats = dict(self._stats)
+        wait_sum = stats.pop("wait_seconds_sum")
+        resolved = stats["rejected_in_memory"] + stats["committed"] + stats["failed_in_db"]
+        stats["avg_wait_seconds"] = round(wait_sum / resolved, 4) if resolved else 0.0
+        stats["avg_batch_size"] = round(resolved / stats["batches"], 2) if stats["batches"] else 0.0
+        stats["enabled"] = self.enabled
+        stats["active_showtimes"] = len(self._queues)
+        stats["queued"] = sum(queue.qsize() for queue in self._queues.values())
+        return stats
+
+
+booking_queue = ShowtimeBookingQueue()
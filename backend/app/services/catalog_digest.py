@@ -0,0 +1,252 @@
+"""
+Catalogue digest for the assistant prompt
+A compact text summary of what is actually bookable: movies showing in the next
+CATALOG_DIGEST_HORIZON_HOURS, genre and language counts, and the next few
+showtimes per city. It is rebuilt by a background task every
+CATALOG_DIGEST_REFRESH_SECONDS (sooner after a catalogue change) and served
+from memory in between, so building a prompt never touches the database.
+Cached LLM answers were generated against the previous digest, so llm_cache
+is invalidated whenever a rebuild changes the digest (ignoring its timestamp).
+
+The digest never exceeds CATALOG_DIGEST_MAX_TOKENS (estimated at ~4 characters
+per token): each section gets a share of the budget and lists as many entries
+as fit, ending with "+N more". The queries aggregate in SQL and are capped, so
+build cost is bounded too however large the catalogue grows.
+"""
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import os
+import time
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.crud import movie as crud_movie
+from app.services.llm_cache import llm_cache
+
+CATALOG_DIGEST_ENABLED = os.getenv("CATALOG_DIGEST_ENABLED", "true").lower() == "true"
+CATALOG_DIGEST_MAX_TOKENS = int(os.getenv("CATALOG_DIGEST_MAX_TOKENS", "600"))
+CATALOG_DIGEST_REFRESH_SECONDS = float(os.getenv("CATALOG_DIGEST_REFRESH_SECONDS", "300"))
+# Catalogue changes trigger a rebuild, but no more often than this
+CATALOG_DIGEST_MIN_REBUILD_SECONDS = float(os.getenv("CATALOG_DIGEST_MIN_REBUILD_SECONDS", "10"))
+CATALOG_DIGEST_HORIZON_HOURS = float(os.getenv("CATALOG_DIGEST_HORIZON_HOURS", "48"))
+CATALOG_DIGEST_SHOWS_PER_CITY = int(os.getenv("CATALOG_DIGEST_SHOWS_PER_CITY", "3"))
+
+CHARS_PER_TOKEN = 4
+# Share of the budget for the movie list; facets and cities use the rest
+MOVIES_SHARE = 0.45
+# Shortest movie entry, used to cap how many rows are fetched for the budget
+MIN_MOVIE_ENTRY_CHARS = 16
+
+
+def estimate_tokens(text: str) -> int:
+    return -(-len(text) // CHARS_PER_TOKEN)
+
+
+def _time(value: datetime) -> str:
+    return value.strftime("%a %I:%M %p").replace(" 0", " ")
+
+
+def fit_line(prefix: str, items: List[str], budget: int, separator: str = "; ",
+             total: Optional[int] = None) -> Tuple[str, int]:
+    """
+    prefix + as many items as fit in `budget` characters, ending with "+N more"
+    when some are left out (`total` counts items the caller didn't fetch).
+    Returns (line, dropped); line is "" if not even one item fits.
+    """
+    total = len(items) if total is None else total
+    line = prefix
+    for i, item in enumerate(items):
+        candidate = line + (separator if i else "") + item
+        rest = total - i - 1
+        tail = f"{separator}+{rest} more" if rest else ""
+        if len(candidate) + len(tail) > budget:
+            if i == 0:
+                return "", total
+            return line + f"{separator}+{total - i} more", total - i
+        line = candidate
+    if total > len(items):
+        line += f"{separator}+{total - len(items)} more"
+    return line, total - len(items)
+
+
+class CatalogDigest:
+    """Background-rebuilt, size-capped catalogue summary."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        enabled: bool = CATALOG_DIGEST_ENABLED,
+        max_tokens: int = CATALOG_DIGEST_MAX_TOKENS,
+        refresh_seconds: float = CATALOG_DIGEST_REFRESH_SECONDS,
+        min_rebuild_seconds: float = CATALOG_DIGEST_MIN_REBUILD_SECONDS,
+        horizon_hours: float = CATALOG_DIGEST_HORIZON_HOURS,
+        shows_per_city: int = CATALOG_DIGEST_SHOWS_PER_CITY
+    ):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.max_chars = max_tokens * CHARS_PER_TOKEN
+        self.refresh_seconds = refresh_seconds
+        self.min_rebuild_seconds = min_rebuild_seconds
+        self.horizon_hours = horizon_hours
+        self.shows_per_city = shows_per_city
+        self._text = ""
+        # Digest minus its "Catalogue as of" header, to detect real changes
+        self._body: Optional[str] = None
+        self._built_at: Optional[float] = None
+        # llm_cache.generation is bumped on every movie/showtime write
+        self._built_generation: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stats = {
+            "builds": 0,
+            "changes": 0,
+            "errors": 0,
+            "last_build_ms": 0.0,
+            "dropped_entries": 0,
+        }
+
+    @property
+    def text(self) -> str:
+        """Latest digest, "" until the first build finishes"""
+        return self._text
+
+    # --- Lifecycle ---
+
+    async def start(self) -> None:
+        if self._task is None and self.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            generation = llm_cache.generation
+            age = None if self._built_at is None else time.monotonic() - self._built_at
+            if age is None or age >= self.refresh_seconds or generation != self._built_generation:
+                try:
+                    await self.rebuild()
+                except Exception as e:
+                    self._stats["errors"] += 1
+                    print(f"[CATALOG] Digest build failed: {str(e)}")
+            await asyncio.sleep(self.min_rebuild_seconds)
+
+    async def rebuild(self) -> str:
+        generation = llm_cache.generation
+        started = time.perf_counter()
+        text, dropped = await asyncio.to_thread(self._build)
+        self._stats["last_build_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        self._stats["builds"] += 1
+        self._stats["dropped_entries"] = dropped
+        self._text = text
+        self._built_at = time.monotonic()
+        body = text.partition("\n")[2]
+        if body != self._body:
+            self._body = body
+            self._stats["changes"] += 1
+            # Answers cached against the old digest (or none) may be stale now
+            llm_cache.invalidate()
+            # Our own bump shouldn't trigger another rebuild; a catalogue write
+            # that raced the build still does
+            if llm_cache.generation == generation + 1:
+                generation = llm_cache.generation
+        self._built_generation = generation
+        return text
+
+    # --- Building ---
+
+    def _build(self) -> Tuple[str, int]:
+        now = datetime.now().replace(second=0, microsecond=0)
+        end = now + timedelta(hours=self.horizon_hours)
+        db = self.session_factory()
+        try:
+            movies = crud_movie.get_catalog_movies(
+                db, now, end, limit=self.max_chars // MIN_MOVIE_ENTRY_CHARS + 1
+            )
+            facets = crud_movie.get_catalog_facets(db, now, end)
+            showtimes = crud_movie.get_catalog_next_showtimes(db, now, end, self.shows_per_city)
+        finally:
+            db.close()
+        return self.render(now, movies, facets, showtimes)
+
+    def render(self, now: datetime, movies: List[tuple], facets: dict,
+               showtimes: List[tuple]) -> Tuple[str, int]:
+        """Digest text within max_chars, and how many entries were left out"""
+        hours = f"{self.horizon_hours:g}"
+        lines = [f"Catalogue as of {_time(now)} (shows in the next {hours} hours):"]
+        if not movies:
+            lines.append("No showtimes are scheduled.")
+            return "\n".join(lines), 0
+
+        remaining = self.max_chars - len(lines[0])
+        dropped = 0
+
+        def add(line: str) -> None:
+            nonlocal remaining
+            lines.append(line)
+            remaining -= len(line) + 1
+
+        # The movie query is capped, so the true count comes from the genre facet
+        total = sum(n for _, n in facets.get("genres", [])) or len(movies)
+        entries = [
+            f"{title} ({genre.value}, {language.value}, {rating.value}, {duration} min)"
+            for title, genre, language, rating, duration, _ in movies
+        ]
+        line, missing = fit_line(f"Now showing ({total} movies): ", entries,
+                                 int(self.max_chars * MOVIES_SHARE) - 1, total=total)
+        dropped += missing
+        if line:
+            add(line)
+
+        for name, label in (("genres", "Genres"), ("languages", "Languages")):
+            items = [f"{value.value} {n}" for value, n in facets.get(name, [])]
+            line, missing = fit_line(f"{label}: ", items, remaining - 1, ", ")
+            dropped += missing
+            if line:
+                add(line)
+
+        cities: dict = {}
+        for city, start_time, title, theater in showtimes:
+            cities.setdefault(city, []).append(f"{_time(start_time)} {title} at {theater}")
+        city_lines = []
+        budget = remaining - len("\nNext shows by city:")
+        for i, city in enumerate(sorted(cities)):
+            rest = len(cities) - i - 1
+            reserve = len(f"\n+{rest} more cities") if rest else 0
+            line, missing = fit_line(f"- {city}: ", cities[city], budget - 1 - reserve)
+            if not line:
+                dropped += sum(len(cities[c]) for c in sorted(cities)[i:])
+                city_lines.append(f"+{len(cities) - i} more cities")
+                break
+            dropped += missing
+            city_lines.append(line)
+            budget -= len(line) + 1
+        if city_lines and not city_lines[0].startswith("+"):
+            add("Next shows by city:")
+            for line in city_lines:
+                add(line)
+
+        return "\n".join(lines), dropped
+
+    # --- Metrics ---
+
+    def metrics(self) -> dict:
+        stats = dict(self._stats)
+        stats["chars"] = len(self._text)
+        stats["estimated_tokens"] = estimate_tokens(self._text)
+        stats["max_tokens"] = self.max_chars // CHARS_PER_TOKEN
+        stats["age_seconds"] = (round(time.monotonic() - self._built_at, 1)
+                                if self._built_at is not None else None)
+        stats["running"] = self._task is not None and not self._task.done()
+        return stats
+
+
+catalog_digest = CatalogDigest()
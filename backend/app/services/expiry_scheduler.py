@@ -0,0 +1,209 @@
+"""
+Background expiry scheduler for pending bookings
+Keeps a min-heap of upcoming expires_at deadlines and expires due bookings
+in batched UPDATEs shortly after their deadline, releasing their seats.
+A batch that fails (e.g. the database is briefly unreachable) goes back on
+the heap and is retried with exponential backoff instead of waiting for the
+next full sweep.
+"""
+from datetime import datetime
+from typing import Callable, List, Optional, Tuple
+import asyncio
+import heapq
+import os
+import threading
+import time
+
+from sqlalchemy.orm import Session
+
+from app.database import SessionLocal
+from app.crud import booking as crud_booking
+from app.models.booking import Booking, BookingStatus
+
+EXPIRY_BATCH_SIZE = int(os.getenv("BOOKING_EXPIRY_BATCH_SIZE", "500"))
+# Wait this long past the earliest deadline so nearby deadlines share one UPDATE
+EXPIRY_GRACE_SECONDS = float(os.getenv("BOOKING_EXPIRY_GRACE_SECONDS", "1.0"))
+# Full sweep interval; catches bookings created by other worker processes
+EXPIRY_SWEEP_SECONDS = float(os.getenv("BOOKING_EXPIRY_SWEEP_SECONDS", "60"))
+# Upper bound for the retry delay of a failed batch (doubles from the grace period)
+EXPIRY_MAX_BACKOFF_SECONDS = float(os.getenv("BOOKING_EXPIRY_MAX_BACKOFF_SECONDS", "30"))
+
+
+class BookingExpiryScheduler:
+    """Min-heap of (deadline, booking_id) drained by a single asyncio task."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        batch_size: int = EXPIRY_BATCH_SIZE,
+        grace_seconds: float = EXPIRY_GRACE_SECONDS,
+        sweep_seconds: float = EXPIRY_SWEEP_SECONDS
+    ):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.grace_seconds = grace_seconds
+        self.sweep_seconds = sweep_seconds
+        self._heap: List[Tuple[float, int]] = []
+        self._lock = threading.Lock()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        # Consecutive failed batches, for the retry backoff
+        self._failures = 0
+        self._stats = {
+            "batches": 0,
+            "expired_total": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "last_lag_seconds": 0.0,
+            "max_lag_seconds": 0.0,
+            "lag_seconds_sum": 0.0,
+            "sweeps": 0,
+            "retried": 0,
+            "errors": 0,
+        }
+
+    # --- Scheduling ---
+
+    def schedule(self, booking_id: int, expires_at: Optional[datetime]) -> None:
+        """Track a pending booking's deadline. Safe to call from any thread."""
+        if expires_at is None:
+            return
+        deadline = expires_at.astimezone().timestamp()
+        with self._lock:
+            is_new_head = not self._heap or deadline < self._heap[0][0]
+            heapq.heappush(self._heap, (deadline, booking_id))
+        if is_new_head and self._loop is not None and self._wakeup is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def _pop_due(self, now: float) -> List[Tuple[float, int]]:
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now and len(due) < self.batch_size:
+                due.append(heapq.heappop(self._heap))
+        return due
+
+    def _retry_later(self, due: List[Tuple[float, int]]) -> float:
+        """Put a failed batch back on the heap, due after an exponential backoff"""
+        self._failures += 1
+        delay = min(self.grace_seconds * 2 ** self._failures, EXPIRY_MAX_BACKOFF_SECONDS)
+        retry_at = time.time() + delay
+        with self._lock:
+            for _, booking_id in due:
+                heapq.heappush(self._heap, (retry_at, booking_id))
+        self._stats["retried"] += len(due)
+        return delay
+
+    def _next_deadline(self) -> Optional[float]:
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    # --- Lifecycle ---
+
+    async def start(self) -> None:
+        """Load pending deadlines from the DB and start the expiry task."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        pending = await asyncio.to_thread(self._load_pending)
+        for booking_id, expires_at in pending:
+            self.schedule(booking_id, expires_at)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _load_pending(self) -> List[Tuple[int, datetime]]:
+        db = self.session_factory()
+        try:
+            return db.query(Booking.id, Booking.expires_at).filter(
+                Booking.status == BookingStatus.PENDING,
+                Booking.expires_at.isnot(None)
+            ).all()
+        finally:
+            db.close()
+
+    # --- Expiry loop ---
+
+    async def _run(self) -> None:
+        last_sweep = time.monotonic()
+        while True:
+            self._wakeup.clear()
+            next_deadline = self._next_deadline()
+            timeout = self.sweep_seconds - (time.monotonic() - last_sweep)
+            if next_deadline is not None:
+                timeout = min(timeout, next_deadline + self.grace_seconds - time.time())
+            if timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                    continue  # Earlier deadline arrived; recompute the timeout
+                except asyncio.TimeoutError:
+                    pass
+
+            try:
+                due = self._pop_due(time.time())
+                if due:
+                    try:
+                        await self._expire_batch(due)
+                    except Exception:
+                        delay = self._retry_later(due)
+                        print(f"[EXPIRY] Batch of {len(due)} failed; retrying in {delay:.1f}s")
+                        raise
+                    self._failures = 0
+                if time.monotonic() - last_sweep >= self.sweep_seconds:
+                    last_sweep = time.monotonic()
+                    await asyncio.to_thread(self._sweep)
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"[EXPIRY] Error: {str(e)}")
+                await asyncio.sleep(self.grace_seconds)
+
+    async def _expire_batch(self, due: List[Tuple[float, int]]) -> None:
+        count = await asyncio.to_thread(self._expire, [booking_id for _, booking_id in due])
+        lag = max(0.0, time.time() - due[0][0])
+
+        stats = self._stats
+        stats["batches"] += 1
+        stats["expired_total"] += count
+        stats["last_batch_size"] = count
+        stats["max_batch_size"] = max(stats["max_batch_size"], count)
+        stats["last_lag_seconds"] = round(lag, 3)
+        stats["max_lag_seconds"] = round(max(stats["max_lag_seconds"], lag), 3)
+        stats["lag_seconds_sum"] += lag
+
+    def _expire(self, booking_ids: List[int]) -> int:
+        db = self.session_factory()
+        try:
+            return crud_booking.expire_bookings(db, booking_ids)
+        finally:
+            db.close()
+
+    def _sweep(self) -> None:
+        db = self.session_factory()
+        try:
+            self._stats["expired_total"] += crud_booking.expire_pending_bookings(db)
+            self._stats["sweeps"] += 1
+        finally:
+            db.close()
+
+    # --- Metrics ---
+
+    def metrics(self) -> dict:
+        stats = dict(self._stats)
+        lag_sum = stats.pop("lag_seconds_sum")
+        stats["avg_lag_seconds"] = round(lag_sum / stats["batches"], 3) if stats["batches"] else 0.0
+        with self._lock:
+            stats["scheduled"] = len(self._heap)
+        stats["running"] = self._task is not None and not self._task.done()
+        return stats
+
+
+expiry_scheduler = BookingExpiryScheduler()
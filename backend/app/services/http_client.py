@@ -0,0 +1,174 @@
+"""
+Shared HTTP clients for the external voice/LLM providers
+One pooled httpx.AsyncClient per provider for the app lifetime, so a voice turn
+reuses warm keep-alive connections instead of paying a TCP+TLS handshake per
+call. Clients are opened in the FastAPI lifespan (or lazily on first use, e.g.
+from scripts) and closed on shutdown.
+Transient failures are retried with exponential backoff and full jitter, but
+only where a retry can't repeat work the provider already did: errors before
+the request went out (connect, connect timeout, pool timeout) and 429/5xx
+status lines, whose body is never read. A POST that fails or times out after
+it was sent (read/write timeout, dropped connection) is not retried. Timeouts
+come from the provider's httpx.Timeout; callers don't override them.
+"""
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict, Optional
+import asyncio
+import os
+import random
+
+import httpx
+
+try:
+    import h2  # noqa: F401  (httpx needs it for HTTP/2)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+HTTP_CLIENT_HTTP2 = os.getenv("HTTP_CLIENT_HTTP2", "true").lower() == "true"
+# Retries after the first attempt
+HTTP_CLIENT_RETRIES = int(os.getenv("HTTP_CLIENT_RETRIES", "2"))
+HTTP_CLIENT_BACKOFF_SECONDS = float(os.getenv("HTTP_CLIENT_BACKOFF_SECONDS", "0.2"))
+HTTP_CLIENT_MAX_BACKOFF_SECONDS = float(os.getenv("HTTP_CLIENT_MAX_BACKOFF_SECONDS", "2.0"))
+
+GROQ_BASE_URL = os.getenv("GROQ_BASE_URL", "https://api.groq.com/openai/v1")
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+# The request never reached the provider, so any method can be retried
+RETRY_BEFORE_SEND_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)
+# Safe to resend even if the provider may have seen the first attempt
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# provider -> base URL, connection limits and timeouts
+PROVIDERS: Dict[str, dict] = {
+    "groq": {
+        "base_url": GROQ_BASE_URL,
+        "limits": httpx.Limits(
+            max_connections=int(os.getenv("GROQ_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("GROQ_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=float(os.getenv("GROQ_KEEPALIVE_SECONDS", "60")),
+        ),
+        # read covers Whisper on long uploads; pool bounds the wait for a free connection
+        "timeout": httpx.Timeout(connect=5.0, read=60.0, write=30.0, pool=5.0),
+    },
+}
+
+
+class HttpClientPool:
+    """Lazily created, app-lifetime httpx clients keyed by provider."""
+
+    def __init__(self, providers: Dict[str, dict] = PROVIDERS,
+                 retries: int = HTTP_CLIENT_RETRIES,
+                 backoff_seconds: float = HTTP_CLIENT_BACKOFF_SECONDS,
+                 max_backoff_seconds: float = HTTP_CLIENT_MAX_BACKOFF_SECONDS):
+        self.providers = providers
+        self.retries = retries
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.http2 = HTTP_CLIENT_HTTP2 and HTTP2_AVAILABLE
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._stats: Dict[str, Dict[str, int]] = {
+            name: {"requests": 0, "retries": 0, "failures": 0} for name in providers
+        }
+
+    # --- Lifecycle ---
+
+    async def start(self) -> None:
+        if HTTP_CLIENT_HTTP2 and not HTTP2_AVAILABLE:
+            print("[HTTP] h2 not installed, using HTTP/1.1 (pip install 'httpx[http2]')")
+        for name in self.providers:
+            self.client(name)
+
+    async def stop(self) -> None:
+        clients = list(self._clients.values())
+        self._clients.clear()
+        await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
+
+    def client(self, provider: str) -> httpx.AsyncClient:
+        client = self._clients.get(provider)
+        if client is None or client.is_closed:
+            config = self.providers[provider]
+            client = self._clients[provider] = httpx.AsyncClient(
+                base_url=config["base_url"],
+                limits=config["limits"],
+                timeout=config["timeout"],
+                http2=self.http2
+            )
+        return client
+
+    # --- Requests ---
+
+    async def request(self, provider: str, method: str, url: str, **kwargs) -> httpx.Response:
+        """
+        Send a request on the provider's pooled client, retrying transient
+        failures. The last response (or error) is returned/raised as-is.
+        """
+        return await self._send(provider, method, url, False, kwargs)
+
+    @asynccontextmanager
+    async def stream(self, provider: str, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """
+        Like request(), but the body is left unread for aiter_*(). Retries only
+        happen before the response starts; the connection is released on exit.
+        """
+        response = await self._send(provider, method, url, True, kwargs)
+        try:
+            yield response
+        finally:
+            await response.aclose()
+
+    async def _send(self, provider: str, method: str, url: str, stream: bool, kwargs: dict) -> httpx.Response:
+        stats = self._stats[provider]
+        stats["requests"] += 1
+        attempt = 0
+        retry_errors = httpx.TransportError if method.upper() in IDEMPOTENT_METHODS else RETRY_BEFORE_SEND_ERRORS
+        while True:
+            client = self.client(provider)
+            try:
+                # Always streamed, so a retried 429/5xx body is never read
+                response = await client.send(client.build_request(method, url, **kwargs), stream=True)
+            except retry_errors:
+                if attempt >= self.retries:
+                    stats["failures"] += 1
+                    raise
+                delay = self._backoff(attempt)
+            except httpx.TransportError:
+                stats["failures"] += 1
+                raise
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= self.retries:
+                    if response.status_code >= 400:
+                        stats["failures"] += 1
+                    if not stream:
+                        try:
+                            await response.aread()
+                        finally:
+                            await response.aclose()
+                    return response
+                delay = self._backoff(attempt, response.headers.get("Retry-After"))
+                await response.aclose()
+            attempt += 1
+            stats["retries"] += 1
+            await asyncio.sleep(delay)
+
+    def _backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """Full jitter: uniform in [0, base * 2^attempt], or the server's Retry-After"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.max_backoff_seconds)
+            except ValueError:
+                pass
+        ceiling = min(self.max_backoff_seconds, self.backoff_seconds * (2 ** attempt))
+        return random.uniform(0, ceiling)
+
+    # --- Metrics ---
+
+    def metrics(self) -> dict:
+        return {
+            "http2": self.http2,
+            "open_clients": sorted(self._clients),
+            "providers": {name: dict(stats) for name, stats in self._stats.items()},
+        }
+
+
+http_clients = HttpClientPool()
@@ -0,0 +1,213 @@
+"""
+Idempotency-Key support for retried POSTs
+Stores a fingerprint of the request and the response it produced, keyed by
+(user, endpoint, key), so a client retrying after a dropped connection gets the
+original result instead of a second booking or payment.
+Only outcomes a retry would reproduce are stored: successes and validation
+failures (400, 403, 404, 422). Conflicts such as "seat just taken", throttling
+and server errors release the key, so the retry runs again instead of
+replaying a stale failure for the whole TTL.
+The store is process-local; with several workers a retry that lands on another
+process falls through to the normal path (the DB constraints still apply).
+"""
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Dict, Hashable, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import os
+import time
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+IDEMPOTENCY_MAX_ENTRIES = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "10000"))
+# How long a duplicate waits for the first request with the same key to finish
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+IDEMPOTENCY_MAX_KEY_LENGTH = 255
+
+REPLAY_HEADER = "Idempotent-Replayed"
+# 4xx responses that depend on the moment (contention, throttling), not on the request
+TRANSIENT_STATUS_CODES = frozenset({408, 409, 423, 425, 429})
+
+
+def is_replayable(status_code: int) -> bool:
+    """Whether a response may be stored and replayed to retries with the same key"""
+    return status_code < 500 and status_code not in TRANSIENT_STATUS_CODES
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable hash of the request payload; a reused key with a different body is rejected"""
+    raw = json.dumps(jsonable_encoder(parts), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class _Entry:
+    def __init__(self, request_hash: str):
+        self.request_hash = request_hash
+        self.done = asyncio.Event()
+        self.status_code: Optional[int] = None
+        self.body: Any = None
+        self.stored_at = time.monotonic()
+
+
+class IdempotencySlot:
+    """
+    Handle returned by IdempotencyStore.claim().
+    Either `replay` is set (return it as-is) or the caller owns the key and must
+    finish with complete() or release(); replayable HTTPExceptions raised inside
+    are stored too, anything else releases the key.
+    """
+
+    def __init__(self, store: "IdempotencyStore", key: Optional[Hashable],
+                 entry: Optional[_Entry], replay: Optional[JSONResponse] = None):
+        self._store = store
+        self._key = key
+        self._entry = entry
+        self.replay = replay
+
+    def complete(self, status_code: int, body: Any) -> None:
+        if self._entry is None or self.replay is not None:
+            return
+        if is_replayable(status_code):
+            self._store._finish(self._key, self._entry, status_code, jsonable_encoder(body))
+        else:
+            self._store._abandon(self._key, self._entry)
+        self._entry = None
+
+    def release(self) -> None:
+        """Free the key without storing anything; a retry runs the request again"""
+        if self._entry is None or self.replay is not None:
+            return
+        self._store._abandon(self._key, self._entry)
+        self._entry = None
+
+    async def __aenter__(self) -> "IdempotencySlot":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> bool:
+        if self._entry is None:
+            return False
+        if isinstance(exc, HTTPException) and is_replayable(exc.status_code):
+            # Deterministic rejections (400, 404, ...) replay like successes
+            self._store._finish(self._key, self._entry, exc.status_code, {"detail": exc.detail})
+        else:
+            # Conflicts, unfinished or server errors free the key so the client can retry
+            self._store._abandon(self._key, self._entry)
+        self._entry = None
+        return False
+
+
+class IdempotencyStore:
+    """Bounded LRU of request fingerprints and stored responses with a TTL."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = IDEMPOTENCY_TTL_SECONDS,
+        max_entries: int = IDEMPOTENCY_MAX_ENTRIES,
+        wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.wait_seconds = wait_seconds
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._stats = {"stored": 0, "replayed": 0, "mismatched": 0, "in_flight_waits": 0, "evicted": 0,
+                       "released": 0}
+
+    async def claim(self, scope: Tuple[Any, ...], idempotency_key: Optional[str],
+                    request_hash: str) -> IdempotencySlot:
+        """
+        Reserve a key for this request, or return the stored response for it.
+        Without a key the slot is a no-op and the request runs normally.
+        """
+        if idempotency_key is None:
+            return IdempotencySlot(self, None, None)
+        if not idempotency_key or len(idempotency_key) > IDEMPOTENCY_MAX_KEY_LENGTH:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Idempotency-Key must be 1-{IDEMPOTENCY_MAX_KEY_LENGTH} characters"
+            )
+        key = (*scope, idempotency_key)
+
+        while True:
+            entry = self._lookup(key)
+            if entry is None:
+                entry = _Entry(request_hash)
+                self._insert(key, entry)
+                return IdempotencySlot(self, key, entry)
+
+            if entry.request_hash != request_hash:
+                self._stats["mismatched"] += 1
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key was already used with a different request"
+                )
+
+            if not entry.done.is_set():
+                # Same request still running (client retried too early); wait for it
+                self._stats["in_flight_waits"] += 1
+                try:
+                    await asyncio.wait_for(entry.done.wait(), timeout=self.wait_seconds)
+                except asyncio.TimeoutError:
+                    raise HTTPException(
+                        status_code=409,
+                        detail="A request with this Idempotency-Key is still in progress"
+                    )
+                if entry.status_code is None:
+                    continue  # First attempt failed and released the key; run it ourselves
+
+            self._stats["replayed"] += 1
+            return IdempotencySlot(self, key, None, replay=JSONResponse(
+                status_code=entry.status_code,
+                content=entry.body,
+                headers={REPLAY_HEADER: "true"}
+            ))
+
+    # --- Internals ---
+
+    def _lookup(self, key: Hashable) -> Optional[_Entry]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry.done.is_set() and time.monotonic() - entry.stored_at > self.ttl_seconds:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _insert(self, key: Hashable, entry: _Entry) -> None:
+        self._entries[key] = entry
+        overflow = len(self._entries) - self.max_entries
+        if overflow <= 0:
+            return
+        # Evict least recently used entries, never one whose request is still running
+        evictable = list(islice((k for k, e in self._entries.items() if e.done.is_set()), overflow))
+        for old_key in evictable:
+            del self._entries[old_key]
+        self._stats["evicted"] += len(evictable)
+
+    def _finish(self, key: Hashable, entry: _Entry, status_code: int, body: Any) -> None:
+        entry.status_code = status_code
+        entry.body = body
+        entry.stored_at = time.monotonic()
+        entry.done.set()
+        self._stats["stored"] += 1
+
+    def _abandon(self, key: Hashable, entry: _Entry) -> None:
+        if self._entries.get(key) is entry:
+            del self._entries[key]
+        entry.done.set()
+        self._stats["released"] += 1
+
+    # --- Metrics ---
+
+    def metrics(self) -> Dict[str, int]:
+        stats = dict(self._stats)
+        stats["entries"] = len(self._entries)
+        return stats
+
+
+idempotency_store = IdempotencyStore()
@@ -0,0 +1,369 @@
+"""
+Deterministic intent fast path for the movie assistant
+Simple questions ("what's playing tonight", "showtimes for Dune", "theaters
+near me", "any good comedies") are recognised with keyword patterns plus a
+lookup of movie titles, and answered straight from the database with templated
+text. Everything else returns None and goes to the LLM as before.
+
+Short titles ("Up", "It", "Us", "Her") are also everyday words, so they only
+count as a movie mention with a stronger signal: the title in quotes, after
+"showtimes for/of", or next to at least two showtime words ("when is Up
+playing"). `python -m app.services.intents check` runs the classifier over
+EXAMPLES, including sentences that must fall through to the LLM.
+"""
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Callable, Dict, List, Optional, Tuple
+import asyncio
+import os
+import re
+import time
+
+from pydantic import BaseModel
+
+from app.database import AsyncSessionLocal
+from app.crud.aio import movie as crud_movie
+from app.crud.aio import theater as crud_theater
+from app.models.movie import Genre
+from app.services.tts import CANNED_PHRASES
+
+INTENTS_ENABLED = os.getenv("INTENTS_ENABLED", "true").lower() == "true"
+# How long the movie title list used for entity matching is reused
+INTENT_TITLES_TTL_SECONDS = float(os.getenv("INTENT_TITLES_TTL_SECONDS", "30"))
+# Titles shorter than this (normalized) need a stronger signal than a bare mention
+INTENT_MIN_TITLE_CHARS = int(os.getenv("INTENT_MIN_TITLE_CHARS", "4"))
+MAX_LISTED = 5
+# Genre suggestions without a day look this far ahead for shows
+INTENT_UPCOMING_DAYS = float(os.getenv("INTENT_UPCOMING_DAYS", "7"))
+TONIGHT_FROM_HOUR = 17
+
+
+class Location(BaseModel):
+    """Where the user is, if the client shared it"""
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    city: Optional[str] = None
+
+
+class Intent(BaseModel):
+    name: str
+    movie_id: Optional[int] = None
+    movie_title: Optional[str] = None
+    genre: Optional[Genre] = None
+    day: Optional[str] = None   # "today", "tonight" or "tomorrow"
+
+
+# --- Patterns ---
+
+def _pattern(*alternatives: str) -> re.Pattern:
+    return re.compile(r"\b(?:" + "|".join(alternatives) + r")\b")
+
+
+GREETING = re.compile(r"^(?:hi|hello|hey|hiya|good (?:morning|afternoon|evening))(?: there)?$")
+BOOKING_HELP = _pattern(r"how (?:do|can|should) i (?:book|buy|get)", r"how to (?:book|buy)",
+                        r"booking process", r"help (?:me )?book")
+SHOWTIMES = _pattern(r"show ?times?", r"timings?", r"when", r"what time", r"playing",
+                     r"showing", r"screening", r"shows?")
+# Listing phrasings only; "which movies won an oscar" or "what is on tv" go to the LLM.
+# A bare "on" counts only when nothing but a day (or the end) follows it
+_ON_LISTING = r"on(?= today| tonight| tomorrow| now| this evening| at the (?:movies|cinema)|$)"
+NOW_SHOWING = _pattern(r"what(?:s| is| are)? (?:playing|showing)", rf"what(?:s| is| are)? {_ON_LISTING}",
+                       r"now showing", r"(?:movies?|films?|anything) (?:playing|showing)",
+                       rf"(?:which|what) (?:movies|films) (?:are )?(?:playing|showing|{_ON_LISTING})",
+                       r"(?:movies?|films?) (?:are )?in (?:theaters|theatres|cinemas)")
+THEATERS_NEAR = re.compile(r"\b(?:theaters?|theatres?|cinemas?|multiplex(?:es)?)\b.*\b(?:near|nearby|close|closest|around)\b"
+                           r"|\b(?:near|nearby|closest)\b.*\b(?:theaters?|theatres?|cinemas?|multiplex(?:es)?)\b")
+SHOWTIME_NOUN = r"(?:show ?times?|timings?|screenings?|shows)"
+# Too common as verbs ("show up", "shows up") to count as a signal on their own
+WEAK_SHOWTIME_WORDS = {"show", "shows"}
+RECOMMEND = _pattern(r"recommend", r"suggest", r"any", r"some", r"something", r"good", r"best", r"watch", r"in the mood")
+DAYS = (("tomorrow", _pattern(r"tomorrow")),
+        ("tonight", _pattern(r"tonight", r"this evening")),
+        ("today", _pattern(r"today", r"now")))
+GENRE_WORDS = {
+    Genre.ACTION: _pattern(r"action"),
+    Genre.COMEDY: _pattern(r"comedy", r"comedies", r"funny"),
+    Genre.DRAMA: _pattern(r"drama", r"dramas"),
+    Genre.HORROR: _pattern(r"horror", r"scary"),
+    Genre.SCIFI: _pattern(r"sci ?fi", r"science fiction"),
+    Genre.ROMANCE: _pattern(r"romance", r"romantic", r"romcom", r"rom com"),
+    Genre.THRILLER: _pattern(r"thriller", r"thrillers"),
+    Genre.ANIMATION: _pattern(r"animation", r"animated", r"cartoon"),
+    Genre.DOCUMENTARY: _pattern(r"documentary", r"documentaries"),
+}
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    text = text.lower().replace("'", "").replace("’", "")
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text)).strip()
+
+
+def classify(text: str, titles: List[Tuple[int, str]]) -> Optional[Intent]:
+    """Match a question against the known intents; None means ask the LLM"""
+    query = normalize(text)
+    if not query:
+        return None
+
+    day = next((name for name, pattern in DAYS if pattern.search(query)), None)
+
+    movie = find_movie(query, titles, text)
+    if movie and SHOWTIMES.search(query):
+        return Intent(name="movie_showtimes", movie_id=movie[0], movie_title=movie[1], day=day)
+    if THEATERS_NEAR.search(query):
+        return Intent(name="theaters_nearby")
+    genre = next((genre for genre, pattern in GENRE_WORDS.items() if pattern.search(query)), None)
+    if genre and (RECOMMEND.search(query) or NOW_SHOWING.search(query)):
+        return Intent(name="genre_movies", genre=genre, day=day)
+    if NOW_SHOWING.search(query):
+        return Intent(name="now_showing", day=day or "today")
+    if BOOKING_HELP.search(query):
+        return Intent(name="booking_help")
+    if GREETING.match(query):
+        return Intent(name="greeting")
+    return None
+
+
+def find_movie(query: str, titles: List[Tuple[int, str]],
+               text: Optional[str] = None) -> Optional[Tuple[int, str]]:
+    """Longest movie title mentioned in the (normalized) question"""
+    best = None
+    for movie_id, title in titles:
+        name = normalize(title)
+        if not name or not re.search(rf"\b{re.escape(name)}\b", query):
+            continue
+        if len(name) < INTENT_MIN_TITLE_CHARS and not _clearly_named(name, query, text or query):
+            continue
+        if best is None or len(name) > len(normalize(best[1])):
+            best = (movie_id, title)
+    return best
+
+
+def _clearly_named(name: str, query: str, text: str) -> bool:
+    """Whether a short title is meant as the movie, not as a plain word"""
+    title = re.escape(name)
+    if re.search(rf"[\"“'‘]\s*{title}\s*[\"”'’]", text.lower()):
+        return True
+    if re.search(rf"\b{SHOWTIME_NOUN} (?:for|of) {title}\b", query):
+        return True
+    words = {match.replace(" ", "") for match in SHOWTIMES.findall(query)} - WEAK_SHOWTIME_WORDS
+    return len(words) >= 2
+
+
+# --- Answers ---
+
+def _time(value: datetime) -> str:
+    return value.strftime("%I:%M %p").lstrip("0")
+
+
+def _join(items: List[str]) -> str:
+    if len(items) <= 1:
+        return "".join(items)
+    return ", ".join(items[:-1]) + " and " + items[-1]
+
+
+def _day_window(day: str, now: datetime) -> Tuple[datetime, datetime]:
+    """[start, end) of the day the user asked about, never in the past"""
+    midnight = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    if day == "tomorrow":
+        return midnight + timedelta(days=1), midnight + timedelta(days=2)
+    start = max(now, midnight.replace(hour=TONIGHT_FROM_HOUR)) if day == "tonight" else now
+    return start, midnight + timedelta(days=1)
+
+
+async def _movie_showtimes(db, intent: Intent, location: Location) -> str:
+    showtimes = await crud_movie.get_showtimes_by_movie(db, intent.movie_id, location.city)
+    if intent.day:
+        start, end = _day_window(intent.day, datetime.now())
+        showtimes = [st for st in showtimes if start <= st.start_time.replace(tzinfo=None) < end]
+    when = f" {intent.day}" if intent.day else ""
+    if not showtimes:
+        return f"{intent.movie_title} has no upcoming shows{when}. Ask me what else is playing."
+
+    listed = [
+        f"{st.start_time.strftime('%a') + ' ' if not intent.day else ''}{_time(st.start_time)} "
+        f"at {st.screen.theater.name}"
+        for st in showtimes[:MAX_LISTED]
+    ]
+    more = f", plus {len(showtimes) - MAX_LISTED} more" if len(showtimes) > MAX_LISTED else ""
+    return f"{intent.movie_title} is showing{when}: {_join(listed)}{more}."
+
+
+async def _now_showing(db, intent: Intent, location: Location) -> str:
+    start, end = _day_window(intent.day, datetime.now())
+    showtimes = await crud_movie.get_showtimes_by_date(db, start, location.city)
+    showtimes = [st for st in showtimes if start <= st.start_time.replace(tzinfo=None) < end]
+    if not showtimes:
+        return f"I couldn't find any shows {intent.day}. Try asking about another day."
+
+    counts: Dict[str, int] = {}
+    for st in showtimes:
+        counts[st.movie.title] = counts.get(st.movie.title, 0) + 1
+    ranked = sorted(counts.items(), key=lambda item: -item[1])
+    listed = [f"{title} ({n} show{'s' if n > 1 else ''})" for title, n in ranked[:MAX_LISTED]]
+    more = f", and {len(ranked) - MAX_LISTED} more" if len(ranked) > MAX_LISTED else ""
+    return f"Playing {intent.day}: {_join(listed)}{more}."
+
+
+async def _genre_movies(db, intent: Intent, location: Location) -> str:
+    now = datetime.now()
+    if intent.day:
+        start, end = _day_window(intent.day, now)
+    else:
+        start, end = now, now + timedelta(days=INTENT_UPCOMING_DAYS)
+    # Only movies the user can actually book: shows in the window, in their city
+    movies = await crud_movie.get_movies_showing(
+        db, start, end, genre=intent.genre, city=location.city, limit=MAX_LISTED
+    )
+    genre = intent.genre.value.lower()
+    when = f" {intent.day}" if intent.day else ""
+    if not movies:
+        return f"There are no {genre} movies showing{when}. Want to hear what else is playing?"
+    return f"For {genre}{when}, you could watch {_join([m.title for m in movies])}."
+
+
+async def _theaters_nearby(db, intent: Intent, location: Location) -> str:
+    if location.latitude is not None and location.longitude is not None:
+        theaters = await crud_theater.get_theaters_nearby(db, location.latitude, location.longitude)
+        if not theaters:
+            return "I couldn't find any theaters within 7 kilometers of you."
+        listed = [f"{t.name} ({t.distance_km:.1f} km)" for t in theaters[:MAX_LISTED]]
+        return f"Theaters near you: {_join(listed)}."
+    if location.city:
+        theaters = await crud_theater.get_theaters_by_city(db, location.city)
+        if not theaters:
+            return f"I couldn't find any theaters in {location.city}."
+        return f"Theaters in {location.city}: {_join([t.name for t in theaters[:MAX_LISTED]])}."
+    return "Share your location in the app and I'll list the theaters closest to you."
+
+
+ANSWERS: Dict[str, Callable] = {
+    "movie_showtimes": _movie_showtimes,
+    "now_showing": _now_showing,
+    "genre_movies": _genre_movies,
+    "theaters_nearby": _theaters_nearby,
+}
+
+
+class IntentRouter:
+    """Classifies questions and answers the recognised ones from the DB."""
+
+    def __init__(self, session_factory=AsyncSessionLocal, enabled: bool = INTENTS_ENABLED,
+                 titles_ttl_seconds: float = INTENT_TITLES_TTL_SECONDS):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.titles_ttl_seconds = titles_ttl_seconds
+        self._titles: List[Tuple[int, str]] = []
+        self._titles_loaded_at: Optional[float] = None
+        self._titles_lock = asyncio.Lock()
+        self._stats: Dict[str, int] = {"llm_fallbacks": 0, "errors": 0}
+
+    async def answer(self, text: str, location: Optional[Location] = None) -> Optional[str]:
+        """Templated answer for a recognised intent, or None to use the LLM"""
+        if not self.enabled:
+            return None
+        location = location or Location()
+        try:
+            async with self.session_factory() as db:
+                intent = classify(text, await self._movie_titles(db))
+                if intent is None:
+                    self._stats["llm_fallbacks"] += 1
+                    return None
+                if intent.name in CANNED_PHRASES:
+                    # Same text as the pre-rendered prompt, so TTS is a cache hit
+                    reply = CANNED_PHRASES[intent.name]
+                else:
+                    reply = await ANSWERS[intent.name](db, intent, location)
+        except Exception as e:
+            # The fast path is an optimisation; the LLM can still answer
+            print(f"[INTENT] Error: {str(e)}")
+            self._stats["errors"] += 1
+            return None
+        self._stats[intent.name] = self._stats.get(intent.name, 0) + 1
+        print(f"[INTENT] {intent.name}: {reply[:50]}...")
+        return reply
+
+    async def _movie_titles(self, db) -> List[Tuple[int, str]]:
+        async with self._titles_lock:
+            now = time.monotonic()
+            if self._titles_loaded_at is None or now - self._titles_loaded_at > self.titles_ttl_seconds:
+                self._titles = await crud_movie.get_movie_titles(db)
+                self._titles_loaded_at = now
+            return self._titles
+
+    def metrics(self) -> dict:
+        stats = dict(self._stats)
+        answered = sum(n for name, n in stats.items() if name not in ("llm_fallbacks", "errors"))
+        total = answered + stats["llm_fallbacks"]
+        stats["fast_path_rate"] = round(answered / total, 3) if total else 0.0
+        stats["enabled"] = self.enabled
+        return stats
+
+
+intent_router = IntentRouter()
+
+
+# --- Examples ---
+
+EXAMPLE_TITLES = [(1, "Up"), (2, "It"), (3, "Us"), (4, "Her"), (5, "Dune: Part Two"), (6, "Inception")]
+
+# (question, expected intent name or None for the LLM)
+EXAMPLES: List[Tuple[str, Optional[str]]] = [
+    ("showtimes for Dune: Part Two", "movie_showtimes"),
+    ("when is inception playing tomorrow", "movie_showtimes"),
+    ("Inception showtimes", "movie_showtimes"),
+    ("showtimes for up", "movie_showtimes"),
+    ('is "It" showing tonight', "movie_showtimes"),
+    ("when is Her playing", "movie_showtimes"),
+    ("what's playing tonight", "now_showing"),
+    ("theaters near me", "theaters_nearby"),
+    ("any good comedies", "genre_movies"),
+    ("something scary tomorrow", "genre_movies"),
+    ("how do I book tickets", "booking_help"),
+    ("hello", "greeting"),
+    ("what movies are playing tomorrow", "now_showing"),
+    ("what's on tonight", "now_showing"),
+    # Short titles used as ordinary words
+    ("when should I show up", None),
+    ("what time is it", None),
+    ("when can I take her to a show", None),
+    ("what time works for us", None),
+    ("what do you think about the ending of inception", None),
+    # Open-ended questions about movies, not a listing
+    ("which films did christopher nolan direct", None),
+    ("which movies won an oscar", None),
+    ("what movies are similar to inception", None),
+    ("what is on my booking", None),
+    ("what is on tv", None),
+]
+
+
+def check_examples(titles: List[Tuple[int, str]] = EXAMPLE_TITLES) -> List[str]:
+    """EXAMPLES the classifier gets wrong, as printable lines"""
+    failures = []
+    for question, expected in EXAMPLES:
+        intent = classify(question, titles)
+        got = intent.name if intent else None
+        if got != expected:
+            failures.append(f"{question!r}: expected {expected}, got {got}")
+    return failures
+
+
+def fixed_reply(text: str) -> Callable[[str], AsyncIterator[str]]:
+    """Adapter so a templated answer can go through run_pipeline(generate=...)"""
+    async def generate(_: str) -> AsyncIterator[str]:
+        yield text
+    return generate
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["check"]:
+        raise SystemExit("usage: python -m app.services.intents check")
+    failures = check_examples()
+    for failure in failures:
+        print(f"[INTENT] {failure}")
+    print(f"[INTENT] {len(EXAMPLES) - len(failures)}/{len(EXAMPLES)} examples classified as expected")
+    raise SystemExit(1 if failures else 0)
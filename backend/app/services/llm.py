@@ -2,8 +2,9 @@
 LLM Service with Groq Llama
 Adapted from Voice_Platform for Movie Ticket System
 """
-import httpx
 from fastapi import HTTPException
+from typing import AsyncIterator
+import json
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -14,6 +15,10 @@ if env_local.exists():
     load_dotenv(env_local)
 load_dotenv()  # Load .env as fallback
 
+from app.services.http_client import http_clients
+from app.services.llm_cache import llm_cache
+from app.services.catalog_digest import catalog_digest
+
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 
 # System prompt for movie ticket assistant
@@ -34,29 +39,50 @@ Guidelines:
 Available movies include action, comedy, drama, thriller, and romance genres.
 """
 
+CATALOG_PROMPT = """
+Use this catalogue for movies, showtimes and theaters. If something the user asks about is not listed, say you don't see it rather than guessing.
+{digest}
+"""
+
+
+def system_prompt() -> str:
+    """Static assistant prompt plus the latest catalogue digest (bounded size)"""
+    digest = catalog_digest.text
+    if not digest:
+        return MOVIE_ASSISTANT_PROMPT
+    return MOVIE_ASSISTANT_PROMPT + CATALOG_PROMPT.format(digest=digest)
+
+
+def _chat_payload(user_message: str, model: str, stream: bool = False) -> dict:
+    return {
+        "model": model,
+        "messages": [
+            {"role": "system", "content": system_prompt()},
+            {"role": "user", "content": user_message}
+        ],
+        "max_tokens": 200,
+        "temperature": 0.7,
+        "stream": stream
+    }
+
+
+def _groq_headers() -> dict:
+    return {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
 
 async def generate_response_groq(user_message: str, model: str = "llama-3.3-70b-versatile") -> str:
     """Groq LLM - Llama 3.3 70B"""
     if not GROQ_API_KEY:
         raise Exception("GROQ_API_KEY not configured")
     
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        response = await client.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {GROQ_API_KEY}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": MOVIE_ASSISTANT_PROMPT},
-                    {"role": "user", "content": user_message}
-                ],
-                "max_tokens": 200,
-                "temperature": 0.7
-            }
-        )
+    response = await http_clients.request(
+        "groq", "POST", "/chat/completions",
+        headers=_groq_headers(),
+        json=_chat_payload(user_message, model)
+    )
     
     if response.status_code != 200:
         raise Exception(f"Groq API error: {response.text}")
@@ -64,16 +90,73 @@ async def generate_response_groq(user_message: str, model: str = "llama-3.3-70b-
     return response.json()["choices"][0]["message"]["content"]
 
 
+async def stream_response_groq(user_message: str, model: str = "llama-3.3-70b-versatile") -> AsyncIterator[str]:
+    """Groq LLM - Llama 3.3 70B, yielding content deltas from the SSE stream"""
+    if not GROQ_API_KEY:
+        raise Exception("GROQ_API_KEY not configured")
+    
+    async with http_clients.stream(
+        "groq", "POST", "/chat/completions",
+        headers=_groq_headers(),
+        json=_chat_payload(user_message, model, stream=True)
+    ) as response:
+        if response.status_code != 200:
+            await response.aread()
+            raise Exception(f"Groq API error: {response.text}")
+        
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
 async def generate_response(user_message: str) -> str:
     """
     Generate LLM response for movie assistant.
+    Repeated questions are answered from llm_cache without calling Groq.
     """
+    cached = llm_cache.get(user_message)
+    if cached is not None:
+        print(f"[LLM] Cache hit for: {user_message[:50]}...")
+        return cached
+    
     print(f"[LLM] Generating response for: {user_message[:50]}...")
+    generation = llm_cache.generation
     
     try:
         response = await generate_response_groq(user_message)
         print(f"[LLM] Response: {response[:50]}...")
-        return response
     except Exception as e:
         print(f"[LLM] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"LLM generation failed: {str(e)}")
+    
+    llm_cache.put(user_message, response, generation)
+    return response
+
+
+async def stream_response(user_message: str) -> AsyncIterator[str]:
+    """
+    Stream the LLM response token by token (used by the pipelined voice chat).
+    A cached answer is yielded as a single chunk. Errors propagate to the
+    caller, which may already be streaming.
+    """
+    cached = llm_cache.get(user_message)
+    if cached is not None:
+        print(f"[LLM] Cache hit for: {user_message[:50]}...")
+        yield cached
+        return
+    
+    print(f"[LLM] Streaming response for: {user_message[:50]}...")
+    generation = llm_cache.generation
+    tokens = []
+    
+    async for token in stream_response_groq(user_message):
+        tokens.append(token)
+        yield token
+    # Only reached when the stream completed; abandoned streams aren't cached
+    llm_cache.put(user_message, "".join(tokens).strip(), generation)
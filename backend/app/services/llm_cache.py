@@ -0,0 +1,173 @@
+"""
+Response cache for the movie assistant LLM
+Most assistant questions are the same handful ("what's playing", "how do I
+book"), so answers are cached by normalized question text (exact tier) and,
+when LLM_CACHE_SEMANTIC=true, matched by cosine similarity over a small
+in-process vector index (semantic tier).
+The default embedding is a hashed bag of words and character trigrams: no model
+download, good at catching rephrasings and typos, blind to true synonyms. Pass
+another `embed` function to ResponseCache for a real embedding model.
+Entries expire after LLM_CACHE_TTL_SECONDS, are evicted LRU beyond
+LLM_CACHE_MAX_ENTRIES, and are all dropped when the movie catalogue changes.
+"""
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib
+import math
+import os
+import re
+import threading
+import time
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "600"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1000"))
+LLM_CACHE_SEMANTIC = os.getenv("LLM_CACHE_SEMANTIC", "false").lower() == "true"
+# Cosine similarity needed for a semantic hit; lower values risk wrong answers
+LLM_CACHE_SIMILARITY = float(os.getenv("LLM_CACHE_SIMILARITY", "0.9"))
+EMBEDDING_DIMENSIONS = 512
+
+Vector = Dict[int, float]
+
+_NON_WORD = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """Case, punctuation and whitespace-insensitive form of a question"""
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+
+def hashed_embedding(text: str) -> Vector:
+    """Sparse unit vector of hashed words and character trigrams"""
+    features: List[str] = []
+    for word in text.split():
+        features.append("w:" + word)
+        padded = f" {word} "
+        features.extend("c:" + padded[i:i + 3] for i in range(len(padded) - 2))
+
+    vector: Vector = {}
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode(), digest_size=4).digest()
+        index = int.from_bytes(digest, "little") % EMBEDDING_DIMENSIONS
+        # Whole words count more than the trigrams inside them
+        vector[index] = vector.get(index, 0.0) + (2.0 if feature[0] == "w" else 1.0)
+
+    norm = math.sqrt(sum(v * v for v in vector.values()))
+    return {i: v / norm for i, v in vector.items()} if norm else {}
+
+
+def cosine(a: Vector, b: Vector) -> float:
+    if len(a) > len(b):
+        a, b = b, a
+    return sum(v * b.get(i, 0.0) for i, v in a.items())
+
+
+class ResponseCache:
+    """Exact + optional semantic TTL LRU of question -> answer."""
+
+    def __init__(
+        self,
+        enabled: bool = LLM_CACHE_ENABLED,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        semantic: bool = LLM_CACHE_SEMANTIC,
+        similarity: float = LLM_CACHE_SIMILARITY,
+        embed: Callable[[str], Vector] = hashed_embedding
+    ):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.semantic = semantic
+        self.similarity = similarity
+        self.embed = embed
+        # normalized question -> (stored_at, answer, embedding or None)
+        self._entries: "OrderedDict[str, Tuple[float, str, Optional[Vector]]]" = OrderedDict()
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "invalidations": 0,
+        }
+
+    @property
+    def generation(self) -> int:
+        """Bumped on invalidate(); pass it back to put() to drop stale answers"""
+        return self._generation
+
+    def get(self, question: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        key = normalize(question)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.ttl_seconds:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            if not self.semantic:
+                self._stats["misses"] += 1
+                return None
+            candidates = list(self._entries.items())
+
+        # Brute-force scan outside the lock; the index is small by construction
+        query = self.embed(key)
+        best_key, best_score = None, self.similarity
+        for other_key, (stored_at, _, vector) in candidates:
+            if vector is None or now - stored_at > self.ttl_seconds:
+                continue
+            score = cosine(query, vector)
+            if score >= best_score:
+                best_key, best_score = other_key, score
+
+        with self._lock:
+            entry = self._entries.get(best_key) if best_key else None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(best_key)
+            self._stats["semantic_hits"] += 1
+            return entry[1]
+
+    def put(self, question: str, answer: str, generation: Optional[int] = None) -> None:
+        if not self.enabled or not answer:
+            return
+        key = normalize(question)
+        vector = self.embed(key) if self.semantic else None
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return  # The catalogue changed while this answer was generated
+            self._entries[key] = (time.monotonic(), answer, vector)
+            self._entries.move_to_end(key)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate(self) -> None:
+        """Drop every answer (the catalogue they may describe has changed)"""
+        with self._lock:
+            self._entries.clear()
+            self._generation += 1
+            self._stats["invalidations"] += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+        lookups = stats["exact_hits"] + stats["semantic_hits"] + stats["misses"]
+        hits = stats["exact_hits"] + stats["semantic_hits"]
+        stats["hit_rate"] = round(hits / lookups, 3) if lookups else 0.0
+        stats["enabled"] = self.enabled
+        stats["semantic"] = self.semantic
+        return stats
+
+
+llm_cache = ResponseCache()
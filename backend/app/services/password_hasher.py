@@ -0,0 +1,136 @@
+"""
+Password hashing off the event loop
+bcrypt is deliberately slow (tens to hundreds of ms per call), so register and
+login hash and verify on a small dedicated thread pool instead of the event
+loop. bcrypt releases the GIL, so the workers run in parallel on separate cores.
+The pool is bounded: once PASSWORD_HASH_MAX_QUEUE calls are waiting, new ones
+are turned away with PasswordHasherBusy (503) rather than queueing up behind a
+login burst.
+Raising BCRYPT_ROUNDS (or lowering it) takes effect for existing users the next
+time they log in: verify_and_update() returns a rehashed password to store.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+import asyncio
+import os
+import time
+
+from passlib.context import CryptContext
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Calls allowed to wait for a worker before new ones are rejected
+PASSWORD_HASH_MAX_QUEUE = int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "256"))
+
+# Pinning min/max to the target makes hashes with any other work factor "need update"
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS
+)
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when PASSWORD_HASH_MAX_QUEUE calls are already waiting."""
+
+
+class PasswordHasher:
+    """Bounded thread pool for bcrypt hash/verify with queue-depth metrics."""
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS,
+                 max_queue: int = PASSWORD_HASH_MAX_QUEUE):
+        self.workers = max(1, workers)
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending = 0
+        self._stats = {
+            "hashed": 0,
+            "verified": 0,
+            "rehashed": 0,
+            "rejected": 0,
+            "max_queue_depth": 0,
+            "max_wait_seconds": 0.0,
+            "wait_seconds_sum": 0.0,
+            "work_seconds_sum": 0.0,
+        }
+
+    # --- Public API ---
+
+    async def hash(self, password: str) -> str:
+        password_hash = await self._run(pwd_context.hash, password)
+        self._stats["hashed"] += 1
+        return password_hash
+
+    async def verify_and_update(self, password: str, password_hash: str) -> Tuple[bool, Optional[str]]:
+        """
+        (matches, new_hash). new_hash is set when the stored hash uses an
+        outdated work factor and should replace it.
+        """
+        verified, new_hash = await self._run(pwd_context.verify_and_update, password, password_hash)
+        self._stats["verified"] += 1
+        if verified and new_hash:
+            self._stats["rehashed"] += 1
+        return verified, new_hash
+
+    # --- Pool ---
+
+    @property
+    def queue_depth(self) -> int:
+        """Calls waiting for a free worker"""
+        return max(0, self._pending - self.workers)
+
+    async def _run(self, fn, *args):
+        # Only the event loop thread touches the counters, so they need no lock
+        if self.queue_depth >= self.max_queue:
+            self._stats["rejected"] += 1
+            raise PasswordHasherBusy()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+
+        self._pending += 1
+        stats = self._stats
+        stats["max_queue_depth"] = max(stats["max_queue_depth"], self.queue_depth)
+        enqueued_at = time.perf_counter()
+
+        def work():
+            started = time.perf_counter()
+            return fn(*args), started, time.perf_counter()
+
+        try:
+            result, started, finished = await asyncio.get_running_loop().run_in_executor(
+                self._executor, work
+            )
+        finally:
+            self._pending -= 1
+        wait = started - enqueued_at
+        stats["wait_seconds_sum"] += wait
+        stats["max_wait_seconds"] = round(max(stats["max_wait_seconds"], wait), 4)
+        stats["work_seconds_sum"] += finished - started
+        return result
+
+    # --- Lifecycle ---
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    # --- Metrics ---
+
+    def metrics(self) -> Dict:
+        stats = dict(self._stats)
+        calls = stats["hashed"] + stats["verified"]
+        wait_sum = stats.pop("wait_seconds_sum")
+        work_sum = stats.pop("work_seconds_sum")
+        stats["avg_wait_seconds"] = round(wait_sum / calls, 4) if calls else 0.0
+        stats["avg_work_seconds"] = round(work_sum / calls, 4) if calls else 0.0
+        stats["workers"] = self.workers
+        stats["bcrypt_rounds"] = BCRYPT_ROUNDS
+        stats["in_flight"] = self._pending
+        stats["queued"] = self.queue_depth
+        return stats
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,77 @@
+"""
+Authenticated principal cache
+get_current_user runs on nearly every request; this keeps the user row of
+recently seen tokens for a short TTL so most requests skip the users lookup.
+Entries are dropped whenever the user's row changes in this process. Other
+worker processes only see changes once the TTL has elapsed.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+import os
+import threading
+import time
+
+from sqlalchemy import inspect
+
+from app.models.user import User
+
+PRINCIPAL_CACHE_TTL_SECONDS = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+PRINCIPAL_CACHE_MAX_ENTRIES = int(os.getenv("PRINCIPAL_CACHE_MAX_ENTRIES", "10000"))
+
+
+class PrincipalCache:
+    """TTL LRU of user column values keyed by user id."""
+
+    def __init__(self, ttl_seconds: float = PRINCIPAL_CACHE_TTL_SECONDS,
+                 max_entries: int = PRINCIPAL_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._users: "OrderedDict[int, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def get(self, user_id: Optional[int]) -> Optional[User]:
+        """
+        A detached copy of the cached user, or None on a miss.
+        Each caller gets its own instance, so request code can't leak changes
+        into the cache; to modify the user, load it in a session first.
+        """
+        if user_id is None:
+            return None
+        with self._lock:
+            cached = self._users.get(user_id)
+            if cached is None or time.monotonic() - cached[0] > self.ttl_seconds:
+                if cached is not None:
+                    del self._users[user_id]
+                self._stats["misses"] += 1
+                return None
+            self._users.move_to_end(user_id)
+            self._stats["hits"] += 1
+            values = cached[1]
+        return User(**values)
+
+    def put(self, user: User) -> None:
+        values = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+        with self._lock:
+            self._users[user.id] = (time.monotonic(), values)
+            self._users.move_to_end(user.id)
+            while len(self._users) > self.max_entries:
+                self._users.popitem(last=False)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """Drop one user (or everyone) after their row changed."""
+        with self._lock:
+            self._stats["invalidations"] += 1
+            if user_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(user_id, None)
+
+    def metrics(self) -> Dict[str, int]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._users)
+        return stats
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,419 @@
+"""
+In-memory seat availability index
+One bitset per showtime (bit set = seat taken), seat ordinals from the screen layout.
+The database stays authoritative: bookings claim seats in the showtime_seats
+inventory, the index only serves reads.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+import os
+import threading
+import time
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session
+
+from app.models.booking import ShowtimeSeat, SeatState
+from app.models.movie import Showtime
+from app.models.theater import Seat
+
+# Entries older than this are rebuilt from the DB on the next read, which bounds
+# drift when several worker processes write bookings for the same showtime.
+SEAT_INDEX_TTL_SECONDS = float(os.getenv("SEAT_INDEX_TTL_SECONDS", "30"))
+SEAT_INDEX_MAX_SHOWTIMES = int(os.getenv("SEAT_INDEX_MAX_SHOWTIMES", "5000"))
+
+# Best-available scoring: preferred row as a fraction from the front row, and how
+# many seats of sideways offset one row of distance from it is worth
+BEST_ROW_POSITION = 0.6
+ROW_DISTANCE_WEIGHT = 2.0
+
+
+def _is_expired(expires_at: Optional[datetime], now: datetime) -> bool:
+    """Compare a naive (local) or aware expiry against an aware 'now'."""
+    return expires_at is not None and expires_at.astimezone() < now
+
+
+class ScreenLayout:
+    """
+    Seats of a screen in (row, number) order; the position is the seat ordinal.
+    Also keeps the row runs used by the best-available allocator: maximal
+    stretches of consecutively numbered seats of one type within a row.
+    """
+
+    def __init__(self, seats: List[Seat]):
+        ordered = sorted(seats, key=lambda s: (s.row, s.number))
+        self.seats: List[Tuple[int, str, int, object, Decimal]] = [
+            (s.id, s.row, s.number, s.seat_type, Decimal(str(s.base_price)))
+            for s in ordered
+        ]
+        self.ordinals: Dict[int, int] = {s.id: i for i, s in enumerate(ordered)}
+        self._build_runs()
+
+    def _build_runs(self) -> None:
+        # seat_type -> [(row_index, first_ordinal, length)]
+        self.runs: Dict[object, List[Tuple[int, int, int]]] = {}
+        # row_index -> ordinal at the middle of the row (the screen's centre line)
+        self.row_centers: Dict[int, float] = {}
+        # row_index -> (first ordinal, end ordinal) and ordinal -> row_index
+        self.row_bounds: Dict[int, Tuple[int, int]] = {}
+        self.row_of: List[int] = []
+        row_index, row_first, run_start = -1, 0, 0
+        for ordinal, (_, row, number, seat_type, _) in enumerate(self.seats):
+            previous = self.seats[ordinal - 1] if ordinal else None
+            new_row = previous is None or previous[1] != row
+            if previous is not None and (
+                new_row or previous[2] + 1 != number or previous[3] != seat_type
+            ):
+                self._add_run(row_index, run_start, ordinal)
+                run_start = ordinal
+            if new_row:
+                row_index, row_first = row_index + 1, ordinal
+            self.row_centers[row_index] = (row_first + ordinal) / 2
+            self.row_bounds[row_index] = (row_first, ordinal + 1)
+            self.row_of.append(row_index)
+        if self.seats:
+            self._add_run(row_index, run_start, len(self.seats))
+        self.row_count = row_index + 1
+
+    def _add_run(self, row_index: int, start: int, end: int) -> None:
+        seat_type = self.seats[start][3]
+        self.runs.setdefault(seat_type, []).append((row_index, start, end - start))
+
+    def __len__(self) -> int:
+        return len(self.seats)
+
+
+class ShowtimeAvailability:
+    """Bitset of taken seats for one showtime plus the bookings holding them."""
+
+    def __init__(self, showtime_id: int, screen_id: int, layout: ScreenLayout,
+                 price_multiplier: Decimal):
+        self.showtime_id = showtime_id
+        self.screen_id = screen_id
+        self.layout = layout
+        self.price_multiplier = Decimal(str(price_multiplier))
+        self.bits = bytearray((len(layout) + 7) // 8)
+        # booking_id -> (ordinals, expires_at or None once confirmed)
+        self.holders: Dict[int, Tuple[List[int], Optional[datetime]]] = {}
+        self.built_at = time.monotonic()
+
+    def is_taken(self, ordinal: int) -> bool:
+        return bool(self.bits[ordinal >> 3] & (1 << (ordinal & 7)))
+
+    def hold(self, booking_id: int, ordinals: List[int], expires_at: Optional[datetime]) -> None:
+        for i in ordinals:
+            self.bits[i >> 3] |= 1 << (i & 7)
+        self.holders[booking_id] = (ordinals, expires_at)
+
+    def release(self, booking_id: int) -> None:
+        ordinals, _ = self.holders.pop(booking_id, ([], None))
+        for i in ordinals:
+            self.bits[i >> 3] &= ~(1 << (i & 7)) & 0xFF
+
+    def sweep(self, now: datetime) -> None:
+        """Release pending holds whose payment window has passed."""
+        expired = [
+            booking_id for booking_id, (_, expires_at) in self.holders.items()
+            if _is_expired(expires_at, now)
+        ]
+        for booking_id in expired:
+            self.release(booking_id)
+
+    def taken_count(self) -> int:
+        return int.from_bytes(self.bits, "little").bit_count()
+
+    def nearest_free(self, ordinal: int, exclude: Set[int]) -> Optional[int]:
+        """
+        Closest free seat of the same type in the same or an adjacent row,
+        preferring the same row, then the smallest difference in seat number.
+        """
+        layout = self.layout
+        _, _, number, seat_type, _ = layout.seats[ordinal]
+        row_index = layout.row_of[ordinal]
+        best, best_key = None, None
+        for candidate_row in (row_index, row_index - 1, row_index + 1):
+            if candidate_row not in layout.row_bounds:
+                continue
+            first, end = layout.row_bounds[candidate_row]
+            for candidate in range(first, end):
+                seat = layout.seats[candidate]
+                if seat[3] != seat_type or candidate in exclude or self.is_taken(candidate):
+                    continue
+                key = (candidate_row != row_index, abs(seat[2] - number))
+                if best_key is None or key < best_key:
+                    best, best_key = candidate, key
+        return best
+
+    def best_blocks(self, quantity: int, seat_type: Optional[object] = None,
+                    exclude: Iterable[int] = (), limit: int = 3) -> List[List[int]]:
+        """
+        Up to `limit` non-overlapping blocks of `quantity` adjacent free seats,
+        best first. Blocks are scored by distance from the centre of the row and
+        from the preferred row (a little behind the middle of the auditorium).
+        Returns seat ids; `exclude` holds ordinals already known to be lost.
+        """
+        layout = self.layout
+        excluded = set(exclude)
+        preferred_row = (layout.row_count - 1) * BEST_ROW_POSITION
+        run_groups = layout.runs.values() if seat_type is None else [layout.runs.get(seat_type, [])]
+
+        candidates: List[Tuple[float, int]] = []
+        for runs in run_groups:
+            for row_index, start, length in runs:
+                if length < quantity:
+                    continue
+                row_penalty = abs(row_index - preferred_row) * ROW_DISTANCE_WEIGHT
+                center = layout.row_centers[row_index]
+                free_from = start
+                for ordinal in range(start, start + length + 1):
+                    if ordinal < start + length and not self.is_taken(ordinal) and ordinal not in excluded:
+                        continue
+                    # [free_from, ordinal) is a free stretch; score every window in it
+                    for first in range(free_from, ordinal - quantity + 1):
+                        offset = abs(first + (quantity - 1) / 2 - center)
+                        candidates.append((row_penalty + offset, first))
+                    free_from = ordinal + 1
+
+        blocks: List[List[int]] = []
+        used: Set[int] = set()
+        for _, first in sorted(candidates):
+            ordinals = range(first, first + quantity)
+            if used.intersection(ordinals):
+                continue
+            used.update(ordinals)
+            blocks.append([layout.seats[i][0] for i in ordinals])
+            if len(blocks) >= limit:
+                break
+        return blocks
+
+
+class SeatAvailabilityIndex:
+    """Process-local LRU of ShowtimeAvailability entries and screen layouts."""
+
+    def __init__(self, ttl_seconds: float = SEAT_INDEX_TTL_SECONDS,
+                 max_showtimes: int = SEAT_INDEX_MAX_SHOWTIMES):
+        self.ttl_seconds = ttl_seconds
+        self.max_showtimes = max_showtimes
+        self._showtimes: "OrderedDict[int, ShowtimeAvailability]" = OrderedDict()
+        self._layouts: Dict[int, ScreenLayout] = {}
+        self._lock = threading.Lock()
+        # Bumped on every incremental update; lets rebuild() detect races
+        self._writes = 0
+
+    # --- Reads ---
+
+    def get(self, db: Session, showtime_id: int) -> Optional[ShowtimeAvailability]:
+        """Return the entry for a showtime, rebuilding it from the DB when cold or stale."""
+        with self._lock:
+            entry = self._showtimes.get(showtime_id)
+            fresh = entry is not None and time.monotonic() - entry.built_at <= self.ttl_seconds
+        if not fresh:
+            entry = self.rebuild(db, showtime_id)
+            if entry is None:
+                return None
+        with self._lock:
+            if showtime_id in self._showtimes:
+                self._showtimes.move_to_end(showtime_id)
+            entry.sweep(datetime.now().astimezone())
+            return entry
+
+    def best_blocks(self, db: Session, showtime_id: int, quantity: int,
+                    seat_type: Optional[object] = None, exclude_seat_ids: Iterable[int] = (),
+                    limit: int = 3) -> List[List[int]]:
+        """Best free blocks of adjacent seats for a showtime (see ShowtimeAvailability.best_blocks)."""
+        entry = self.get(db, showtime_id)
+        if entry is None:
+            return []
+        with self._lock:
+            exclude = [entry.layout.ordinals[s] for s in exclude_seat_ids if s in entry.layout.ordinals]
+            return entry.best_blocks(quantity, seat_type, exclude, limit)
+
+    def unavailable_seats(self, db: Session, showtime_id: int, seat_ids: Iterable[int]) -> Set[int]:
+        """Those of seat_ids that are taken or not part of the showtime's screen."""
+        entry = self.get(db, showtime_id)
+        if entry is None:
+            return set(seat_ids)
+        with self._lock:
+            ordinals = entry.layout.ordinals
+            return {s for s in seat_ids if s not in ordinals or entry.is_taken(ordinals[s])}
+
+    def suggest_alternatives(self, db: Session, showtime_id: int,
+                             seat_ids: List[int]) -> Tuple[List[int], List[int]]:
+        """
+        After a failed booking: (requested seats that are taken, free replacements).
+        Each taken seat gets at most one replacement (see nearest_free); requested
+        seats that are still free are kept out of the suggestions.
+        If the index shows no conflict it is stale, so it is rebuilt once first;
+        not when a requested seat isn't on the screen, since that failure has no
+        seat conflict to find.
+        """
+        for attempt in range(2):
+            entry = self.get(db, showtime_id) if attempt == 0 else self.rebuild(db, showtime_id)
+            if entry is None:
+                return [], []
+            with self._lock:
+                ordinals = entry.layout.ordinals
+                requested = {ordinals[s] for s in seat_ids if s in ordinals}
+                conflicts = [s for s in seat_ids if s in ordinals and entry.is_taken(ordinals[s])]
+                if not conflicts:
+                    if any(s not in ordinals for s in seat_ids):
+                        return [], []
+                    continue
+                suggestions, used = [], set(requested)
+                for seat_id in conflicts:
+                    replacement = entry.nearest_free(ordinals[seat_id], used)
+                    if replacement is not None:
+                        used.add(replacement)
+                        suggestions.append(entry.layout.seats[replacement][0])
+                return conflicts, suggestions
+        return [], []
+
+    def peek_counts(self, showtime_ids: Iterable[int]) -> Dict[int, Tuple[int, int]]:
+        """(available, total) for showtimes already warm in the index; no DB access."""
+        now = datetime.now().astimezone()
+        counts = {}
+        with self._lock:
+            for showtime_id in showtime_ids:
+                entry = self._showtimes.get(showtime_id)
+                if entry is None or time.monotonic() - entry.built_at > self.ttl_seconds:
+                    continue
+                entry.sweep(now)
+                total = len(entry.layout)
+                counts[showtime_id] = (total - entry.taken_count(), total)
+        return counts
+
+    # --- Rebuild and consistency ---
+
+    def rebuild(self, db: Session, showtime_id: int) -> Optional[ShowtimeAvailability]:
+        """
+        Build the entry for a showtime from the DB (cold start or after drift).
+        DB reads happen outside the lock: under AsyncSession.run_sync they yield
+        to the event loop, and other requests on the same thread must not block.
+        """
+        with self._lock:
+            writes_before = self._writes
+
+        showtime = db.query(Showtime).filter(Showtime.id == showtime_id).first()
+        if not showtime:
+            self.invalidate(showtime_id)
+            return None
+
+        layout = self._layouts.get(showtime.screen_id)
+        if layout is None:
+            seats = db.query(Seat).filter(Seat.screen_id == showtime.screen_id).all()
+            layout = ScreenLayout(seats)
+
+        rows = db.query(
+            ShowtimeSeat.booking_id, ShowtimeSeat.state, ShowtimeSeat.held_until, ShowtimeSeat.seat_id
+        ).filter(
+            ShowtimeSeat.showtime_id == showtime_id,
+            ShowtimeSeat.state != SeatState.FREE
+        ).all()
+
+        entry = ShowtimeAvailability(
+            showtime_id, showtime.screen_id, layout,
+            showtime.price_multiplier or Decimal("1.00")
+        )
+        holders: Dict[int, Tuple[List[int], Optional[datetime]]] = {}
+        for booking_id, state, held_until, seat_id in rows:
+            ordinal = layout.ordinals.get(seat_id)
+            if ordinal is None:
+                continue
+            expiry = held_until if state == SeatState.HELD else None
+            holders.setdefault(booking_id, ([], expiry))[0].append(ordinal)
+        for booking_id, (ordinals, expiry) in holders.items():
+            entry.hold(booking_id, ordinals, expiry)
+
+        with self._lock:
+            if self._writes != writes_before:
+                # A booking changed while we were reading; serve this build once
+                # and rebuild on the next read instead of trusting it for a full TTL.
+                entry.built_at = float("-inf")
+            self._layouts.setdefault(showtime.screen_id, layout)
+            self._showtimes[showtime_id] = entry
+            self._showtimes.move_to_end(showtime_id)
+            while len(self._showtimes) > self.max_showtimes:
+                self._showtimes.popitem(last=False)
+            return entry
+
+    def verify(self, db: Session, showtime_id: int, repair: bool = True) -> Set[int]:
+        """
+        Compare the index with the DB for one showtime.
+        Returns the seat ids whose availability differs; rebuilds the entry if any do.
+        """
+        booked_seat_ids = db.query(ShowtimeSeat.seat_id).filter(
+            ShowtimeSeat.showtime_id == showtime_id,
+            ShowtimeSeat.state != SeatState.FREE,
+            ~and_(
+                ShowtimeSeat.state == SeatState.HELD,
+                ShowtimeSeat.held_until < datetime.now()
+            )
+        ).all()
+        booked_ids = {seat_id for (seat_id,) in booked_seat_ids}
+
+        with self._lock:
+            entry = self._showtimes.get(showtime_id)
+            if entry is None:
+                return set()
+            entry.sweep(datetime.now().astimezone())
+            mismatched = {
+                seat_id for seat_id, ordinal in entry.layout.ordinals.items()
+                if entry.is_taken(ordinal) != (seat_id in booked_ids)
+            }
+        if mismatched and repair:
+            self.rebuild(db, showtime_id)
+        return mismatched
+
+    # --- Incremental updates from the booking write path ---
+
+    def mark_held(self, showtime_id: int, booking_id: int, seat_ids: List[int],
+                  expires_at: Optional[datetime]) -> None:
+        """Record seats taken by a new booking (expires_at=None for confirmed holds)."""
+        with self._lock:
+            self._writes += 1
+            entry = self._showtimes.get(showtime_id)
+            if entry is None:
+                return  # Cold showtime: the next read rebuilds from the DB
+            ordinals = [entry.layout.ordinals[s] for s in seat_ids if s in entry.layout.ordinals]
+            entry.release(booking_id)
+            entry.hold(booking_id, ordinals, expires_at)
+
+    def mark_confirmed(self, showtime_id: int, booking_id: int) -> None:
+        """Drop the payment deadline of a pending hold."""
+        with self._lock:
+            self._writes += 1
+            entry = self._showtimes.get(showtime_id)
+            if entry is None or booking_id not in entry.holders:
+                return
+            ordinals, _ = entry.holders[booking_id]
+            entry.holders[booking_id] = (ordinals, None)
+
+    def mark_released(self, showtime_id: int, booking_id: int) -> None:
+        """Free the seats of a cancelled or expired booking."""
+        with self._lock:
+            self._writes += 1
+            entry = self._showtimes.get(showtime_id)
+            if entry is not None:
+                entry.release(booking_id)
+
+    def invalidate(self, showtime_id: Optional[int] = None) -> None:
+        """Drop one showtime (or everything) so it is rebuilt on the next read."""
+        with self._lock:
+            if showtime_id is None:
+                self._showtimes.clear()
+                self._layouts.clear()
+            else:
+                self._showtimes.pop(showtime_id, None)
+
+    def invalidate_screen(self, screen_id: int) -> None:
+        """Drop a screen layout and every showtime built on it (seat map changed)."""
+        with self._lock:
+            self._layouts.pop(screen_id, None)
+            stale = [sid for sid, entry in self._showtimes.items() if entry.screen_id == screen_id]
+            for showtime_id in stale:
+                self._showtimes.pop(showtime_id, None)
+
+
+seat_index = SeatAvailabilityIndex()
@@ -2,10 +2,11 @@
 Speech-to-Text Service with Groq Whisper
 Adapted from Voice_Platform for Movie Ticket System
 """
-import httpx
 from fastapi import UploadFile, HTTPException
 import os
 
+from app.services.http_client import http_clients
+
 GROQ_API_KEY = os.getenv("GROQ_API_KEY", "")
 
 
@@ -14,13 +15,12 @@ async def transcribe_groq_whisper(audio_bytes: bytes, filename: str, mime_type:
     if not GROQ_API_KEY:
         raise Exception("GROQ_API_KEY not configured")
     
-    async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            "https://api.groq.com/openai/v1/audio/transcriptions",
-            headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
-            files={"file": (filename, audio_bytes, mime_type)},
-            data={"model": "whisper-large-v3"}
-        )
+    response = await http_clients.request(
+        "groq", "POST", "/audio/transcriptions",
+        headers={"Authorization": f"Bearer {GROQ_API_KEY}"},
+        files={"file": (filename, audio_bytes, mime_type)},
+        data={"model": "whisper-large-v3"}
+    )
     
     if response.status_code != 200:
         raise Exception(f"Groq Whisper error: {response.text}")
@@ -36,7 +36,13 @@ async def transcribe_audio(file: UploadFile) -> str:
     audio_bytes = await file.read()
     filename = file.filename or "audio.wav"
     mime_type = file.content_type or "audio/wav"
-    
+    return await transcribe_bytes(audio_bytes, filename, mime_type)
+
+
+async def transcribe_bytes(audio_bytes: bytes, filename: str = "audio.wav", mime_type: str = "audio/wav") -> str:
+    """
+    Transcribe audio already in memory (e.g. a VAD segment from the voice WebSocket).
+    """
     print(f"[STT] Received: {len(audio_bytes)} bytes")
     
     try:
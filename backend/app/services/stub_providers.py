@@ -0,0 +1,86 @@
+"""
+Offline stub STT / LLM / TTS providers for benchmarking the voice pipeline
+Drop-in replacements for transcribe_audio / transcribe_bytes, generate_response /
+stream_response and synthesize_speech / stream_tts that only sleep and return
+canned output, so throughput and tail latency can be measured without Groq or
+Edge TTS. The voice router switches to them when VOICE_PROVIDERS=stub.
+
+Delays are set with STUB_*_MS variables and scaled by a random factor in
+[1 - STUB_JITTER, 1 + STUB_JITTER] to give realistic tails. An upload that is
+UTF-8 text starting with "stub:" is "transcribed" to the rest of the text, so a
+load test can choose which questions are asked.
+"""
+from typing import AsyncIterator
+import asyncio
+import os
+import random
+
+from fastapi import UploadFile
+
+VOICE_PROVIDERS = os.getenv("VOICE_PROVIDERS", "live").lower()
+
+STUB_STT_MS = float(os.getenv("STUB_STT_MS", "300"))
+STUB_LLM_FIRST_TOKEN_MS = float(os.getenv("STUB_LLM_FIRST_TOKEN_MS", "250"))
+STUB_LLM_TOKEN_MS = float(os.getenv("STUB_LLM_TOKEN_MS", "15"))
+STUB_TTS_FIRST_CHUNK_MS = float(os.getenv("STUB_TTS_FIRST_CHUNK_MS", "150"))
+STUB_TTS_CHUNK_MS = float(os.getenv("STUB_TTS_CHUNK_MS", "20"))
+STUB_JITTER = float(os.getenv("STUB_JITTER", "0.2"))
+
+STUB_TRANSCRIPT = "Can you recommend something fun to watch this weekend with my family?"
+STUB_REPLY = (
+    "Sure! This weekend there are a few great family picks showing near you. "
+    "Most theaters have afternoon shows, which are usually less crowded. "
+    "Would you like me to help you book seats for one of them?"
+)
+STUB_PREFIX = b"stub:"
+# Roughly Edge TTS's 24 kbps MP3: ~1 KB per 12 characters of speech
+STUB_AUDIO_BYTES_PER_CHAR = 85
+STUB_AUDIO_CHUNK_BYTES = 4096
+
+
+async def _sleep(ms: float) -> None:
+    if ms > 0:
+        await asyncio.sleep(ms * random.uniform(1 - STUB_JITTER, 1 + STUB_JITTER) / 1000)
+
+
+# --- STT ---
+
+async def transcribe_bytes(audio_bytes: bytes, filename: str = "audio.wav", mime_type: str = "audio/wav") -> str:
+    await _sleep(STUB_STT_MS)
+    if audio_bytes.startswith(STUB_PREFIX):
+        return audio_bytes[len(STUB_PREFIX):].decode("utf-8", "replace").strip()
+    return STUB_TRANSCRIPT
+
+
+async def transcribe_audio(file: UploadFile) -> str:
+    return await transcribe_bytes(await file.read())
+
+
+# --- LLM ---
+
+async def stream_response(user_message: str) -> AsyncIterator[str]:
+    await _sleep(STUB_LLM_FIRST_TOKEN_MS)
+    words = STUB_REPLY.split(" ")
+    for i, word in enumerate(words):
+        if i:
+            await _sleep(STUB_LLM_TOKEN_MS)
+        yield word if i == len(words) - 1 else word + " "
+
+
+async def generate_response(user_message: str) -> str:
+    return "".join([token async for token in stream_response(user_message)])
+
+
+# --- TTS ---
+
+async def stream_tts(text: str, voice: str = "stub") -> AsyncIterator[bytes]:
+    size = max(STUB_AUDIO_CHUNK_BYTES, len(text) * STUB_AUDIO_BYTES_PER_CHAR)
+    await _sleep(STUB_TTS_FIRST_CHUNK_MS)
+    for start in range(0, size, STUB_AUDIO_CHUNK_BYTES):
+        if start:
+            await _sleep(STUB_TTS_CHUNK_MS)
+        yield b"\xff\xf3" + bytes(min(STUB_AUDIO_CHUNK_BYTES, size - start) - 2)
+
+
+async def synthesize_speech(text: str, voice: str = "stub") -> bytes:
+    return b"".join([chunk async for chunk in stream_tts(text, voice)])
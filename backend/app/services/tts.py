@@ -1,39 +1,120 @@
 """
 Text-to-Speech Service with Edge TTS (Free)
 Adapted from Voice_Platform for Movie Ticket System
+Audio is taken from Communicate.stream() as it arrives, so callers can forward
+the first MP3 chunks while synthesis is still running (stream_speech) or
+collect them in memory (synthesize_speech). Both go through audio_cache, so a
+repeated (text, voice) is served without synthesizing.
 """
+from typing import AsyncIterator, Callable
 import edge_tts
-import tempfile
-import os
 from fastapi import HTTPException
 
+from app.services.tts_cache import audio_cache
 
-async def synthesize_edge_tts(text: str, voice: str = "en-US-ChristopherNeural") -> bytes:
-    """Edge TTS (Free, High Quality)"""
+DEFAULT_VOICE = "en-US-ChristopherNeural"
+# Size of the pieces a cached clip is streamed in
+CACHED_CHUNK_BYTES = 16 * 1024
+
+# Fixed prompts the assistant speaks; pre-rendered by tts_cache.warm_up()
+CANNED_PHRASES = {
+    "greeting": "Hi! I'm your CineBook assistant. Ask me what's playing, or I can help you book tickets.",
+    "not_understood": "Sorry, I didn't catch that. Could you say it again?",
+    "error": "Sorry, something went wrong on my side. Please try again in a moment.",
+    "booking_help": "To book, pick a movie and showtime, choose your seats, and pay within ten minutes to confirm.",
+    "goodbye": "Enjoy the movie!",
+}
+
+
+async def stream_edge_tts(text: str, voice: str = DEFAULT_VOICE) -> AsyncIterator[bytes]:
+    """Edge TTS (Free, High Quality) - yields MP3 chunks as they are synthesized"""
     communicate = edge_tts.Communicate(text, voice)
-    
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".mp3") as temp_file:
-        temp_path = temp_file.name
-    
-    try:
-        await communicate.save(temp_path)
-        with open(temp_path, "rb") as f:
-            return f.read()
-    finally:
-        if os.path.exists(temp_path):
-            os.unlink(temp_path)
+    async for chunk in communicate.stream():
+        if chunk["type"] == "audio" and chunk["data"]:
+            yield chunk["data"]
+
+
+async def synthesize_edge_tts(text: str, voice: str = DEFAULT_VOICE) -> bytes:
+    """Edge TTS (Free, High Quality)"""
+    audio = bytearray()
+    async for chunk in stream_edge_tts(text, voice):
+        audio.extend(chunk)
+    return bytes(audio)
 
 
-async def synthesize_speech(text: str, voice: str = "en-US-ChristopherNeural") -> bytes:
+async def stream_tts(text: str, voice: str = DEFAULT_VOICE) -> AsyncIterator[bytes]:
+    """
+    Cache-aware chunk stream: a cached clip is replayed immediately, otherwise
+    Edge TTS output is forwarded and stored once the clip is complete.
+    """
+    cached = await audio_cache.get(text, voice)
+    if cached is not None:
+        for start in range(0, len(cached), CACHED_CHUNK_BYTES):
+            yield cached[start:start + CACHED_CHUNK_BYTES]
+        return
+
+    audio = bytearray()
+    async for chunk in stream_edge_tts(text, voice):
+        audio.extend(chunk)
+        yield chunk
+    await audio_cache.put(text, voice, bytes(audio))
+
+
+async def synthesize_speech(text: str, voice: str = DEFAULT_VOICE) -> bytes:
     """
     Synthesize speech using Edge TTS (Free).
     """
+    cached = await audio_cache.get(text, voice)
+    if cached is not None:
+        print(f"[TTS] Cache hit: {len(cached)} bytes")
+        return cached
+
     print(f"[TTS] Synthesizing {len(text)} chars with voice: {voice}")
-    
+
     try:
         audio = await synthesize_edge_tts(text, voice=voice)
         print(f"[TTS] Success: {len(audio)} bytes")
-        return audio
     except Exception as e:
         print(f"[TTS] Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"TTS failed: {str(e)}")
+
+    await audio_cache.put(text, voice, audio)
+    return audio
+
+
+async def stream_speech(text: str, voice: str = DEFAULT_VOICE,
+                        stream: Callable[..., AsyncIterator[bytes]] = stream_tts) -> AsyncIterator[bytes]:
+    """
+    Stream synthesized speech chunk by chunk (from `stream`, stream_tts by default).
+    The first chunk is fetched before this returns, so a failure to start
+    raises HTTPException (500) instead of breaking an already-started response.
+    A later failure is logged and re-raised, so the consumer sees a failed
+    (truncated) stream rather than a normal end.
+    """
+    print(f"[TTS] Streaming {len(text)} chars with voice: {voice}")
+
+    chunks = stream(text, voice=voice)
+    try:
+        first = await chunks.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=500, detail="TTS failed: no audio received")
+    except Exception as e:
+        print(f"[TTS] Error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"TTS failed: {str(e)}")
+
+    async def forward() -> AsyncIterator[bytes]:
+        sent = len(first)
+        try:
+            yield first
+            async for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+            print(f"[TTS] Streamed: {sent} bytes")
+        except Exception as e:
+            # Headers are already out; the client sees a truncated stream
+            print(f"[TTS] Error after {sent} bytes: {str(e)}")
+            raise
+        finally:
+            await chunks.aclose()
+
+    return forward()
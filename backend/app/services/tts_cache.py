@@ -0,0 +1,227 @@
+"""
+TTS audio cache
+Synthesized MP3s keyed by a hash of (voice, text), in two tiers: an in-memory
+LRU capped at TTS_CACHE_MEMORY_MB and an on-disk store capped at
+TTS_CACHE_DISK_MB that survives restarts. Greetings, error prompts and cached
+LLM answers are then served without calling Edge TTS at all.
+Disk reads and writes run in worker threads so the event loop never blocks.
+
+Warm-up (pre-render the canned phrases) runs in the background at startup when
+TTS_WARMUP=true, or by hand:
+    python -m app.services.tts_cache warm
+It renders with Edge TTS, so it is skipped when VOICE_PROVIDERS=stub (offline runs).
+"""
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+
+TTS_CACHE_MEMORY_MB = float(os.getenv("TTS_CACHE_MEMORY_MB", "32"))
+TTS_CACHE_DISK_MB = float(os.getenv("TTS_CACHE_DISK_MB", "256"))  # 0 disables the disk tier
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "cinebook-tts-cache"))
+TTS_WARMUP = os.getenv("TTS_WARMUP", "true").lower() == "true"
+
+_MB = 1024 * 1024
+
+
+class AudioCache:
+    """Byte-capped memory LRU in front of a byte-capped directory of .mp3 files."""
+
+    def __init__(self, memory_bytes: int = int(TTS_CACHE_MEMORY_MB * _MB),
+                 disk_dir: Optional[str] = TTS_CACHE_DIR,
+                 disk_bytes: int = int(TTS_CACHE_DISK_MB * _MB)):
+        self.memory_bytes = memory_bytes
+        self.disk_dir = disk_dir if disk_bytes > 0 else None
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_size = 0
+        # key -> file size, oldest first; loaded from the directory on first use
+        self._disk: Optional["OrderedDict[str, int]"] = None
+        self._disk_size = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "memory_evictions": 0,
+            "disk_evictions": 0,
+            "disk_errors": 0,
+        }
+
+    @staticmethod
+    def key(text: str, voice: str) -> str:
+        return hashlib.sha256(f"{voice}\n{text.strip()}".encode("utf-8")).hexdigest()
+
+    # --- Lookup ---
+
+    async def get(self, text: str, voice: str) -> Optional[bytes]:
+        key = self.key(text, voice)
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return audio
+
+        audio = await asyncio.to_thread(self._read_disk, key) if self.disk_dir else None
+        with self._lock:
+            if audio is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._remember(key, audio)
+        return audio
+
+    async def put(self, text: str, voice: str, audio: bytes) -> None:
+        if not audio:
+            return
+        key = self.key(text, voice)
+        with self._lock:
+            self._remember(key, audio)
+            self._stats["stores"] += 1
+        if self.disk_dir:
+            await asyncio.to_thread(self._write_disk, key, audio)
+
+    def _remember(self, key: str, audio: bytes) -> None:
+        """Insert into the memory tier (lock held)"""
+        if len(audio) > self.memory_bytes:
+            return
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_size -= len(previous)
+        self._memory[key] = audio
+        self._memory_size += len(audio)
+        while self._memory_size > self.memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_size -= len(evicted)
+            self._stats["memory_evictions"] += 1
+
+    # --- Disk tier (worker threads) ---
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.mp3")
+
+    def _load_disk_index(self) -> "OrderedDict[str, int]":
+        """Existing files, least recently used first (lock held)"""
+        if self._disk is None:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            files = []
+            for entry in os.scandir(self.disk_dir):
+                if entry.name.endswith(".mp3") and entry.is_file():
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, entry.name[:-4], stat.st_size))
+            self._disk = OrderedDict((key, size) for _, key, size in sorted(files))
+            self._disk_size = sum(self._disk.values())
+        return self._disk
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            try:
+                index = self._load_disk_index()
+            except OSError:
+                self._stats["disk_errors"] += 1
+                return None
+            if key not in index:
+                return None
+            index.move_to_end(key)
+        try:
+            with open(self._path(key), "rb") as f:
+                audio = f.read()
+            os.utime(self._path(key))  # mtime is the LRU order across restarts
+            return audio
+        except OSError:
+            with self._lock:
+                self._forget(key)
+                self._stats["disk_errors"] += 1
+            return None
+
+    def _write_disk(self, key: str, audio: bytes) -> None:
+        if len(audio) > self.disk_bytes:
+            return
+        path = self._path(key)
+        try:
+            with self._lock:
+                self._load_disk_index()
+            fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(audio)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"[TTS CACHE] Disk write failed: {str(e)}")
+            with self._lock:
+                self._stats["disk_errors"] += 1
+            return
+
+        with self._lock:
+            self._forget(key)
+            self._disk[key] = len(audio)
+            self._disk_size += len(audio)
+            evict = []
+            while self._disk_size > self.disk_bytes and len(self._disk) > 1:
+                old_key, size = self._disk.popitem(last=False)
+                self._disk_size -= size
+                evict.append(old_key)
+            self._stats["disk_evictions"] += len(evict)
+        for old_key in evict:
+            try:
+                os.unlink(self._path(old_key))
+            except OSError:
+                pass
+
+    def _forget(self, key: str) -> None:
+        """Drop a key from the disk index (lock held)"""
+        size = self._disk.pop(key, None) if self._disk is not None else None
+        if size is not None:
+            self._disk_size -= size
+
+    # --- Metrics ---
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats["memory_entries"] = len(self._memory)
+            stats["memory_bytes"] = self._memory_size
+            stats["disk_entries"] = len(self._disk) if self._disk is not None else None
+            stats["disk_bytes"] = self._disk_size if self._disk is not None else None
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = round((lookups - stats["misses"]) / lookups, 3) if lookups else 0.0
+        return stats
+
+
+audio_cache = AudioCache()
+
+
+async def warm_up(phrases: Optional[Iterable[str]] = None) -> int:
+    """Render the canned phrases that aren't cached yet; returns how many were rendered"""
+    from app.services.tts import CANNED_PHRASES, DEFAULT_VOICE, synthesize_edge_tts
+    from app.services.stub_providers import VOICE_PROVIDERS
+
+    if VOICE_PROVIDERS == "stub":
+        print("[TTS CACHE] Warm-up skipped: VOICE_PROVIDERS=stub")
+        return 0
+    rendered, failed = 0, 0
+    for text in phrases or CANNED_PHRASES.values():
+        if await audio_cache.get(text, DEFAULT_VOICE) is not None:
+            continue
+        try:
+            await audio_cache.put(text, DEFAULT_VOICE, await synthesize_edge_tts(text, DEFAULT_VOICE))
+            rendered += 1
+        except Exception as e:
+            failed += 1
+            last_error = str(e)
+    if failed:
+        print(f"[TTS CACHE] Warm-up: {failed} phrase(s) failed, last error: {last_error}")
+    print(f"[TTS CACHE] Warm-up rendered {rendered} phrase(s)")
+    return rendered
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["warm"]:
+        raise SystemExit("usage: python -m app.services.tts_cache warm")
+    asyncio.run(warm_up())
@@ -0,0 +1,143 @@
+"""
+Voice activity detection for streamed microphone audio
+Energy-based VAD over 16-bit mono PCM: frames well above an adaptive noise
+floor count as speech. SpeechSegmenter turns a stream of frames into segments
+to transcribe, cut at short pauses so STT can start before the user finishes,
+and signals end of turn after a longer silence.
+"""
+from array import array
+from typing import List, Optional, Tuple
+import io
+import math
+import os
+import sys
+import wave
+
+VAD_FRAME_MS = 20
+# Absolute floor so a silent room with near-zero noise doesn't trigger on hiss
+VAD_MIN_RMS = float(os.getenv("VAD_MIN_RMS", "300"))
+# Speech must be this many times louder than the running noise floor
+VAD_NOISE_MULTIPLIER = float(os.getenv("VAD_NOISE_MULTIPLIER", "3.0"))
+# Consecutive loud frames needed to start speech (filters clicks)
+VAD_START_FRAMES = int(os.getenv("VAD_START_FRAMES", "3"))
+VAD_PRE_ROLL_MS = int(os.getenv("VAD_PRE_ROLL_MS", "200"))
+# Silence that closes a segment (sent to STT) / ends the user's turn
+VAD_PHRASE_PAUSE_MS = int(os.getenv("VAD_PHRASE_PAUSE_MS", "300"))
+VAD_END_OF_TURN_MS = int(os.getenv("VAD_END_OF_TURN_MS", "800"))
+VAD_MAX_SEGMENT_MS = int(os.getenv("VAD_MAX_SEGMENT_MS", "10000"))
+# Shorter segments are dropped as noise
+VAD_MIN_SEGMENT_MS = int(os.getenv("VAD_MIN_SEGMENT_MS", "250"))
+
+# Events returned by SpeechSegmenter.feed()
+SPEECH_START = "speech_start"
+SEGMENT = "segment"
+END_OF_TURN = "end_of_turn"
+
+Event = Tuple[str, Optional[bytes]]
+
+
+def frame_rms(frame: bytes) -> float:
+    samples = array("h", frame)
+    if sys.byteorder == "big":
+        samples.byteswap()
+    if not samples:
+        return 0.0
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int) -> bytes:
+    """Wrap raw 16-bit mono PCM in a WAV container for the STT upload"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class SpeechSegmenter:
+    """Incremental VAD state for one audio stream (16-bit little-endian mono PCM)."""
+
+    def __init__(self, sample_rate: int = 16000):
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_rate * 2 * VAD_FRAME_MS // 1000
+        self.noise_floor = VAD_MIN_RMS / VAD_NOISE_MULTIPLIER
+        self._pending = bytearray()          # bytes not yet forming a whole frame
+        self._pre_roll: List[bytes] = []     # recent quiet frames, prepended on onset
+        self._segment = bytearray()
+        self._loud_run = 0
+        self._silent_ms = 0
+        self._in_speech = False              # inside a segment
+        self._in_turn = False                # speech heard since the last end of turn
+
+    def feed(self, pcm: bytes) -> List[Event]:
+        self._pending.extend(pcm)
+        events: List[Event] = []
+        while len(self._pending) >= self.frame_bytes:
+            frame = bytes(self._pending[:self.frame_bytes])
+            del self._pending[:self.frame_bytes]
+            events.extend(self._frame(frame))
+        return events
+
+    def flush(self) -> List[Event]:
+        """Client says the turn is over (e.g. push-to-talk released)"""
+        events: List[Event] = []
+        if self._in_speech:
+            events.extend(self._close_segment())
+        if self._in_turn:
+            self._in_turn = False
+            events.append((END_OF_TURN, None))
+        self._pre_roll.clear()
+        self._loud_run = 0
+        return events
+
+    def _frame(self, frame: bytes) -> List[Event]:
+        events: List[Event] = []
+        rms = frame_rms(frame)
+        loud = rms >= max(VAD_MIN_RMS, self.noise_floor * VAD_NOISE_MULTIPLIER)
+
+        if self._in_speech:
+            self._segment.extend(frame)
+            self._silent_ms = 0 if loud else self._silent_ms + VAD_FRAME_MS
+            if self._silent_ms >= VAD_PHRASE_PAUSE_MS or len(self._segment) >= self._bytes(VAD_MAX_SEGMENT_MS):
+                events.extend(self._close_segment())
+            return events
+
+        if not loud:
+            # Track the background level only while nobody is talking
+            self.noise_floor = 0.95 * self.noise_floor + 0.05 * rms
+            self._loud_run = 0
+            self._silent_ms += VAD_FRAME_MS
+            if self._in_turn and self._silent_ms >= VAD_END_OF_TURN_MS:
+                self._in_turn = False
+                events.append((END_OF_TURN, None))
+        else:
+            self._loud_run += 1
+            if self._loud_run >= VAD_START_FRAMES:
+                if not self._in_turn:
+                    events.append((SPEECH_START, None))
+                self._in_speech = self._in_turn = True
+                self._silent_ms = 0
+                self._segment = bytearray(b"".join(self._pre_roll))
+                self._pre_roll.clear()
+
+        if not self._in_speech:
+            self._pre_roll.append(frame)
+            if len(self._pre_roll) * VAD_FRAME_MS > VAD_PRE_ROLL_MS:
+                self._pre_roll.pop(0)
+        else:
+            self._segment.extend(frame)
+        return events
+
+    def _close_segment(self) -> List[Event]:
+        segment = bytes(self._segment)
+        self._segment = bytearray()
+        self._in_speech = False
+        self._loud_run = 0
+        if len(segment) < self._bytes(VAD_MIN_SEGMENT_MS):
+            return []
+        return [(SEGMENT, segment)]
+
+    def _bytes(self, ms: int) -> int:
+        return self.sample_rate * 2 * ms // 1000
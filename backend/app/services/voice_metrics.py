@@ -0,0 +1,106 @@
+"""
+Latency histograms for the voice endpoints
+Each request's StageClock is recorded per endpoint: spans (how long STT, the
+intent lookup, the LLM and TTS each took) and stage marks (ms from the start of
+the request until e.g. the first audio chunk). Values go into fixed-bucket
+histograms, so memory stays constant however many requests are recorded;
+buckets grow geometrically by 20%, so interpolated percentiles are within
+about 10% of the true value.
+"""
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+import threading
+
+# Bucket upper bounds in ms: 1 ms * 1.2^i up to about two minutes; the last bucket is open
+BUCKET_GROWTH = 1.2
+BUCKETS_MS: Tuple[float, ...] = tuple(round(BUCKET_GROWTH ** i, 2) for i in range(65))
+
+
+class LatencyHistogram:
+    """Counts of observations per bucket plus count/sum/max."""
+
+    def __init__(self, bounds: Tuple[float, ...] = BUCKETS_MS):
+        self.bounds = bounds
+        self.counts: List[int] = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def observe(self, ms: float) -> None:
+        self.counts[bisect_left(self.bounds, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, pct: float) -> float:
+        """Linear interpolation inside the bucket holding the pct-th observation"""
+        if not self.count:
+            return 0.0
+        rank = pct / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                lower = self.bounds[i - 1] if i else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.max_ms
+                return round(min(lower + (upper - lower) * (rank - seen) / n, self.max_ms), 1)
+            seen += n
+        return round(self.max_ms, 1)
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ms, 1),
+            # Non-empty buckets only: upper bound (ms) -> observations in the bucket
+            "buckets": {
+                str(self.bounds[i]) if i < len(self.bounds) else "inf": n
+                for i, n in enumerate(self.counts) if n
+            },
+        }
+
+
+class VoiceMetrics:
+    """endpoint -> {"spans": {name: histogram}, "stages": {name: histogram}}"""
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[str, Dict[str, LatencyHistogram]]] = {}
+        self._errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, endpoint: str, kind: str, name: str, ms: float) -> None:
+        with self._lock:
+            kinds = self._histograms.setdefault(endpoint, {"spans": {}, "stages": {}})
+            histogram = kinds[kind].get(name)
+            if histogram is None:
+                histogram = kinds[kind][name] = LatencyHistogram()
+            histogram.observe(ms)
+
+    def record(self, endpoint: str, clock, error: Optional[str] = None) -> None:
+        """Record a finished request's spans, stage marks and total time"""
+        for name, ms in clock.spans.items():
+            self.observe(endpoint, "spans", name, ms)
+        for name, ms in clock.stages.items():
+            self.observe(endpoint, "stages", name, ms)
+        self.observe(endpoint, "stages", "total", clock.now_ms())
+        if error:
+            with self._lock:
+                self._errors[endpoint] = self._errors.get(endpoint, 0) + 1
+        print(f"[VOICE] {endpoint} spans={clock.spans} stages={clock.stages}"
+              + (f" error={error}" if error else ""))
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                endpoint: {
+                    "errors": self._errors.get(endpoint, 0),
+                    **{kind: {name: h.summary() for name, h in histograms.items()}
+                       for kind, histograms in kinds.items()},
+                }
+                for endpoint, kinds in self._histograms.items()
+            }
+
+
+voice_metrics = VoiceMetrics()
@@ -0,0 +1,161 @@
+"""
+Pipelined LLM -> TTS for voice chat
+Streams LLM tokens, cuts them into sentences and starts synthesizing each
+sentence while the LLM is still generating the next one, so time-to-first-audio
+is roughly STT + first sentence + first TTS chunk instead of STT + LLM + TTS.
+Audio is emitted strictly in sentence order; later sentences synthesize ahead
+(up to PIPELINE_TTS_CONCURRENCY at a time) and are buffered until their turn.
+The LLM and TTS providers are parameters, so the pipeline runs against stubs.
+"""
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Dict, Iterator, List
+import asyncio
+import os
+import re
+import time
+
+from app.services.llm import stream_response
+from app.services.tts import stream_tts
+
+# Shorter fragments are merged into the next sentence ("Hi! Sure." -> one TTS call)
+PIPELINE_MIN_SENTENCE_CHARS = int(os.getenv("PIPELINE_MIN_SENTENCE_CHARS", "20"))
+PIPELINE_TTS_CONCURRENCY = int(os.getenv("PIPELINE_TTS_CONCURRENCY", "2"))
+
+# Terminal punctuation (plus closing quotes/brackets) followed by whitespace;
+# "3.5" or "cinebook.com" don't split
+SENTENCE_END = re.compile(r"[.!?]+[\"')\]]*\s+")
+
+LLMProvider = Callable[[str], AsyncIterator[str]]
+TTSProvider = Callable[[str], AsyncIterator[bytes]]
+
+
+class StageClock:
+    """
+    Milliseconds since the request started, recorded once per stage (marks),
+    plus the duration of named steps such as "stt" or "llm" (spans).
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages: Dict[str, float] = {}
+        self.spans: Dict[str, float] = {}
+
+    def now_ms(self) -> float:
+        return round((time.perf_counter() - self.started) * 1000, 1)
+
+    def mark(self, stage: str) -> float:
+        if stage not in self.stages:
+            self.stages[stage] = self.now_ms()
+        return self.stages[stage]
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        """Time the block; repeated spans of the same name add up"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = round((time.perf_counter() - started) * 1000, 1)
+            self.spans[name] = round(self.spans.get(name, 0.0) + elapsed, 1)
+
+
+async def split_sentences(tokens: AsyncIterator[str],
+                          min_chars: int = PIPELINE_MIN_SENTENCE_CHARS) -> AsyncIterator[str]:
+    """Re-chunk a token stream into sentences; the remainder is flushed at the end"""
+    buffer = ""
+    async for token in tokens:
+        buffer += token
+        while True:
+            match = SENTENCE_END.search(buffer, max(0, min_chars - 1))
+            if not match:
+                break
+            sentence, buffer = buffer[:match.end()].strip(), buffer[match.end():]
+            yield sentence
+    if buffer.strip():
+        yield buffer.strip()
+
+
+async def run_pipeline(
+    user_text: str,
+    clock: StageClock,
+    generate: LLMProvider = stream_response,
+    synthesize: TTSProvider = stream_tts,
+    tts_concurrency: int = PIPELINE_TTS_CONCURRENCY
+) -> AsyncIterator[dict]:
+    """
+    Yields events in order:
+      {"event": "sentence", "index", "text", "t_ms"}    (t_ms: when the LLM finished it)
+      {"event": "audio", "index", "seq", "audio", "t_ms"}  (audio: raw MP3 bytes)
+      {"event": "done", "agent_response", "timings"}
+    Provider errors are raised to the caller.
+    """
+    slots = asyncio.Semaphore(tts_concurrency)
+    sentences: asyncio.Queue = asyncio.Queue()
+    tts_tasks: List[asyncio.Task] = []
+    reply: List[str] = []
+
+    async def tokens() -> AsyncIterator[str]:
+        async for token in generate(user_text):
+            clock.mark("llm_first_token")
+            reply.append(token)
+            yield token
+        clock.mark("llm_done")
+
+    async def synthesize_into(text: str, out: asyncio.Queue) -> None:
+        async with slots:
+            try:
+                async for chunk in synthesize(text):
+                    out.put_nowait(chunk)
+            except Exception as e:
+                out.put_nowait(e)
+            finally:
+                out.put_nowait(None)
+
+    async def produce() -> None:
+        try:
+            async for index, sentence in _enumerate(split_sentences(tokens())):
+                out: asyncio.Queue = asyncio.Queue()
+                tts_tasks.append(asyncio.create_task(synthesize_into(sentence, out)))
+                sentences.put_nowait((index, sentence, clock.now_ms(), out))
+        except Exception as e:
+            sentences.put_nowait(e)
+        finally:
+            sentences.put_nowait(None)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await sentences.get()
+            if item is None:
+                break
+            if isinstance(item, Exception):
+                raise item
+            index, sentence, produced_ms, out = item
+            clock.stages.setdefault("first_sentence", produced_ms)
+            yield {"event": "sentence", "index": index, "text": sentence, "t_ms": produced_ms}
+
+            seq = 0
+            while True:
+                chunk = await out.get()
+                if chunk is None:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                emitted_ms = clock.now_ms()
+                clock.stages.setdefault("tts_first_audio", emitted_ms)
+                yield {"event": "audio", "index": index, "seq": seq, "audio": chunk, "t_ms": emitted_ms}
+                seq += 1
+        clock.mark("tts_done")
+        yield {"event": "done", "agent_response": "".join(reply).strip(), "timings": dict(clock.stages)}
+    finally:
+        producer.cancel()
+        for task in tts_tasks:
+            task.cancel()
+        await asyncio.gather(producer, *tts_tasks, return_exceptions=True)
+
+
+async def _enumerate(items: AsyncIterator[str]) -> AsyncIterator[tuple]:
+    index = 0
+    async for item in items:
+        yield index, item
+        index += 1
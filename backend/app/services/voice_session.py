@@ -0,0 +1,158 @@
+"""
+WebSocket voice session
+One connection carries a whole conversation. The client streams raw 16-bit mono
+PCM as binary messages; SpeechSegmenter finds phrase pauses and end of turn.
+Each phrase is transcribed as soon as it closes (while the user keeps talking),
+and at end of turn the joined transcript goes through the LLM -> TTS pipeline.
+
+Server -> client messages (JSON text unless noted):
+  {"type": "ready", "sample_rate"}
+  {"type": "speech_start"}
+  {"type": "transcript", "final": false, "segment", "text"}   one per phrase
+  {"type": "transcript", "final": true, "text"}               whole turn
+  {"type": "sentence", "index", "text", "t_ms"}
+  binary                                                      MP3 chunks of the sentence above, in order
+  {"type": "done", "agent_response", "timings"}               ms since end of speech
+  {"type": "interrupted"}                                     reply cancelled by new speech (barge-in)
+  {"type": "error", "detail"}
+Client -> server control messages: {"type": "end_turn"} to end the turn without
+waiting for silence (push-to-talk), {"type": "reset"} to drop buffered audio.
+"""
+from typing import Awaitable, Callable, List, Optional
+import asyncio
+import json
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from app.services.intents import Location, intent_router, fixed_reply
+from app.services.stt import transcribe_bytes
+from app.services.tts import CANNED_PHRASES, stream_tts
+from app.services.voice_metrics import voice_metrics
+from app.services.vad import SpeechSegmenter, pcm_to_wav, SPEECH_START, SEGMENT, END_OF_TURN
+from app.services.voice_pipeline import StageClock, run_pipeline
+
+Transcriber = Callable[[bytes], Awaitable[str]]
+
+
+class VoiceSession:
+    """Receive loop plus the per-turn STT and reply tasks of one WebSocket."""
+
+    def __init__(self, websocket: WebSocket, sample_rate: int = 16000,
+                 transcribe: Transcriber = transcribe_bytes, pipeline=run_pipeline,
+                 location: Optional[Location] = None, intents=intent_router, speak=stream_tts):
+        self.websocket = websocket
+        self.sample_rate = sample_rate
+        self.transcribe = transcribe
+        self.pipeline = pipeline
+        self.location = location or Location()
+        self.intents = intents
+        self.speak = speak
+        self.segmenter = SpeechSegmenter(sample_rate)
+        self._segments: List[asyncio.Task] = []
+        self._reply: Optional[asyncio.Task] = None
+
+    async def run(self) -> None:
+        await self.websocket.send_json({"type": "ready", "sample_rate": self.sample_rate})
+        try:
+            while True:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes"):
+                    events = self.segmenter.feed(message["bytes"])
+                elif message.get("text"):
+                    events = self._control(message["text"])
+                else:
+                    continue
+                for event, payload in events:
+                    await self._on_event(event, payload)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            tasks = self._segments + ([self._reply] if self._reply else [])
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _control(self, text: str) -> list:
+        try:
+            control = json.loads(text).get("type")
+        except (ValueError, AttributeError):
+            return []
+        if control == "end_turn":
+            return self.segmenter.flush()
+        if control == "reset":
+            self.segmenter = SpeechSegmenter(self.sample_rate)
+        return []
+
+    # --- Turn handling ---
+
+    async def _on_event(self, event: str, payload: Optional[bytes]) -> None:
+        if event == SPEECH_START:
+            if self._reply and not self._reply.done():
+                self._reply.cancel()
+                await self._send({"type": "interrupted"})
+            await self._send({"type": "speech_start"})
+        elif event == SEGMENT:
+            index = len(self._segments)
+            wav = pcm_to_wav(payload, self.sample_rate)
+            self._segments.append(asyncio.create_task(self._transcribe_segment(index, wav)))
+        elif event == END_OF_TURN and self._segments:
+            segments, self._segments = self._segments, []
+            self._reply = asyncio.create_task(self._respond(segments, StageClock()))
+
+    async def _transcribe_segment(self, index: int, wav: bytes) -> str:
+        text = (await self.transcribe(wav)).strip()
+        if text:
+            await self._send({"type": "transcript", "final": False, "segment": index, "text": text})
+        return text
+
+    async def _respond(self, segments: List[asyncio.Task], clock: StageClock) -> None:
+        """Wait for the turn's segment transcripts, then stream the reply"""
+        try:
+            texts = await asyncio.gather(*segments)
+            user_text = " ".join(text for text in texts if text)
+            clock.mark("stt_done")
+            await self._send({"type": "transcript", "final": True, "text": user_text})
+            if not user_text:
+                await self._say(CANNED_PHRASES["not_understood"])
+                return
+
+            with clock.span("intent"):
+                answer = await self.intents.answer(user_text, self.location)
+            if answer is not None:
+                events = self.pipeline(user_text, clock, generate=fixed_reply(answer))
+            else:
+                events = self.pipeline(user_text, clock)
+            async for event in events:
+                if event["event"] == "audio":
+                    await self.websocket.send_bytes(event["audio"])
+                elif event["event"] == "sentence":
+                    await self._send({"type": "sentence", "index": event["index"],
+                                      "text": event["text"], "t_ms": event["t_ms"]})
+                elif event["event"] == "done":
+                    voice_metrics.record("ws", clock)
+                    await self._send({"type": "done", "agent_response": event["agent_response"],
+                                      "timings": event["timings"]})
+        except asyncio.CancelledError:
+            for task in segments:
+                task.cancel()
+            raise
+        except Exception as e:
+            detail = getattr(e, "detail", None) or str(e)
+            print(f"[VOICE WS] Turn failed: {detail}")
+            voice_metrics.record("ws", clock, error=str(detail))
+            await self._send({"type": "error", "detail": f"Voice processing failed: {detail}"})
+
+    async def _say(self, text: str) -> None:
+        """Speak a fixed phrase (pre-rendered by the TTS cache warm-up)"""
+        await self._send({"type": "sentence", "index": 0, "text": text, "t_ms": 0})
+        async for chunk in self.speak(text):
+            await self.websocket.send_bytes(chunk)
+        await self._send({"type": "done", "agent_response": text, "timings": {}})
+
+    async def _send(self, message: dict) -> None:
+        try:
+            await self.websocket.send_json(message)
+        except (WebSocketDisconnect, RuntimeError):
+            pass  # Client went away; run() cleans up
@@ -0,0 +1,175 @@
+"""
+Contended booking benchmark: many clients racing for the seats of one showtime
+Run against a live server (seeded with seed_data.py), once per booking mode:
+
+    python benchmarks/bench_contention.py --label direct --output direct.json
+    BOOKING_QUEUE_ENABLED=true uvicorn main:app ...   # restart the server
+    python benchmarks/bench_contention.py --label queue --output queue.json
+    python benchmarks/bench_contention.py --compare direct.json queue.json
+    python benchmarks/bench_contention.py --best-available 0.5   # mix in server-picked seats
+
+Every worker repeatedly requests 1-4 adjacent seats from a hot block at the
+front of the seat map, like a flash sale where everyone wants the same seats;
+with --best-available a share of the attempts asks for the best 1-4 seats instead.
+Bookings made during a round are cancelled afterwards so rounds start from the
+same inventory.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+import httpx
+
+from bench_endpoints import percentile
+
+
+async def pick_showtime(client: httpx.AsyncClient) -> int:
+    tomorrow = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    listing = await client.get("/api/showtimes/date", params={"date": tomorrow.isoformat()})
+    listing.raise_for_status()
+    showtimes = listing.json()
+    if not showtimes:
+        raise SystemExit("No showtimes found for tomorrow; run seed_data.py first")
+    return max(showtimes, key=lambda st: st.get("available_seats", 0))["id"]
+
+
+async def run_round(client: httpx.AsyncClient, headers: Dict, showtime_id: int,
+                    hot_seats: List[int], concurrency: int, attempts: int,
+                    best_available: float = 0.0) -> Dict:
+    """`concurrency` workers make `attempts` booking attempts between them"""
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    booked: List[int] = []
+    remaining = attempts
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            count = random.randint(1, 4)
+            if random.random() < best_available:
+                url = "/api/bookings/best-available"
+                payload = {"showtime_id": showtime_id, "quantity": count}
+            else:
+                start = random.randrange(0, len(hot_seats) - count + 1)
+                url = "/api/bookings/"
+                payload = {"showtime_id": showtime_id, "seat_ids": hot_seats[start:start + count]}
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, json=payload, headers=headers)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+            if status == 201:
+                booked.append(response.json()["id"])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    for booking_id in booked:
+        await client.post(f"/api/bookings/{booking_id}/cancel", headers=headers)
+
+    return {
+        "requests": len(latencies),
+        "booked": len(booked),
+        "conflicts": statuses.get(409, 0),
+        "errors": sum(n for status, n in statuses.items() if status not in (201, 409)),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+async def benchmark(args) -> List[Dict]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0, limits=limits) as client:
+        login = await client.post("/api/auth/login", json={"email": args.email, "password": args.password})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        showtime_id = args.showtime_id or await pick_showtime(client)
+        seat_map = (await client.get(f"/api/showtimes/{showtime_id}/seats")).json()["seats"]
+        hot_seats = [s["seat_id"] for s in seat_map if s["is_available"]][:args.hot_seats]
+        if len(hot_seats) < 4:
+            raise SystemExit(f"Showtime {showtime_id} has too few free seats")
+        print(f"  showtime {showtime_id}, {len(hot_seats)} hot seats")
+
+        results = []
+        for round_number in range(1, args.rounds + 1):
+            result = await run_round(client, headers, showtime_id, hot_seats,
+                                     args.concurrency, args.attempts, args.best_available)
+            result["scenario"] = f"round_{round_number}"
+            print(f"  round {round_number}: {result['rps']:>8} req/s  p50 {result['p50_ms']:>8} ms  "
+                  f"p99 {result['p99_ms']:>8} ms  booked {result['booked']}  "
+                  f"conflicts {result['conflicts']}  errors {result['errors']}")
+            results.append(result)
+
+        metrics = (await client.get("/metrics")).json()
+        if "booking_queue" in metrics:
+            print(f"  booking_queue: {metrics['booking_queue']}")
+        return results
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    def summary(run):
+        results = run["results"]
+        return {
+            "rps": statistics.fmean(r["rps"] for r in results),
+            "p50_ms": statistics.fmean(r["p50_ms"] for r in results),
+            "p99_ms": statistics.fmean(r["p99_ms"] for r in results),
+            "booked": statistics.fmean(r["booked"] for r in results),
+        }
+
+    a, b = summary(before), summary(after)
+    print(f"{'metric':<10} {before['label']:>12} {after['label']:>12} {'ratio':>8}")
+    for key in ("rps", "p50_ms", "p99_ms", "booked"):
+        ratio = b[key] / a[key] if a[key] else float("inf")
+        print(f"{key:<10} {a[key]:>12.1f} {b[key]:>12.1f} {ratio:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="customer@test.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--showtime-id", type=int, help="Defaults to tomorrow's emptiest showtime")
+    parser.add_argument("--hot-seats", type=int, default=40, help="Size of the contended seat block")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--attempts", type=int, default=2000, help="Booking attempts per round")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--best-available", type=float, default=0.0,
+                        help="Share of attempts (0-1) sent to /best-available instead of the hot block")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output", help="Write results as JSON for --compare")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    print(f"Contention benchmark '{args.label}' against {args.base_url} "
+          f"(concurrency={args.concurrency}, {args.attempts} attempts x {args.rounds} rounds)")
+    results = asyncio.run(benchmark(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"label": args.label, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
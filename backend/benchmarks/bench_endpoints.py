@@ -0,0 +1,171 @@
+"""
+Requests-per-second benchmark for the booking and showtime endpoints
+Run against a live server (seeded with seed_data.py) before and after a change:
+
+    python benchmarks/bench_endpoints.py --label sync  --output sync.json
+    python benchmarks/bench_endpoints.py --label async --output async.json
+    python benchmarks/bench_endpoints.py --compare sync.json async.json
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+async def run_scenario(
+    name: str,
+    request: Callable[[httpx.AsyncClient], Awaitable[httpx.Response]],
+    client: httpx.AsyncClient,
+    concurrency: int,
+    duration: float
+) -> Dict:
+    """Hammer one endpoint with `concurrency` workers for `duration` seconds"""
+    latencies: List[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                response = await request(client)
+                if response.status_code >= 500:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+async def benchmark(args) -> List[Dict]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30.0, limits=limits) as client:
+        login = await client.post("/api/auth/login", json={"email": args.email, "password": args.password})
+        login.raise_for_status()
+        headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+        tomorrow = (datetime.now() + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        listing = await client.get("/api/showtimes/date", params={"date": tomorrow.isoformat()})
+        listing.raise_for_status()
+        showtime_ids = [st["id"] for st in listing.json()]
+        if not showtime_ids:
+            raise SystemExit("No showtimes found for tomorrow; run seed_data.py first")
+
+        async def showtimes_by_date(c):
+            return await c.get("/api/showtimes/date", params={"date": tomorrow.isoformat()})
+
+        async def showtime_detail(c):
+            return await c.get(f"/api/showtimes/{random.choice(showtime_ids)}")
+
+        async def seat_map(c):
+            return await c.get(f"/api/showtimes/{random.choice(showtime_ids)}/seats")
+
+        async def my_bookings(c):
+            return await c.get("/api/bookings/", headers=headers)
+
+        async def book_and_cancel(c):
+            # Book one free seat and cancel it so the run doesn't exhaust inventory
+            showtime_id = random.choice(showtime_ids)
+            seats = (await c.get(f"/api/showtimes/{showtime_id}/seats")).json()["seats"]
+            free = [s["seat_id"] for s in seats if s["is_available"]]
+            if not free:
+                return await c.get("/health")
+            response = await c.post(
+                "/api/bookings/",
+                json={"showtime_id": showtime_id, "seat_ids": [random.choice(free)]},
+                headers=headers
+            )
+            if response.status_code == 201:
+                await c.post(f"/api/bookings/{response.json()['id']}/cancel", headers=headers)
+            return response
+
+        scenarios = {
+            "showtimes_by_date": showtimes_by_date,
+            "showtime_detail": showtime_detail,
+            "seat_map": seat_map,
+            "my_bookings": my_bookings,
+            "book_and_cancel": book_and_cancel,
+        }
+        results = []
+        for name, request in scenarios.items():
+            if args.only and name not in args.only:
+                continue
+            result = await run_scenario(name, request, client, args.concurrency, args.duration)
+            print(f"  {name:<20} {result['rps']:>8} req/s  p50 {result['p50_ms']:>8} ms  "
+                  f"p99 {result['p99_ms']:>8} ms  errors {result['errors']}")
+            results.append(result)
+        return results
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    after_by_name = {r["scenario"]: r for r in after["results"]}
+
+    print(f"{'scenario':<20} {before['label']:>12} {after['label']:>12} {'speedup':>8}")
+    for result in before["results"]:
+        other = after_by_name.get(result["scenario"])
+        if not other:
+            continue
+        speedup = other["rps"] / result["rps"] if result["rps"] else float("inf")
+        print(f"{result['scenario']:<20} {result['rps']:>12} {other['rps']:>12} {speedup:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="customer@test.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=15.0, help="Seconds per scenario")
+    parser.add_argument("--only", nargs="*", help="Run only these scenarios")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output", help="Write results as JSON for --compare")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    print(f"Benchmark '{args.label}' against {args.base_url} "
+          f"(concurrency={args.concurrency}, {args.duration}s per scenario)")
+    results = asyncio.run(benchmark(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"label": args.label, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
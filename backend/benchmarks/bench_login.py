@@ -0,0 +1,137 @@
+"""
+Login throughput benchmark: a burst of sign-ins plus a probe on a cheap endpoint
+Run against a live server (seeded with seed_data.py) before and after a change:
+
+    python benchmarks/bench_login.py --label inline --output inline.json
+    python benchmarks/bench_login.py --label pool --output pool.json
+    python benchmarks/bench_login.py --compare inline.json pool.json
+
+While `concurrency` workers log in as fast as they can, one probe requests
+/health in a loop. If bcrypt runs on the event loop, the probe's latency climbs
+with the login load; with hashing on a worker pool it should stay flat.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+from bench_endpoints import percentile
+
+
+def summarize(latencies: List[float], elapsed: float) -> Dict:
+    return {
+        "requests": len(latencies),
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+    }
+
+
+async def run_level(client: httpx.AsyncClient, credentials: Dict, concurrency: int,
+                    duration: float) -> Dict:
+    """Log in with `concurrency` workers for `duration` seconds while probing /health"""
+    login_latencies: List[float] = []
+    probe_latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    deadline = time.perf_counter() + duration
+
+    async def login_worker():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                status = (await client.post("/api/auth/login", json=credentials)).status_code
+            except httpx.HTTPError:
+                status = 0
+            login_latencies.append(time.perf_counter() - started)
+            statuses[status] = statuses.get(status, 0) + 1
+
+    async def probe():
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            await client.get("/health")
+            probe_latencies.append(time.perf_counter() - started)
+            await asyncio.sleep(0.05)
+
+    started = time.perf_counter()
+    await asyncio.gather(probe(), *(login_worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    result = {"concurrency": concurrency, **summarize(login_latencies, elapsed)}
+    result["ok"] = statuses.get(200, 0)
+    result["busy"] = statuses.get(503, 0)
+    result["errors"] = sum(n for status, n in statuses.items() if status not in (200, 503))
+    result["probe_p50_ms"] = round(percentile(probe_latencies, 50) * 1000, 2)
+    result["probe_p99_ms"] = round(percentile(probe_latencies, 99) * 1000, 2)
+    return result
+
+
+async def benchmark(args) -> List[Dict]:
+    credentials = {"email": args.email, "password": args.password}
+    max_level = max(args.levels)
+    limits = httpx.Limits(max_connections=max_level + 1, max_keepalive_connections=max_level + 1)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0, limits=limits) as client:
+        (await client.post("/api/auth/login", json=credentials)).raise_for_status()
+
+        results = []
+        for concurrency in args.levels:
+            result = await run_level(client, credentials, concurrency, args.duration)
+            print(f"  concurrency {concurrency:>4}: {result['rps']:>7} logins/s  "
+                  f"p50 {result['p50_ms']:>8} ms  p99 {result['p99_ms']:>8} ms  "
+                  f"probe p99 {result['probe_p99_ms']:>8} ms  busy {result['busy']}  "
+                  f"errors {result['errors']}")
+            results.append(result)
+
+        metrics = (await client.get("/metrics")).json()
+        if "password_hasher" in metrics:
+            print(f"  password_hasher: {metrics['password_hasher']}")
+        return results
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+    after_by_level = {r["concurrency"]: r for r in after["results"]}
+
+    print(f"{'concurrency':<12} {'metric':<14} {before['label']:>12} {after['label']:>12}")
+    for result in before["results"]:
+        other = after_by_level.get(result["concurrency"])
+        if not other:
+            continue
+        for key in ("rps", "p99_ms", "probe_p99_ms"):
+            print(f"{result['concurrency']:<12} {key:<14} {result[key]:>12} {other[key]:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", default="customer@test.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 8, 32, 64],
+                        help="Concurrent login workers per step")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per step")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output", help="Write results as JSON for --compare")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    print(f"Login benchmark '{args.label}' against {args.base_url} "
+          f"(levels={args.levels}, {args.duration}s each)")
+    results = asyncio.run(benchmark(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"label": args.label, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
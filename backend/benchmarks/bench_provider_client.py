@@ -0,0 +1,116 @@
+"""
+Provider client latency: a new httpx client per call vs the shared pooled client
+Runs LLM-shaped requests against a local mock of the Groq API (started in-process
+unless --base-url points at another mock), so no API key or network is needed:
+
+    python benchmarks/bench_provider_client.py
+    python benchmarks/bench_provider_client.py --delay 0.05 --concurrency 16
+    SSL_CERT_FILE=mock.pem python benchmarks/bench_provider_client.py --base-url https://localhost:9443/openai/v1
+
+The per-call client pays a TCP (and, against an HTTPS mock, TLS) handshake on
+every request; the pooled client reuses keep-alive connections.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import sys
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+from fastapi import FastAPI
+
+from app.services.http_client import PROVIDERS, HttpClientPool
+from bench_endpoints import percentile
+
+COMPLETION = {"choices": [{"message": {"role": "assistant", "content": "Sure, here are tonight's showtimes."}}]}
+
+
+def start_mock(delay: float) -> str:
+    """Serve a minimal /chat/completions on a free local port; returns its base URL"""
+    mock = FastAPI()
+
+    @mock.post("/openai/v1/chat/completions")
+    async def chat_completions():
+        if delay:
+            await asyncio.sleep(delay)
+        return COMPLETION
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(mock, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}/openai/v1"
+
+
+async def run_mode(name: str, call: Callable[[], Awaitable[httpx.Response]],
+                   concurrency: int, requests: int) -> Dict:
+    latencies: List[float] = []
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started = time.perf_counter()
+            response = await call()
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": name,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+    }
+
+
+async def benchmark(args) -> None:
+    base_url = args.base_url or start_mock(args.delay)
+    payload = {"model": "llama-3.3-70b-versatile", "messages": [{"role": "user", "content": "hi"}]}
+    pool = HttpClientPool(providers={"groq": {**PROVIDERS["groq"], "base_url": base_url}})
+    await pool.start()
+
+    async def per_call_client():
+        # What llm.py/stt.py did before: a fresh client (and connection) per request
+        async with httpx.AsyncClient(base_url=base_url, timeout=30.0) as client:
+            return await client.post("/chat/completions", json=payload)
+
+    async def pooled_client():
+        return await pool.request("groq", "POST", "/chat/completions", json=payload)
+
+    print(f"Provider client benchmark against {base_url} "
+          f"(concurrency={args.concurrency}, {args.requests} requests, http2={pool.http2})")
+    for name, call in (("per_call_client", per_call_client), ("pooled_client", pooled_client)):
+        await run_mode(name, call, args.concurrency, min(args.requests, 20))  # warm-up
+        result = await run_mode(name, call, args.concurrency, args.requests)
+        print(f"  {name:<16} {result['rps']:>8} req/s  p50 {result['p50_ms']:>8} ms  "
+              f"p99 {result['p99_ms']:>8} ms  mean {result['mean_ms']:>8} ms")
+    await pool.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="External mock to use instead of the in-process one")
+    parser.add_argument("--delay", type=float, default=0.0, help="Mock response delay in seconds")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(benchmark(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+EXPLAIN ANALYZE capture for the hot booking/showtime queries (PostgreSQL)
+Run against the database in DATABASE_URL before and after a migration:
+
+    alembic downgrade c41e7a2d9f06
+    python benchmarks/bench_query_plans.py --grow 200000 --label before --output before.json
+    alembic upgrade head
+    python benchmarks/bench_query_plans.py --label after --output after.json
+    python benchmarks/bench_query_plans.py --compare before.json after.json
+
+--grow inserts synthetic bookings (with their booking_seats) on top of
+seed_data.py so the planner sees a realistically large table; run it once.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+from typing import Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+
+from app.database import engine
+
+# name -> SQL; parameters are filled from real rows by sample_parameters()
+QUERIES = {
+    "user_bookings_page": """
+        SELECT id FROM bookings
+        WHERE user_id = :user_id
+        ORDER BY created_at DESC, id DESC
+        LIMIT 21
+    """,
+    "pending_expiry_sweep": """
+        SELECT id FROM bookings
+        WHERE status = 'PENDING' AND expires_at < now()
+    """,
+    "showtime_booked_seats": """
+        SELECT seat_id FROM booking_seats
+        WHERE showtime_id = :showtime_id
+    """,
+    "movie_showtimes": """
+        SELECT id FROM showtimes
+        WHERE movie_id = :movie_id AND start_time >= now()
+        ORDER BY start_time
+    """,
+    "screen_overlap_check": """
+        SELECT id FROM showtimes
+        WHERE screen_id = :screen_id AND start_time < :end_time AND end_time > :start_time
+        LIMIT 1
+    """,
+    "screen_seats": """
+        SELECT id FROM seats
+        WHERE screen_id = :screen_id
+    """,
+    "movies_page": """
+        SELECT id FROM movies
+        ORDER BY created_at DESC, id DESC
+        LIMIT 21
+    """,
+}
+
+
+def sample_parameters(conn) -> Dict:
+    """Pick the busiest user/showtime/movie/screen so plans reflect the worst case"""
+    user_id = conn.execute(text(
+        "SELECT user_id FROM bookings GROUP BY user_id ORDER BY count(*) DESC LIMIT 1"
+    )).scalar()
+    showtime_id = conn.execute(text(
+        "SELECT showtime_id FROM booking_seats GROUP BY showtime_id ORDER BY count(*) DESC LIMIT 1"
+    )).scalar()
+    movie_id, screen_id, start_time, end_time = conn.execute(text(
+        "SELECT movie_id, screen_id, start_time, end_time FROM showtimes ORDER BY start_time DESC LIMIT 1"
+    )).one()
+    return {
+        "user_id": user_id,
+        "showtime_id": showtime_id,
+        "movie_id": movie_id,
+        "screen_id": screen_id,
+        "start_time": start_time,
+        "end_time": end_time,
+    }
+
+
+def grow_dataset(conn, bookings: int) -> None:
+    """Add synthetic bookings spread over existing users and showtimes (one seat each)"""
+    print(f"  inserting {bookings} synthetic bookings...")
+    conn.execute(text("""
+        WITH new_bookings AS (
+            INSERT INTO bookings (booking_reference, user_id, showtime_id, status,
+                                  total_amount, seat_count, created_at, expires_at)
+            SELECT 'BKX' || lpad(g::text, 12, '0'),
+                   (SELECT id FROM users ORDER BY id OFFSET (g % (SELECT count(*) FROM users)) LIMIT 1),
+                   st.id,
+                   (ARRAY['CONFIRMED', 'CANCELLED', 'EXPIRED', 'PENDING'])[1 + g % 4]::bookingstatus,
+                   10.00, 1,
+                   now() - (g || ' seconds')::interval,
+                   CASE WHEN g % 4 = 3 THEN now() + interval '10 minutes' END
+            FROM generate_series(1, :bookings) AS g
+            JOIN LATERAL (
+                SELECT id FROM showtimes ORDER BY id
+                OFFSET (g % (SELECT count(*) FROM showtimes)) LIMIT 1
+            ) st ON true
+            RETURNING id, showtime_id, status
+        )
+        INSERT INTO booking_seats (booking_id, seat_id, showtime_id, price)
+        SELECT nb.id, s.id, nb.showtime_id, 10.00
+        FROM new_bookings nb
+        JOIN showtimes st ON st.id = nb.showtime_id
+        JOIN LATERAL (
+            SELECT seats.id FROM seats
+            WHERE seats.screen_id = st.screen_id
+              AND NOT EXISTS (
+                  SELECT 1 FROM booking_seats bs
+                  WHERE bs.showtime_id = nb.showtime_id AND bs.seat_id = seats.id
+              )
+            LIMIT 1
+        ) s ON true
+        WHERE nb.status IN ('CONFIRMED', 'PENDING')
+        ON CONFLICT ON CONSTRAINT unique_seat_per_showtime DO NOTHING
+    """), {"bookings": bookings})
+    conn.execute(text("ANALYZE"))
+
+
+def explain(conn, sql: str, params: Dict, repeat: int) -> Dict:
+    """Run EXPLAIN ANALYZE `repeat` times; keep the median timing and the last plan"""
+    timings, plan = [], None
+    for _ in range(repeat):
+        result = conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}"), params).scalar()
+        plan = result[0] if isinstance(result, list) else json.loads(result)[0]
+        timings.append(plan["Execution Time"])
+    return {
+        "execution_ms": round(statistics.median(timings), 3),
+        "planning_ms": round(plan["Planning Time"], 3),
+        "scans": sorted(set(scan_nodes(plan["Plan"]))),
+        "plan": plan["Plan"],
+    }
+
+
+def scan_nodes(node: Dict) -> List[str]:
+    """'Seq Scan on bookings', 'Index Scan using ix_... on bookings', ..."""
+    scans = []
+    if "Scan" in node["Node Type"]:
+        label = node["Node Type"]
+        if node.get("Index Name"):
+            label += f" using {node['Index Name']}"
+        if node.get("Relation Name"):
+            label += f" on {node['Relation Name']}"
+        scans.append(label)
+    for child in node.get("Plans", []):
+        scans.extend(scan_nodes(child))
+    return scans
+
+
+def capture(args) -> Dict:
+    if engine.dialect.name != "postgresql":
+        raise SystemExit("EXPLAIN ANALYZE capture needs PostgreSQL (DATABASE_URL)")
+    results = {}
+    with engine.begin() as conn:
+        if args.grow:
+            grow_dataset(conn, args.grow)
+    with engine.connect() as conn:
+        params = sample_parameters(conn)
+        for name, sql in QUERIES.items():
+            result = explain(conn, sql, params, args.repeat)
+            results[name] = result
+            print(f"  {name:<24} {result['execution_ms']:>10} ms  {', '.join(result['scans'])}")
+    return results
+
+
+def compare(before_path: str, after_path: str) -> None:
+    with open(before_path) as f:
+        before = json.load(f)
+    with open(after_path) as f:
+        after = json.load(f)
+
+    print(f"{'query':<24} {before['label']:>12} {after['label']:>12} {'speedup':>8}  plan ({after['label']})")
+    for name, result in before["results"].items():
+        other = after["results"].get(name)
+        if not other:
+            continue
+        speedup = result["execution_ms"] / other["execution_ms"] if other["execution_ms"] else float("inf")
+        print(f"{name:<24} {result['execution_ms']:>10} ms {other['execution_ms']:>9} ms "
+              f"{speedup:>7.1f}x  {', '.join(other['scans'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grow", type=int, default=0, help="Insert this many synthetic bookings first")
+    parser.add_argument("--repeat", type=int, default=5, help="EXPLAIN ANALYZE runs per query")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output", help="Write results as JSON for --compare")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    print(f"Query plans '{args.label}'")
+    results = capture(args)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"label": args.label, "results": results}, f, indent=2, default=str)
+
+
+if __name__ == "__main__":
+    main()
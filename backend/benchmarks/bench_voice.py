@@ -0,0 +1,165 @@
+"""
+Voice pipeline load test: throughput and tail latency per voice endpoint
+Run against a server started with the offline stub providers, so no Groq key,
+Edge TTS or network is needed (delays are set with STUB_*_MS, see
+app/services/stub_providers.py):
+
+    VOICE_PROVIDERS=stub TTS_WARMUP=false uvicorn main:app --port 8000
+    python benchmarks/bench_voice.py --concurrency 16 --requests 300
+    python benchmarks/bench_voice.py --only chat_pipelined --question "what's playing tonight"
+    python benchmarks/bench_voice.py --only chat --accept audio/mpeg   # binary vs base64 JSON
+
+Client-side it reports requests/s, total latency and time to first audio byte;
+afterwards it prints the server's per-stage histograms from /metrics, which
+split the latency into STT, intent lookup, LLM and TTS.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from bench_endpoints import percentile
+
+# Same names the voice router records its histograms under
+ENDPOINTS = {
+    "chat": "/api/voice/chat",
+    "chat_stream": "/api/voice/chat/stream",
+    "chat_pipelined": "/api/voice/chat/pipelined",
+}
+
+
+async def first_audio(endpoint: str, response: httpx.Response) -> Optional[float]:
+    """Read the whole body; returns perf_counter() when the first audio arrived"""
+    first = None
+    content_type = response.headers.get("content-type", "")
+    if content_type.startswith("multipart/"):
+        async for chunk in response.aiter_bytes():
+            if first is None and b"Content-Type: audio/mpeg" in chunk:
+                first = time.perf_counter()
+    elif endpoint == "chat_pipelined":
+        async for line in response.aiter_lines():
+            if first is None and '"event": "audio"' in line:
+                first = time.perf_counter()
+    else:
+        async for chunk in response.aiter_bytes():
+            if first is None and chunk:
+                first = time.perf_counter()
+    return first
+
+
+async def run_endpoint(endpoint: str, client: httpx.AsyncClient, questions: List[str],
+                       concurrency: int, requests: int, accept: Optional[str] = None) -> Dict:
+    latencies: List[float] = []
+    first_audio_latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def one_request() -> None:
+        nonlocal errors
+        # The stub STT "transcribes" an upload starting with stub: to the text after it
+        upload = ("question.wav", f"stub:{random.choice(questions)}".encode(), "audio/wav")
+        headers = {"Accept": accept} if accept else {}
+        started = time.perf_counter()
+        try:
+            async with client.stream("POST", ENDPOINTS[endpoint], files={"audio": upload},
+                                     headers=headers) as response:
+                first = await first_audio(endpoint, response)
+                if response.status_code >= 400:
+                    errors += 1
+                    return
+        except httpx.HTTPError:
+            errors += 1
+            return
+        finished = time.perf_counter()
+        latencies.append(finished - started)
+        # JSON /chat returns one body, so its "first audio" is the whole response
+        first_audio_latencies.append((first or finished) - started)
+
+    async def worker():
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            await one_request()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "endpoint": endpoint,
+        "accept": accept,
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        "first_audio_p50_ms": round(percentile(first_audio_latencies, 50) * 1000, 2),
+        "first_audio_p99_ms": round(percentile(first_audio_latencies, 99) * 1000, 2),
+    }
+
+
+def print_server_stages(voice_metrics: Dict, endpoint: str) -> None:
+    histograms = voice_metrics.get(endpoint)
+    if not histograms:
+        return
+    for kind in ("spans", "stages"):
+        for name, summary in histograms[kind].items():
+            print(f"      {kind[:-1]:<5} {name:<16} p50 {summary['p50_ms']:>8} ms  "
+                  f"p95 {summary['p95_ms']:>8} ms  p99 {summary['p99_ms']:>8} ms  n={summary['count']}")
+
+
+async def benchmark(args) -> List[Dict]:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0, limits=limits) as client:
+        print(f"Voice load test against {args.base_url} (concurrency={args.concurrency}, "
+              f"{args.requests} requests per endpoint, Accept: {args.accept or 'default'})")
+        results = []
+        for endpoint in ENDPOINTS:
+            if args.only and endpoint not in args.only:
+                continue
+            await run_endpoint(endpoint, client, args.question, args.concurrency,
+                               min(args.requests, args.concurrency * 2), args.accept)  # warm-up
+            result = await run_endpoint(endpoint, client, args.question, args.concurrency,
+                                        args.requests, args.accept)
+            print(f"  {endpoint:<15} {result['rps']:>8} req/s  p50 {result['p50_ms']:>8} ms  "
+                  f"p99 {result['p99_ms']:>8} ms  first audio p50 {result['first_audio_p50_ms']:>8} ms  "
+                  f"p99 {result['first_audio_p99_ms']:>8} ms  errors {result['errors']}")
+            results.append(result)
+
+        # Server-side histograms are cumulative since startup (warm-up included)
+        metrics = (await client.get("/metrics")).json().get("voice", {})
+        print("  Server-side stage latency:")
+        for result in results:
+            print(f"    {result['endpoint']}")
+            print_server_stages(metrics, result["endpoint"])
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--only", nargs="*", choices=list(ENDPOINTS), help="Endpoints to run")
+    parser.add_argument("--question", action="append",
+                        help="Transcript for the stub STT (repeatable; default: an open question for the LLM)")
+    parser.add_argument("--accept", help="Accept header, e.g. audio/mpeg or multipart/mixed (default: legacy formats)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+    args.question = args.question or ["Can you recommend something fun to watch this weekend with my family?"]
+
+    results = asyncio.run(benchmark(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"concurrency": args.concurrency, "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
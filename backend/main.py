@@ -1,5 +1,7 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
+import asyncio
 import os
 from dotenv import load_dotenv
 
@@ -10,16 +12,50 @@ from app.routers.showtimes import router as showtimes_router
 from app.routers.bookings import router as bookings_router
 from app.routers.voice import router as voice_router
 from app.database import engine, Base
+from app.services.expiry_scheduler import expiry_scheduler
+from app.services.idempotency import idempotency_store
+from app.services.booking_queue import booking_queue
+from app.services.principal_cache import principal_cache
+from app.services.password_hasher import password_hasher
+from app.services.http_client import http_clients
+from app.services.llm_cache import llm_cache
+from app.services.tts_cache import audio_cache, warm_up, TTS_WARMUP
+from app.services.intents import intent_router
+from app.services.catalog_digest import catalog_digest
+from app.services.voice_metrics import voice_metrics
 
 load_dotenv()
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+ENABLE_EXPIRY_SCHEDULER = os.getenv("BOOKING_EXPIRY_SCHEDULER", "true").lower() == "true"
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start and stop app-lifetime background services"""
+    if ENABLE_EXPIRY_SCHEDULER:
+        await expiry_scheduler.start()
+    await http_clients.start()
+    await catalog_digest.start()
+    # Pre-render canned voice prompts without delaying startup
+    tts_warmup = asyncio.create_task(warm_up()) if TTS_WARMUP else None
+    yield
+    if tts_warmup:
+        tts_warmup.cancel()
+    await booking_queue.stop()
+    await expiry_scheduler.stop()
+    await catalog_digest.stop()
+    await http_clients.stop()
+    password_hasher.shutdown()
+
+
 app = FastAPI(
     title="Movie Ticket Management API",
     description="Backend API for Movie Ticket Booking System with JWT Authentication",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -34,6 +70,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-User-Text", "X-Agent-Response"],
 )
 
 # Include routers
@@ -56,6 +93,22 @@ async def root():
 async def health_check():
     return {"status": "healthy", "database": "postgresql"}
 
+@app.get("/metrics")
+async def metrics():
+    return {
+        "booking_expiry": expiry_scheduler.metrics(),
+        "idempotency": idempotency_store.metrics(),
+        "booking_queue": booking_queue.metrics(),
+        "principal_cache": principal_cache.metrics(),
+        "password_hasher": password_hasher.metrics(),
+        "http_clients": http_clients.metrics(),
+        "llm_cache": llm_cache.metrics(),
+        "tts_cache": audio_cache.metrics(),
+        "intents": intent_router.metrics(),
+        "catalog_digest": catalog_digest.metrics(),
+        "voice": voice_metrics.metrics()
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
@@ -15,8 +15,11 @@ from app.database import SessionLocal
 from app.models.user import User, UserRole
 from app.models.movie import Movie, Language, Genre, Rating, Showtime
 from app.models.theater import Theater, Screen, Seat, SeatType
-from app.models.booking import Booking, BookingSeat, Payment, BookingStatus, PaymentStatus
+from app.models.booking import (
+    Booking, BookingSeat, ReleasedBookingSeat, Payment, BookingStatus, PaymentStatus
+)
 from app.auth.security import get_password_hash
+from app.crud import inventory
 
 
 RANDOM_SEED = 42
@@ -243,6 +246,11 @@ def seed_database():
         db.commit()
         print(f"    ✓ Created {len(showtime_objects)} showtimes")
 
+        # Seat inventory: one row per seat per showtime
+        inventory_rows = inventory.populate_showtime_seats(db)
+        db.commit()
+        print(f"    ✓ Created {inventory_rows} showtime seat inventory rows")
+
         # 7. Create Bookings to exercise seat locking + transactions
         print("  Creating sample bookings (locks, expired, confirmed)...")
         showtimes = db.query(Showtime).all()
@@ -291,8 +299,14 @@ def seed_database():
             db.flush()
             booking_objects.append(booking)
 
+            # Expired bookings no longer hold their seats; keep them in the archive
+            seat_model = ReleasedBookingSeat if status == BookingStatus.EXPIRED else BookingSeat
+            if status != BookingStatus.EXPIRED:
+                inventory.hold_seats(db, showtime.id, [s.id for s in seats], booking.id, expires_at)
+            if status == BookingStatus.CONFIRMED:
+                inventory.book_seats(db, [booking.id])
             for seat in seats:
-                booking_seat_objects.append(BookingSeat(
+                booking_seat_objects.append(seat_model(
                     booking_id=booking.id,
                     seat_id=seat.id,
                     showtime_id=showtime.id,